@@ -1,121 +1,407 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, status, Depends
-from fastapi.responses import JSONResponse
-import os, tempfile, shutil
+from typing import Literal
+
+from fastapi import APIRouter, Request, UploadFile, File, Form, HTTPException, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+import asyncio
+import os
+import re
+import tempfile
+import threading
+import json
 import logging
+import time
 import traceback
 
 from config.settings import settings
-from core.models import ExtractedDocument, MatchScores, ValidateResponse
-from services.ocr_service import EasyOCREngine, DocumentExtractor
+from core.models import JobStatus, ScreenMatch, ScreenRecord, ScreenRequest, ScreenResponse, ValidateResponse
+from services.metrics import REQUEST_SECONDS, span, start_request_timings
+from services.ocr_executor import OcrBusyError, OcrTimeoutError
+from services.reader_pool import PoolExhaustedError
 from services.match_service import Matcher
-from utils.tckn import is_valid_tckn
+from services.validation_service import validate_images, validation_events
+from services.job_service import DONE, FAILED, JobQueueFullError, sse_event, sse_format
+from services.upload_guard import UploadRejectedError, inspect_image, read_limited, spool_limited
+from services.batch_service import (
+    Checkpoint, ManifestError, iter_archive, iter_jsonl_manifest, run_batch,
+)
 
-# Logging 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-def get_pipeline():
-    engine = EasyOCREngine(languages=("tr","en"))
-    extractor = DocumentExtractor(engine)
+def get_pipeline(request: Request):
+    """Açılışta kurulan OCR executor'ını ve eşleştiriciyi döner; modeller henüz yüklenmediyse 503."""
+    readiness = request.app.state.readiness
+    if not readiness.ready:
+        failed = readiness.error is not None
+        raise HTTPException(
+            status_code=503,
+            detail="OCR modelleri yüklenemedi." if failed else "OCR modelleri yükleniyor, lütfen daha sonra tekrar deneyin.",
+            headers={"Retry-After": "5"},
+        )
+    executor = request.app.state.ocr_executor
     matcher = Matcher(min_name_similarity=settings.min_name_similarity)
-    return extractor, matcher
+    return executor, matcher
 
 def _allowed(filename: str) -> bool:
     _, ext = os.path.splitext(filename.lower())
     return ext in settings.allowed_extensions
 
+async def _read_uploads(id_image: UploadFile, form_image: UploadFile) -> tuple[bytes, bytes]:
+    """
+    Yüklemeleri parça parça okur; sihirli bayt ve görsel başlığı kontrolünden geçmeyenler
+    decode/OCR'a ulaşmadan reddedilir.
+    """
+    # Dosya formatı kontrolü
+    if not _allowed(id_image.filename) or not _allowed(form_image.filename):
+        raise HTTPException(status_code=400, detail="Geçersiz dosya formatı. (jpg, jpeg, png, bmp, tiff)")
+
+    # Yüklemeler diske yazılmadan tek tampona okunur (PII diskte kalmaz)
+    max_bytes = settings.max_upload_mb * 1024 * 1024
+    images = []
+    for upload in (id_image, form_image):
+        try:
+            data = await read_limited(upload, max_bytes)
+            data, _ = inspect_image(data, max_pixels=settings.max_image_pixels, max_side=settings.max_image_side,
+                                    max_pages=settings.max_tiff_pages, tiff_page=settings.tiff_page)
+        except UploadRejectedError as e:
+            logger.info("Yükleme reddedildi (%s): %s", e.status_code, e.detail)
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        except Exception as e:
+            logger.error("Dosya okuma hatası: %s", e)
+            raise HTTPException(status_code=500, detail=f"Dosya yükleme hatası: {e}")
+        images.append(data)
+    return images[0], images[1]
+
 @router.post("/validate", response_model=ValidateResponse)
 async def validate(
+    request: Request,
     id_image: UploadFile = File(..., description="Kimlik (ön yüz) görseli"),
     form_image: UploadFile = File(..., description="İmzalı başvuru formu görseli"),
+    debug_timings: bool = False,
+    mode: Literal["parallel", "short_circuit"] | None = None,
 ):
-    tmp_id_path = None
-    tmp_form_path = None
-    
+    started = time.perf_counter()
+    timings = start_request_timings()
+    code = 500
     try:
-        # Dosya formatı kontrolü
-        if not _allowed(id_image.filename) or not _allowed(form_image.filename):
-            raise HTTPException(status_code=400, detail="Geçersiz dosya formatı. (jpg, jpeg, png, bmp, tiff)")
-
-        # Boyut limiti kontrolü
-        if (id_image.size and id_image.size > settings.max_upload_mb*1024*1024) or \
-           (form_image.size and form_image.size > settings.max_upload_mb*1024*1024):
-            raise HTTPException(status_code=413, detail=f"Dosya boyutu {settings.max_upload_mb}MB üstünde.")
+        with span("upload"):
+            id_bytes, form_bytes = await _read_uploads(id_image, form_image)
 
-       
-        logger.info("Dosyalar geçici klasöre yazılıyor...")
-        try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(id_image.filename)[1]) as tmp_id:
-                shutil.copyfileobj(id_image.file, tmp_id)
-                tmp_id_path = tmp_id.name
-            logger.info(f"Kimlik dosyası yazıldı: {tmp_id_path}")
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(form_image.filename)[1]) as tmp_form:
-                shutil.copyfileobj(form_image.file, tmp_form)
-                tmp_form_path = tmp_form.name
-            logger.info(f"Form dosyası yazıldı: {tmp_form_path}")
-            
-        except Exception as e:
-            logger.error(f"Dosya yazma hatası: {e}")
-            raise HTTPException(status_code=500, detail=f"Dosya yükleme hatası: {e}")
-
-      
         logger.info("OCR pipeline başlatılıyor...")
-        extractor, matcher = get_pipeline()
-        
-        # kımlik için  ocr
-        logger.info(f"Kimlik OCR başlıyor: {tmp_id_path}")
-        id_name, id_tckn, id_conf = extractor.extract(tmp_id_path)
-        logger.info(f"Kimlik sonucu - Ad: {id_name}, TCKN: {id_tckn}, Güven: {id_conf}")
-        
-        # Form OCR
-        logger.info(f"Form OCR başlıyor: {tmp_form_path}")
-        form_name, form_tckn, form_conf = extractor.extract(tmp_form_path)
-        logger.info(f"Form sonucu - Ad: {form_name}, TCKN: {form_tckn}, Güven: {form_conf}")
-
-        # TCKN doğrulaması
-        if id_tckn and not is_valid_tckn(id_tckn):
-            logger.warning(f"Kimlik TCKN algoritmik doğrulamadan geçmedi: {id_tckn}")
-        if form_tckn and not is_valid_tckn(form_tckn):
-            logger.warning(f"Form TCKN algoritmik doğrulamadan geçmedi: {form_tckn}")
-
-        # Eşleştirme kısımı
-        logger.info("Eşleştirme yapılıyor...")
-        name_similarity, tckn_match, is_valid = matcher.compare(id_name, form_name, id_tckn, form_tckn)
-        logger.info(f"Eşleştirme sonucu - İsim benzerliği: {name_similarity}, TCKN eşleşmesi: {tckn_match}, Geçerli: {is_valid}")
-        
-        message = "Ad-Soyad ve TCKN tutarlı." if is_valid else "Eşleşme başarısız. Lütfen belgeleri kontrol edin."
-
-        payload = ValidateResponse(
-            is_valid=bool(is_valid),
-            message=message,
-            scores=MatchScores(
-                name_similarity=name_similarity,
-                tckn_match=bool(tckn_match),
-                ocr_confidence_hint=max(id_conf, form_conf)
-            ),
-            id=ExtractedDocument(name=id_name, tckn=id_tckn, confidence=id_conf),
-            form=ExtractedDocument(name=form_name, tckn=form_tckn, confidence=form_conf),
-        )
+        executor, matcher = get_pipeline(request)
+        try:
+            payload = await validate_images(executor, matcher, id_bytes, form_bytes,
+                                            gate=request.app.state.quality_gate, mode=mode)
+        except (PoolExhaustedError, OcrBusyError) as e:
+            logger.warning("OCR kapasitesi dolu: %s", e)
+            raise HTTPException(status_code=503, detail="Sunucu meşgul, lütfen daha sonra tekrar deneyin.")
+        except OcrTimeoutError as e:
+            logger.warning("OCR zaman aşımı: %s", e)
+            raise HTTPException(status_code=504, detail="OCR işlemi zaman aşımına uğradı.")
         
         logger.info("İşlem başarıyla tamamlandı")
-        return JSONResponse(payload.model_dump(), status_code=status.HTTP_200_OK)
+        if debug_timings or settings.metrics_expose_timings:
+            timings["total"] = time.perf_counter() - started
+            payload.timings = {k: round(v, 6) for k, v in timings.items()}
+        code = status.HTTP_200_OK
+        return JSONResponse(payload.model_dump(), status_code=code)
 
-    except HTTPException:
+    except HTTPException as e:
+        code = e.status_code
         raise
     except Exception as e:
         error_detail = f"İşlem hatası: {str(e)}\n{traceback.format_exc()}"
         logger.error(error_detail)
         raise HTTPException(status_code=500, detail=f"İşlem hatası: {str(e)}")
     finally:
-        
-        for p in (tmp_id_path, tmp_form_path):
-            if p:
-                try:
-                    if os.path.exists(p):
-                        os.remove(p)
-                        logger.debug(f"Geçici dosya silindi: {p}")
-                except Exception as cleanup_err:
-                    logger.warning(f"Dosya temizleme hatası ({p}): {cleanup_err}")
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint="/api/validate", status=str(code))
+
+
+@router.post("/validate/stream")
+async def validate_stream(
+    request: Request,
+    id_image: UploadFile = File(..., description="Kimlik (ön yüz) görseli"),
+    form_image: UploadFile = File(..., description="İmzalı başvuru formu görseli"),
+    mode: Literal["parallel", "short_circuit"] | None = None,
+):
+    """
+    Doğrulamayı Server-Sent Events olarak yayınlar: her belge okundukça `id` / `form`,
+    en sonda `result` (ValidateResponse) veya `error`. İstemci koparsa bekleyen OCR iptal edilir.
+    """
+    started = time.perf_counter()
+    id_bytes, form_bytes = await _read_uploads(id_image, form_image)
+    executor, matcher = get_pipeline(request)
+    gate = request.app.state.quality_gate
+
+    async def events():
+        code = 500
+        stream = validation_events(executor, matcher, id_bytes, form_bytes, gate, mode or settings.validation_mode)
+        try:
+            async for event, payload in stream:
+                yield sse_format(event, payload.model_dump())
+            code = status.HTTP_200_OK
+        except asyncio.CancelledError:
+            # İstemci bağlantıyı kapattı
+            code = 499
+            raise
+        except (PoolExhaustedError, OcrBusyError) as e:
+            logger.warning("OCR kapasitesi dolu: %s", e)
+            code = 503
+            yield sse_format("error", {"status_code": code, "detail": "Sunucu meşgul, lütfen daha sonra tekrar deneyin."})
+        except OcrTimeoutError as e:
+            logger.warning("OCR zaman aşımı: %s", e)
+            code = 504
+            yield sse_format("error", {"status_code": code, "detail": "OCR işlemi zaman aşımına uğradı."})
+        except Exception as e:
+            logger.error("İşlem hatası: %s", e, exc_info=True)
+            yield sse_format("error", {"status_code": code, "detail": f"İşlem hatası: {str(e)}"})
+        finally:
+            await stream.aclose()
+            REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint="/api/validate/stream", status=str(code))
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED, response_model=JobStatus)
+async def create_job(
+    request: Request,
+    id_image: UploadFile = File(..., description="Kimlik (ön yüz) görseli"),
+    form_image: UploadFile = File(..., description="İmzalı başvuru formu görseli"),
+    callback_url: str | None = Form(None, description="İş bitince sonucun POST edileceği adres"),
+):
+    """Doğrulamayı kuyruğa alır ve hemen iş kimliği döner."""
+    manager = request.app.state.job_manager
+    if callback_url is not None and not manager.webhook_allowed(callback_url):
+        raise HTTPException(status_code=400, detail="Bu callback adresine izin verilmiyor.")
+    id_bytes, form_bytes = await _read_uploads(id_image, form_image)
+    try:
+        job = await manager.submit(id_bytes, form_bytes, callback_url)
+    except JobQueueFullError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=429, detail="İş kuyruğu dolu, lütfen daha sonra tekrar deneyin.",
+                            headers={"Retry-After": str(e.retry_after_s)})
+    return JSONResponse(job.to_status().model_dump(), status_code=status.HTTP_202_ACCEPTED,
+                        headers={"Location": f"/api/jobs/{job.id}"})
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(request: Request, job_id: str):
+    job = request.app.state.job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="İş bulunamadı.")
+    return job.to_status()
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(request: Request, job_id: str):
+    """İş durumu değiştikçe Server-Sent Events yayınlar; iş bitince akış kapanır."""
+    manager = request.app.state.job_manager
+    job = manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="İş bulunamadı.")
+
+    async def events():
+        last = None
+        while True:
+            if job.status != last:
+                last = job.status
+                yield sse_event(job)
+            if job.status in (DONE, FAILED) or await request.is_disconnected():
+                return
+            await manager.wait_for_change(job, last, timeout_s=15.0)
+            if job.status == last:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+_ARCHIVE_EXTS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+# Her toplu işlem işçi başına bir OCR modeli yükler; sınırı aşan istekler 429 alır
+_batch_slots = threading.BoundedSemaphore(settings.batch_max_concurrent)
+_BATCH_RETRY_AFTER_S = 30
+_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+_CHECKPOINT_ID_RE = re.compile(r"^[A-Za-z0-9_\-]{1,64}$")
+
+
+@router.post("/validate/batch")
+async def validate_batch(
+    manifest: UploadFile = File(..., description="JSONL manifest veya zip/tar görsel arşivi"),
+    checkpoint_id: str | None = Form(None, description="Kaldığı yerden devam için checkpoint adı"),
+):
+    """
+    Toplu doğrulama: her (kimlik, form) çifti bittikçe bir NDJSON satırı döner.
+    JSONL manifestteki yollar yalnızca KYC_BATCH_ROOT altında olabilir.
+    """
+    name = (manifest.filename or "").lower()
+    is_archive = name.endswith(_ARCHIVE_EXTS)
+    if not is_archive and not name.endswith((".jsonl", ".ndjson")):
+        raise HTTPException(status_code=400, detail="Manifest .jsonl veya zip/tar arşivi olmalı.")
+    if not is_archive and not settings.batch_root:
+        raise HTTPException(status_code=400, detail="Yol içeren manifestler bu sunucuda kapalı (KYC_BATCH_ROOT).")
+
+    checkpoint_path = None
+    if checkpoint_id is not None:
+        if not settings.batch_checkpoint_dir:
+            raise HTTPException(status_code=400, detail="Checkpoint desteği kapalı (KYC_BATCH_CHECKPOINT_DIR).")
+        if not _CHECKPOINT_ID_RE.match(checkpoint_id):
+            raise HTTPException(status_code=400, detail="Geçersiz checkpoint adı.")
+        checkpoint_path = os.path.join(settings.batch_checkpoint_dir, f"{checkpoint_id}.txt")
+
+    # Sıra beklenmez: bekleyen her toplu işlem bir thread havuzu iş parçacığını tutardı
+    if not _batch_slots.acquire(blocking=False):
+        raise HTTPException(status_code=429, detail="Çalışan toplu işlem sınırı dolu, lütfen daha sonra tekrar deneyin.",
+                            headers={"Retry-After": str(_BATCH_RETRY_AFTER_S)})
+    checkpoint = None
+    # UploadFile yanıt akışı başlamadan kapatıldığından içerik kendi tamponumuza alınır
+    fileobj = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_BYTES)
+    started = False
+
+    def cleanup() -> None:
+        _batch_slots.release()
+        if checkpoint is not None:
+            checkpoint.close()
+        fileobj.close()
+
+    def cleanup_if_not_started() -> None:
+        # İstemci akış başlamadan koptuysa üreteç hiç çalışmaz; slot burada bırakılır
+        if not started:
+            cleanup()
+
+    try:
+        if checkpoint_path is not None:
+            checkpoint = Checkpoint(checkpoint_path)
+        await spool_limited(manifest, fileobj, settings.batch_max_request_mb * 1024 * 1024)
+    except UploadRejectedError as e:
+        cleanup()
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except BaseException:
+        cleanup()
+        raise
+    if is_archive:
+        items = iter_archive(fileobj, name)
+    else:
+        lines = (line.decode("utf-8") for line in fileobj)
+        items = iter_jsonl_manifest(lines, base_dir=settings.batch_root, root=settings.batch_root)
+
+    def lines_out():
+        nonlocal started
+        started = True
+        try:
+            for line in run_batch(
+                items,
+                workers=settings.batch_workers or None,
+                max_pending=settings.batch_max_pending or None,
+                checkpoint=checkpoint,
+            ):
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        except ManifestError as e:
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+        except Exception as e:
+            # İşçi süreç çöktü (BrokenProcessPool) vb.: akış sessizce kesilmez, son satır hatadır
+            logger.error("Toplu işlem yarıda kesildi: %s", e, exc_info=True)
+            detail = str(e) or type(e).__name__
+            yield json.dumps({"error": f"Toplu işlem yarıda kesildi: {detail}"}, ensure_ascii=False) + "\n"
+        finally:
+            cleanup()
+
+    return StreamingResponse(iterate_in_threadpool(lines_out()), media_type="application/x-ndjson",
+                             background=BackgroundTask(cleanup_if_not_started))
+
+
+@router.post("/screen", response_model=ScreenResponse)
+async def screen(request: Request, body: ScreenRequest):
+    """Başvuranı mevcut müşteriler ve izleme listelerinde TCKN + isim benzerliğiyle arar."""
+    if not body.name and not body.tckn:
+        raise HTTPException(status_code=400, detail="name veya tckn verilmeli.")
+    index = request.app.state.match_index
+    started = time.perf_counter()
+    hits = await run_in_threadpool(
+        index.query, body.name, body.tckn,
+        k=body.k or settings.match_index_top_k,
+        min_score=body.min_score if body.min_score is not None else settings.match_index_min_score,
+        sources=body.sources,
+    )
+    return ScreenResponse(
+        matches=[ScreenMatch(**h.__dict__) for h in hits],
+        took_ms=round((time.perf_counter() - started) * 1000, 3),
+    )
+
+
+@router.post("/screen/records", status_code=status.HTTP_201_CREATED)
+async def add_screen_record(request: Request, record: ScreenRecord):
+    """Kaydı tarama indeksine ekler (aynı record_id varsa günceller)."""
+    index = request.app.state.match_index
+    await run_in_threadpool(index.insert, record.record_id, record.name, record.tckn, record.source)
+    return {"record_id": record.record_id}
+
+
+@router.delete("/screen/records/{record_id}")
+async def delete_screen_record(request: Request, record_id: str):
+    index = request.app.state.match_index
+    if not await run_in_threadpool(index.delete, record_id):
+        raise HTTPException(status_code=404, detail="Kayıt bulunamadı.")
+    return {"deleted": record_id}
+
+
+@router.get("/stats/screen")
+async def screen_stats(request: Request):
+    return request.app.state.match_index.stats()
+
+
+@router.get("/stats/pool")
+async def pool_stats(request: Request):
+    """OCR okuyucu havuzu istatistikleri (kiralama, bekleme, kullanımda)."""
+    pool = request.app.state.reader_pool
+    stats = pool.stats().as_dict() if pool is not None else {}
+    executor = request.app.state.ocr_executor
+    stats["ready"] = request.app.state.readiness.ready
+    if executor is not None:
+        stats["executor"] = executor.kind
+        stats["inflight_jobs"] = executor.inflight
+    budget = request.app.state.cpu_budget
+    if budget is not None:
+        stats["cpu_budget"] = budget.as_dict()
+    return stats
+
+
+@router.get("/stats/batching")
+async def batching_stats(request: Request):
+    """Mikro-batch boyutları ve gecikmeleri."""
+    scheduler = request.app.state.batch_scheduler
+    return scheduler.stats() if scheduler is not None else {"enabled": False}
+
+
+@router.get("/stats/quality")
+async def quality_stats(request: Request):
+    """Kalite kapısı: reddedilen çiftler, sebepler ve atlanan tahmini OCR süresi."""
+    gate = request.app.state.quality_gate
+    return gate.stats() if gate is not None else {"enabled": False}
+
+
+@router.get("/stats/cache")
+async def cache_stats(request: Request):
+    """OCR önbelleği isabet / ıska / tahliye sayaçları (process modunda işçilerin toplamı)."""
+    cache = request.app.state.ocr_cache
+    if cache is None:
+        return {"enabled": False}
+    executor = request.app.state.ocr_executor
+    return executor.cache_stats() if executor is not None else cache.stats()
+
+
+@router.delete("/cache")
+async def purge_cache(request: Request):
+    """Önbellekteki tüm OCR sonuçlarını (PII) siler; process modunda işçilere de iletilir."""
+    cache = request.app.state.ocr_cache
+    executor = request.app.state.ocr_executor
+    if cache is None:
+        removed = 0
+    elif executor is not None:
+        removed = await run_in_threadpool(executor.purge_cache)
+    else:
+        removed = await run_in_threadpool(cache.purge)
+    return {"removed": removed}
@@ -0,0 +1,8 @@
+"""
+Çevrimdışı performans ölçümleri.
+
+    python -m benchmarks text    --out sonuc.json
+    python -m benchmarks extract --repeats 5
+    python -m benchmarks http    --concurrency 16 --requests 400
+    python -m benchmarks compare eski.json yeni.json
+"""
@@ -0,0 +1,119 @@
+from __future__ import annotations
+from typing import Optional
+import argparse
+import json
+import logging
+import sys
+
+from benchmarks.common import environment, peak_rss_mb, write_results
+
+
+def _compare(old_path: str, new_path: str) -> int:
+    """İki sonuç dosyasındaki p50/p95/p99 ve throughput değerlerini yan yana basar."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+
+    def flatten(d: dict, prefix: str = "") -> dict[str, float]:
+        out = {}
+        for k, v in d.items():
+            key = f"{prefix}{k}"
+            if k == "params":
+                continue
+            if isinstance(v, dict):
+                out.update(flatten(v, key + "."))
+            elif isinstance(v, (int, float)) and not isinstance(v, bool) and \
+                    k.endswith(("_ms", "_per_s", "rss_mb")):
+                out[key] = float(v)
+        return out
+
+    a, b = flatten(old.get("benchmarks", {})), flatten(new.get("benchmarks", {}))
+    a["peak_rss_mb"], b["peak_rss_mb"] = old.get("peak_rss_mb") or 0.0, new.get("peak_rss_mb") or 0.0
+    print(f"{'metrik':<60} {'eski':>12} {'yeni':>12} {'fark':>8}")
+    for key in sorted(set(a) & set(b)):
+        change = (b[key] - a[key]) / a[key] * 100 if a[key] else 0.0
+        print(f"{key:<60} {a[key]:>12.3f} {b[key]:>12.3f} {change:>+7.1f}%")
+    return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="VerifyCheck performans ölçümleri")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_out(p: argparse.ArgumentParser) -> None:
+        p.add_argument("--out", help="JSON sonuç dosyası (varsayılan: stdout)")
+
+    p = sub.add_parser("text", help="textnorm/tckn mikro ölçümleri")
+    p.add_argument("--lines", type=int, default=5000, help="Sentetik OCR çıktısı satır sayısı")
+    p.add_argument("--repeats", type=int, default=50)
+    p.add_argument("--tckn-count", type=int, default=100_000)
+    add_out(p)
+
+    p = sub.add_parser("extract", help="Örnek görsellerde uçtan uca DocumentExtractor.extract()")
+    p.add_argument("--repeats", type=int, default=3)
+    p.add_argument("--warmup", type=int, default=1)
+    p.add_argument("--no-templates", action="store_true", help="Şablonları atla, tam sayfa OCR ölç")
+    p.add_argument("--engine", default="easyocr", help="services.ocr_engines kayıtlı motor adı")
+    add_out(p)
+
+    p = sub.add_parser("http", help="/api/validate süreç içi yük testi (taslak OCR motoru)")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--requests", type=int, default=200)
+    p.add_argument("--stub-latency-ms", type=float, default=20.0, help="Taslak motorun tanıma süresi")
+    p.add_argument("--cache", action="store_true", help="OCR önbelleğini açık bırak")
+    add_out(p)
+
+    p = sub.add_parser("autotune", help="CPU bütçesi: slot / iş parçacığı kombinasyonlarını dene, en iyisini öner")
+    p.add_argument("--rounds", type=int, default=2, help="Slot başına örnek görsel turu")
+    p.add_argument("--pin", action="store_true", help="Slotları çekirdeklere sabitle")
+    p.add_argument("--max-p95-ms", type=float, default=None, help="Önerinin aşmaması gereken p95 gecikme")
+    p.add_argument("--configs", help="Denenecek 'slot,iş parçacığı' listesi, ör. 1,8;2,4;4,2")
+    p.add_argument("--engine", default=None, help="Motor (varsayılan: KYC_OCR_ENGINE)")
+    p.add_argument("--trial", help=argparse.SUPPRESS)
+    add_out(p)
+
+    p = sub.add_parser("compare", help="İki sonuç dosyasını karşılaştır")
+    p.add_argument("old")
+    p.add_argument("new")
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        return _compare(args.old, args.new)
+
+    # Servis modüllerinin INFO/DEBUG logları ölçümü bozmasın
+    logging.disable(logging.INFO)
+
+    if args.command == "text":
+        from benchmarks import bench_text
+        result = bench_text.run(lines=args.lines, repeats=args.repeats, tckn_count=args.tckn_count)
+    elif args.command == "autotune":
+        from benchmarks import bench_cpu
+        if args.trial:
+            # Üst sürecin başlattığı tek kombinasyon ölçümü; sonuç son satırda JSON
+            slots, threads = (int(x) for x in args.trial.split(","))
+            print(json.dumps(bench_cpu.trial(slots, threads, rounds=args.rounds, pin=args.pin,
+                                             engine_name=args.engine)))
+            return 0
+        configs = [tuple(int(x) for x in c.split(",")) for c in args.configs.split(";")] if args.configs else None
+        result = bench_cpu.run(rounds=args.rounds, pin=args.pin, max_p95_ms=args.max_p95_ms,
+                               configs=configs, engine_name=args.engine)
+    elif args.command == "extract":
+        from benchmarks import bench_extract
+        result = bench_extract.run(repeats=args.repeats, warmup=args.warmup, templates=not args.no_templates,
+                                   engine_name=args.engine)
+    else:
+        from benchmarks import bench_http
+        result = bench_http.run(concurrency=args.concurrency, requests=args.requests,
+                                latency_ms=args.stub_latency_ms, cache=args.cache)
+
+    write_results(args.out, {
+        "environment": environment(),
+        "benchmarks": {args.command: result},
+        "peak_rss_mb": peak_rss_mb(),
+    })
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
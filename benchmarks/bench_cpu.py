@@ -0,0 +1,138 @@
+"""
+CPU bütçesi otomatik ayarı: (eşzamanlı slot, slot başına iş parçacığı) kombinasyonlarını
+örnek görsellerde dener ve makine için en iyi verim / gecikme ayarını önerir.
+
+torch'un interop havuzu ve çekirdek sabitleme süreç başına bir kez ayarlanabildiğinden
+her kombinasyon ayrı bir alt süreçte ölçülür.
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_extract import ROOT, sample_images
+from benchmarks.common import summarize
+from config.settings import settings
+
+
+def candidate_configs(cpus: int) -> list[tuple[int, int]]:
+    """Slot sayısı 1, 2, 4, … (≤ çekirdek); her biri için tam ve yarım iş parçacığı payı."""
+    configs = []
+    slots = 1
+    while slots <= cpus:
+        per_slot = max(1, cpus // slots)
+        for threads in sorted({per_slot, max(1, per_slot // 2)}, reverse=True):
+            configs.append((slots, threads))
+        slots *= 2
+    return configs
+
+
+def trial(slots: int, threads: int, rounds: int = 2, pin: bool = False, engine_name: str | None = None) -> dict:
+    """Tek kombinasyon: `slots` motor aynı anda örnekleri `rounds` tur işler (bu süreçte)."""
+    from services import cpu_budget
+    from services.ocr_engines import create_engine, engine_options
+    from services.ocr_service import DocumentExtractor
+    from services.preprocess import config_from_settings, profiles_from_settings
+
+    engine_name = engine_name or settings.ocr_engine
+    budget = cpu_budget.plan(slots, threads=threads, interop_threads=settings.cpu_interop_threads, pin=pin)
+    cpu_budget.apply(budget)
+
+    samples = sample_images()
+    if not samples:
+        raise FileNotFoundError(f"Örnek görsel bulunamadı: {ROOT}")
+    payloads = []
+    for path, doc_type in samples:
+        with open(path, "rb") as f:
+            payloads.append((f.read(), doc_type if settings.ocr_use_templates else None))
+
+    extractors = [
+        DocumentExtractor(create_engine(engine_name, languages=tuple(settings.ocr_languages),
+                                        preprocess=config_from_settings(settings),
+                                        **engine_options(engine_name, settings)),
+                          cache=None, profiles=profiles_from_settings(settings))
+        for _ in range(slots)
+    ]
+    # Her slot kendi motorunu kullanır; ilk çağrı (ısınma) ölçüme girmez
+    for ex in extractors:
+        ex.extract(*payloads[0])
+
+    def worker(slot: int) -> list[float]:
+        cpu_budget.enter_thread_slot(budget, slot)
+        times = []
+        for i in range(rounds * len(payloads)):
+            # Slotlar farklı görsellerden başlar; aynı anda farklı boyutlar işlenir
+            data, kind = payloads[(i + slot) % len(payloads)]
+            t0 = time.perf_counter()
+            extractors[slot].extract(data, kind)
+            times.append(time.perf_counter() - t0)
+        return times
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=slots) as pool:
+        per_slot = list(pool.map(worker, range(slots)))
+    wall = time.perf_counter() - started
+    times = [t for slot_times in per_slot for t in slot_times]
+    return {"slots": slots, "threads": threads, **summarize(times, wall_s=wall)}
+
+
+def _run_trial_subprocess(slots: int, threads: int, rounds: int, pin: bool, engine_name: str | None) -> dict:
+    cmd = [sys.executable, "-m", "benchmarks", "autotune", "--trial", f"{slots},{threads}",
+           "--rounds", str(rounds)]
+    if pin:
+        cmd.append("--pin")
+    if engine_name:
+        cmd += ["--engine", engine_name]
+    # Alt sürecin kütüphane havuzları bütçeyi ilk yüklemede okusun
+    env = {k: v for k, v in os.environ.items()
+           if k not in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "OMP_THREAD_LIMIT")}
+    out = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT, env=env)
+    if out.returncode != 0:
+        return {"slots": slots, "threads": threads, "error": out.stderr.strip().splitlines()[-1:]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def recommend(trials: list[dict], max_p95_ms: float | None = None) -> dict | None:
+    """En yüksek verim; p95 sınırı verilirse onu aşmayanlar arasından."""
+    ok = [t for t in trials if "error" not in t]
+    if max_p95_ms is not None:
+        ok = [t for t in ok if t["p95_ms"] <= max_p95_ms]
+    if not ok:
+        return None
+    best = max(ok, key=lambda t: (t["throughput_per_s"], -t["p95_ms"]))
+    return {
+        "slots": best["slots"],
+        "threads": best["threads"],
+        "throughput_per_s": best["throughput_per_s"],
+        "p95_ms": best["p95_ms"],
+        # Aynı eşzamanlılığı uygulamada veren ayarlar
+        "env": {
+            "KYC_OCR_POOL_SIZE": best["slots"],
+            "KYC_OCR_EXECUTOR_WORKERS": best["slots"],
+            "KYC_CPU_THREADS_PER_SLOT": best["threads"],
+        },
+    }
+
+
+def run(rounds: int = 2, pin: bool = False, max_p95_ms: float | None = None,
+        configs: list[tuple[int, int]] | None = None, engine_name: str | None = None) -> dict:
+    from services.cpu_budget import available_cpus
+
+    cpus = len(available_cpus())
+    configs = configs or candidate_configs(cpus)
+    trials = []
+    for slots, threads in configs:
+        result = _run_trial_subprocess(slots, threads, rounds, pin, engine_name)
+        print(f"slot={slots} iş parçacığı={threads}: "
+              + (f"{result['throughput_per_s']:.2f} belge/sn, p95 {result['p95_ms']:.0f} ms"
+                 if "error" not in result else f"hata {result['error']}"), file=sys.stderr)
+        trials.append(result)
+    return {
+        "params": {"cpus": cpus, "rounds": rounds, "pin": pin, "max_p95_ms": max_p95_ms,
+                   "engine": engine_name or settings.ocr_engine},
+        "trials": {f"slots{t['slots']}_threads{t['threads']}": t for t in trials},
+        "recommendation": recommend(trials, max_p95_ms),
+    }
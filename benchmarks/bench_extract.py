@@ -0,0 +1,66 @@
+"""Paketteki örnek görseller üzerinde uçtan uca DocumentExtractor.extract() ölçümü."""
+from __future__ import annotations
+import glob
+import os
+import time
+
+from benchmarks.common import summarize
+from config.settings import settings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample_images(root: str = ROOT) -> list[tuple[str, str]]:
+    """(yol, belge türü) çiftleri: basvuru_formu_*.jpg ve Kimlik kartı.png."""
+    from services.validation_service import APPLICATION_FORM, ID_CARD
+
+    samples = [(p, ID_CARD) for p in sorted(glob.glob(os.path.join(root, "Kimlik kart*.png")))]
+    samples += [(p, APPLICATION_FORM) for p in sorted(glob.glob(os.path.join(root, "basvuru_formu_*.jpg")))]
+    return samples
+
+
+def run(repeats: int = 3, warmup: int = 1, templates: bool = True, engine_name: str = "easyocr") -> dict:
+    """
+    Önbellek kapalı çalışır; her tekrar gerçek OCR'dır.
+    EasyOCR modellerinin önceden indirilmiş olması gerekir (çevrimdışı).
+    """
+    from services.ocr_engines import create_engine, engine_options
+    from services.ocr_service import DocumentExtractor
+    from services.preprocess import config_from_settings, profiles_from_settings
+
+    samples = sample_images()
+    if not samples:
+        raise FileNotFoundError(f"Örnek görsel bulunamadı: {ROOT}")
+
+    started = time.perf_counter()
+    engine = create_engine(engine_name, languages=tuple(settings.ocr_languages),
+                           preprocess=config_from_settings(settings), **engine_options(engine_name, settings))
+    model_load_s = time.perf_counter() - started
+    extractor = DocumentExtractor(engine, cache=None, profiles=profiles_from_settings(settings))
+
+    results, all_samples = {}, []
+    for path, doc_type in samples:
+        # Dosya okuma ölçüme girmesin; HTTP yolunda da girdi bayttır
+        with open(path, "rb") as f:
+            data = f.read()
+        kind = doc_type if templates else None
+        for _ in range(warmup):
+            extractor.extract(data, kind)
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            res = extractor.extract(data, kind)
+            times.append(time.perf_counter() - t0)
+        stats = summarize(times)
+        stats.update({"doc_type": doc_type, "name": res.name, "tckn": res.tckn, "confidence": res.confidence,
+                      "field_confidence": res.field_confidence})
+        results[os.path.basename(path)] = stats
+        all_samples += times
+
+    return {
+        "params": {"repeats": repeats, "warmup": warmup, "templates": templates, "engine": engine_name,
+                   "languages": list(settings.ocr_languages)},
+        "model_load_s": model_load_s,
+        "overall": summarize(all_samples),
+        "results": results,
+    }
@@ -0,0 +1,112 @@
+"""
+/api/validate için süreç içi ASGI yük testi.
+OCR motoru sabit çıktı dönen bir taslakla değiştirilir; ölçülen şey HTTP katmanı,
+yükleme, decode/önişleme, havuz/executor ve ayrıştırma maliyetidir.
+"""
+from __future__ import annotations
+from collections import Counter
+import asyncio
+import functools
+import os
+import time
+
+from benchmarks.bench_extract import ROOT
+from benchmarks.common import summarize
+from config.settings import settings
+from services.ocr_engines import register_engine
+from services.ocr_service import BaseOCREngine
+from services.preprocess import PreprocessConfig
+
+STUB_LINES = [
+    ([[10, 10], [200, 10], [200, 40], [10, 40]], "T.C. Kimlik No", 0.9),
+    ([[10, 50], [200, 50], [200, 80], [10, 80]], "10000000146", 0.95),
+    ([[10, 90], [200, 90], [200, 120], [10, 120]], "Soyadı / Surname", 0.8),
+    ([[10, 130], [200, 130], [200, 160], [10, 160]], "ANKARA", 0.9),
+    ([[10, 170], [200, 170], [200, 200], [10, 200]], "Adı / Given Name(s)", 0.8),
+    ([[10, 210], [200, 210], [200, 240], [10, 240]], "KAAN", 0.9),
+]
+
+
+class StubOCREngine(BaseOCREngine):
+    """Model yüklemeden sabit satırlar dönen motor; tanıma süresi `latency_ms` ile taklit edilir."""
+    name = "stub"
+
+    def __init__(self, languages=("tr", "en"), preprocess: PreprocessConfig | None = None,
+                 latency_ms: float = 20.0):
+        super().__init__(languages, preprocess)
+        self.latency_s = latency_ms / 1000.0
+
+    def _recognize(self, gray, timings: dict | None = None) -> list:
+        started = time.perf_counter()
+        time.sleep(self.latency_s)
+        if timings is not None:
+            timings["recognize"] = time.perf_counter() - started
+        return list(STUB_LINES)
+
+
+def _read_sample(name: str) -> bytes:
+    with open(os.path.join(ROOT, name), "rb") as f:
+        return f.read()
+
+
+async def _load(app, id_bytes: bytes, form_bytes: bytes, total: int, concurrency: int) -> dict:
+    import httpx
+
+    files = {
+        "id_image": ("kimlik.png", id_bytes, "image/png"),
+        "form_image": ("form.jpg", form_bytes, "image/jpeg"),
+    }
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    remaining = iter(range(total))
+
+    async with app.router.lifespan_context(app):
+        if not await app.state.readiness.wait(timeout_s=60):
+            raise RuntimeError(f"Uygulama hazır olmadı: {app.state.readiness.as_dict()}")
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            # Isınma: havuz/executor ilk kullanımda kurulur
+            await client.post("/api/validate", files=files)
+
+            async def worker() -> None:
+                for _ in remaining:
+                    t0 = time.perf_counter()
+                    resp = await client.post("/api/validate", files=files)
+                    latencies.append(time.perf_counter() - t0)
+                    statuses[resp.status_code] += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            wall_s = time.perf_counter() - started
+
+    stats = summarize(latencies, wall_s=wall_s)
+    stats["wall_s"] = wall_s
+    stats["status_codes"] = {str(k): v for k, v in sorted(statuses.items())}
+    return stats
+
+
+def run(concurrency: int = 8, requests: int = 200, latency_ms: float = 20.0, cache: bool = False) -> dict:
+    """
+    Yalnızca thread executor ile çalışır (süreç modunda işçiler gerçek EasyOCR yükler);
+    micro-batching kapatılır çünkü taslak motorun readtext_batched'i yoktur.
+    """
+    import main
+
+    register_engine("stub", functools.partial(StubOCREngine, latency_ms=latency_ms))
+    settings.ocr_engine = "stub"
+    settings.ocr_cascade_fast_engine = None
+    settings.ocr_executor = "thread"
+    settings.ocr_batch_max_size = 1
+    settings.ocr_cache_enabled = cache
+
+    id_bytes = _read_sample("Kimlik kartı.png")
+    form_bytes = _read_sample("basvuru_formu_04.jpg")
+    stats = asyncio.run(_load(main.app, id_bytes, form_bytes, requests, concurrency))
+    return {
+        "params": {
+            "concurrency": concurrency, "requests": requests, "stub_latency_ms": latency_ms,
+            "cache": cache, "pool_size": settings.ocr_pool_size,
+            "executor_workers": settings.ocr_executor_workers, "max_inflight": settings.ocr_max_inflight,
+        },
+        "results": stats,
+    }
@@ -0,0 +1,91 @@
+"""normalize_text / extract_name_block / extract_tckn / is_valid_tckn mikro ölçümleri."""
+from __future__ import annotations
+import random
+
+from benchmarks.common import summarize, time_calls
+import numpy as np
+
+from utils.tckn import extract_tckn, is_valid_tckn, is_valid_tckn_many, recover_tckn
+from utils.textnorm import extract_name_block, normalize_text
+
+_FILLER = [
+    "TÜRKİYE CUMHURİYETİ", "KİMLİK KARTI", "REPUBLIC OF TURKEY", "IDENTITY CARD",
+    "Doğum Tarihi / Date of Birth", "Cinsiyeti / Gender", "Seri No / Document No",
+    "Son Geçerlilik / Valid Until", "Uyruğu / Nationality", "T.C. / TUR",
+    "BAŞVURU FORMU", "Adres bilgileri", "Telefon", "E-posta", "İmza", "Tarih",
+    "A12B34567", "01.01.1990", "31.12.2030", "E / M", "Ø€ gürültü", "|||",
+]
+_NAMES = ["KAAN", "AYŞE", "MEHMET", "ZEYNEP", "ÇAĞRI", "İLKNUR", "ÖMER", "ŞULE"]
+_SURNAMES = ["ANKARA", "YILMAZ", "ÖZTÜRK", "ÇELİK", "ŞAHİN", "DOĞAN", "KILIÇ", "AYDIN"]
+
+
+def make_tckn(rng: random.Random) -> str:
+    digits = [rng.randint(1, 9)] + [rng.randint(0, 9) for _ in range(8)]
+    digits.append((sum(digits[0:9:2]) * 7 - sum(digits[1:8:2])) % 10)
+    digits.append(sum(digits) % 10)
+    return "".join(map(str, digits))
+
+
+def synthetic_ocr_text(lines: int, seed: int = 0) -> str:
+    """
+    Büyük, gürültülü bir OCR çıktısı üretir; isim ve TCKN blokları sona yakın durur,
+    böylece ayrıştırıcılar metnin tamamını taramak zorunda kalır.
+    """
+    rng = random.Random(seed)
+    out = [rng.choice(_FILLER) + (" " + str(rng.randint(0, 99999)) if rng.random() < 0.3 else "")
+           for _ in range(max(0, lines - 8))]
+    out += [
+        "T.C. Kimlik No / TR Identity No", make_tckn(rng),
+        "Soyadı / Surname", rng.choice(_SURNAMES),
+        "Adı / Given Name(s)", rng.choice(_NAMES),
+        "Ad Soyad: " + rng.choice(_NAMES) + " " + rng.choice(_SURNAMES),
+        "Tarih: 01.01.2024",
+    ]
+    return "\n".join(out)
+
+
+def run(lines: int = 5000, repeats: int = 50, tckn_count: int = 100_000, seed: int = 0) -> dict:
+    text = synthetic_ocr_text(lines, seed)
+    normalized = normalize_text(text)
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+
+    rng = random.Random(seed)
+    # Yarısı geçerli, yarısı son hanesi bozulmuş
+    numbers = [make_tckn(rng) for _ in range(tckn_count)]
+    numbers = [n if i % 2 == 0 else n[:-1] + str((int(n[-1]) + 1) % 10) for i, n in enumerate(numbers)]
+
+    results = {}
+    for name, fn in (
+        ("normalize_text", lambda: normalize_text(text)),
+        ("extract_name_block", lambda: extract_name_block(normalized)),
+        ("extract_tckn", lambda: extract_tckn(normalized)),
+    ):
+        stats = summarize(time_calls(fn, repeats))
+        stats["mb_per_s"] = size_mb * stats["throughput_per_s"]
+        results[name] = stats
+
+    def validate_all() -> None:
+        for n in numbers:
+            is_valid_tckn(n)
+
+    stats = summarize(time_calls(validate_all, max(1, repeats // 10)))
+    stats["numbers_per_s"] = tckn_count * stats["throughput_per_s"]
+    results["is_valid_tckn"] = stats
+
+    # Vektörize doğrulama: müşteri tablolarındaki gibi int64 ve bayt dizileri
+    as_int = np.array(numbers, dtype=np.int64)
+    as_bytes = as_int.astype("S11")
+    for name, arr in (("is_valid_tckn_many[int64]", as_int), ("is_valid_tckn_many[bytes]", as_bytes)):
+        stats = summarize(time_calls(lambda: is_valid_tckn_many(arr), repeats))
+        stats["numbers_per_s"] = tckn_count * stats["throughput_per_s"]
+        results[name] = stats
+
+    # OCR karışıklıkları içeren adaylar (O→0, I→1, S→5, B→8) ve tek hane düzeltmesi
+    noisy = [n.replace("0", "O", 1).replace("1", "I", 1) for n in numbers[:1000]]
+    results["recover_tckn"] = summarize(time_calls(lambda: [recover_tckn(n) for n in noisy], max(1, repeats // 10)),
+                                        items=len(noisy) * max(1, repeats // 10))
+
+    return {
+        "params": {"lines": lines, "text_mb": round(size_mb, 3), "repeats": repeats, "tckn_count": tckn_count},
+        "results": results,
+    }
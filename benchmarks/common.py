@@ -0,0 +1,92 @@
+from __future__ import annotations
+from typing import Callable, Sequence
+import datetime
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def percentile(sorted_samples: Sequence[float], q: float) -> float:
+    """Doğrusal enterpolasyonlu yüzdelik (q: 0-100)."""
+    if not sorted_samples:
+        return 0.0
+    pos = (len(sorted_samples) - 1) * q / 100.0
+    lo, hi = math.floor(pos), math.ceil(pos)
+    return sorted_samples[lo] + (sorted_samples[hi] - sorted_samples[lo]) * (pos - lo)
+
+
+def summarize(samples: Sequence[float], wall_s: float | None = None, items: int | None = None) -> dict:
+    """
+    Süre örneklerini (sn) ms cinsinden özetler.
+    wall_s verilirse throughput toplam duvar süresinden, yoksa örnek toplamından hesaplanır.
+    """
+    s = sorted(samples)
+    total = wall_s if wall_s is not None else sum(s)
+    n = items if items is not None else len(s)
+    return {
+        "n": len(s),
+        "mean_ms": sum(s) / len(s) * 1000 if s else 0.0,
+        "min_ms": s[0] * 1000 if s else 0.0,
+        "p50_ms": percentile(s, 50) * 1000,
+        "p95_ms": percentile(s, 95) * 1000,
+        "p99_ms": percentile(s, 99) * 1000,
+        "max_ms": s[-1] * 1000 if s else 0.0,
+        "throughput_per_s": n / total if total > 0 else 0.0,
+    }
+
+
+def time_calls(fn: Callable[[], object], repeats: int, warmup: int = 1) -> list[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def peak_rss_mb() -> float | None:
+    """Sürecin şimdiye kadarki en yüksek RSS değeri (MB)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux KB, macOS bayt döner
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             timeout=5, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment() -> dict:
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(path: str | None, results: dict) -> None:
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
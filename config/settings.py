@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -7,7 +9,118 @@ class Settings(BaseSettings):
     allowed_extensions: set[str] = Field(default_factory=lambda: {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"})
     min_name_similarity: int = 80
     min_ocr_confidence: float = 0.35
+    # parallel: kimlik ve form birlikte okunur; short_circuit: önce kimlik, karar belliyse form atlanır
+    validation_mode: Literal["parallel", "short_circuit"] = "parallel"
+    short_circuit_min_confidence: float = Field(default=0.15, ge=0, le=1)  # kimlik alan güveni bunun altındaysa dur
     max_upload_mb: int = 10
+    # Yükleme koruması (services.upload_guard): decode/OCR öncesi reddetme
+    max_request_mb: int = Field(default=0, ge=0)  # istek gövdesi sınırı; 0 => 2 × max_upload_mb + 1MB
+    max_image_pixels: int = Field(default=40_000_000, gt=0)  # başlıktaki genişlik × yükseklik
+    max_image_side: int = Field(default=10_000, gt=0)
+    max_tiff_pages: int = Field(default=16, ge=1)
+    tiff_page: Literal["largest", "first"] = "largest"  # çok sayfalı TIFF'te OCR'a giden sayfa
+
+    # OCR okuyucu havuzu (uygulama açılışında yüklenir)
+    ocr_languages: list[str] = Field(default_factory=lambda: ["tr", "en"])
+    ocr_pool_size: int = Field(default=2, ge=1)
+    ocr_pool_timeout_s: float = Field(default=30.0, gt=0)
+    ocr_pool_exhausted: Literal["queue", "reject"] = "queue"
+    # Model ağırlıkları: imaja gömülü dizin + indirme kapalı => açılışta ağ erişimi yok
+    ocr_model_dir: str | None = None  # EasyOCR model_storage_directory (boşsa ~/.EasyOCR)
+    ocr_model_download: bool = True
+    ocr_warmup: bool = True  # açılışta her okuyucuda küçük bir ısınma çıkarımı
+
+    # OCR motoru (services.ocr_engines) ve kaskad: doluysa önce hızlı motor denenir; alan güveni
+    # min_ocr_confidence altındaysa veya TCKN sağlama toplamı tutmuyorsa belge ocr_engine'e yükseltilir
+    ocr_engine: str = "easyocr"
+    ocr_cascade_fast_engine: str | None = None  # ör. "tesseract"
+    ocr_tessdata_dir: str | None = None
+    ocr_tesseract_cmd: str | None = None
+
+    # Eşzamanlı isteklerin tanıma işini birleştiren mikro-batch (1: kapalı)
+    ocr_batch_max_size: int = Field(default=1, ge=1)
+    ocr_batch_max_wait_ms: float = Field(default=5.0, ge=0)
+
+    # OCR önişleme hattı (imzası önbellek anahtarına girer)
+    preprocess_max_side: int = Field(default=1600, ge=0)  # 0: küçültme yok
+    preprocess_reduced_decode: bool = True
+    preprocess_denoise: Literal["auto", "always", "never"] = "auto"
+    preprocess_noise_threshold: float = Field(default=6.0, ge=0)
+    preprocess_contrast: Literal["none", "clahe", "stretch"] = "none"
+    preprocess_orient: bool = True  # 90/180/270 yön ve eğim düzeltmesi (tek tanıma geçişi)
+    preprocess_max_skew: float = Field(default=15.0, ge=0, le=45)  # aranan en büyük eğim (derece)
+    # Belge türüne göre üzerine yazma, ör. {"id_card": {"contrast": "clahe"}}
+    preprocess_profiles: dict[str, dict] = Field(
+        default_factory=lambda: {"application_form": {"denoise": "never"}}
+    )
+
+    # OCR öncesi kalite kapısı (services.quality_service): bulanık / parlamalı / küçük
+    # görseller OCR'a gönderilmeden ValidateResponse.quality_errors ile reddedilir
+    quality_gate_enabled: bool = True
+    quality_min_blur: float = Field(default=15.0, ge=0)  # Laplace varyansı (1000 px'e normalize)
+    quality_max_overexposed: float = Field(default=0.5, ge=0, le=1)  # kırpılmış (≥250) piksel oranı
+    quality_min_short_side: int = Field(default=400, ge=0)  # px
+    quality_require_contour: bool = False  # belge kenarları kadrajda olmalı (fotoğraf akışları)
+    quality_min_contour_area: float = Field(default=0.2, ge=0, le=1)
+    # Belge türüne göre üzerine yazma; formların beyaz kâğıt zemini kırpılmış piksel sayılır
+    quality_profiles: dict[str, dict] = Field(
+        default_factory=lambda: {"application_form": {"max_overexposed": 0.995}}
+    )
+
+    # Sabit yerleşimli belgelerde yalnızca alan bölgeleri (ROI) okunur
+    ocr_use_templates: bool = True
+
+    # CPU bütçesi: torch/OpenCV iş parçacıkları eşzamanlı OCR slotlarına bölünür
+    cpu_budget_enabled: bool = True
+    cpu_threads_per_slot: int = Field(default=0, ge=0)  # 0: çekirdek sayısı / slot
+    cpu_interop_threads: int = Field(default=1, ge=1)
+    cpu_pin_workers: bool = False  # slotları ayrı çekirdeklere sabitle (Linux)
+
+    # OCR işleri event loop dışında çalışır
+    ocr_executor: Literal["thread", "process"] = "thread"
+    ocr_executor_workers: int = Field(default=2, ge=1)
+    ocr_max_inflight: int = Field(default=8, ge=1)
+    ocr_request_timeout_s: float = Field(default=60.0, gt=0)
+
+    # İçerik adresli OCR önbelleği (kayıtlar PII içerir: TTL + purge)
+    ocr_cache_enabled: bool = True
+    ocr_cache_max_mb: float = Field(default=64, gt=0)
+    ocr_cache_ttl_s: float = Field(default=3600.0, gt=0)
+    ocr_cache_disk_path: str | None = None
+    ocr_cache_sweep_s: float = Field(default=300.0, gt=0)  # süresi dolan kayıtların silinme aralığı
+
+    # Asenkron iş API'si (/api/jobs)
+    jobs_workers: int = Field(default=2, ge=1)
+    jobs_max_queue: int = Field(default=100, ge=1)
+    jobs_result_ttl_s: float = Field(default=3600.0, gt=0)
+    jobs_store_path: str | None = None  # SQLite; boşsa kuyruk yalnızca bellekte
+    jobs_max_retries: int = Field(default=5, ge=0)  # OCR kapasitesi doluyken yeniden deneme
+    jobs_retry_backoff_s: float = Field(default=1.0, gt=0)  # ilk bekleme; her denemede iki katına çıkar
+    jobs_webhook_prefixes: list[str] = Field(default_factory=list)  # izinli callback URL önekleri
+
+    # Toplu doğrulama (/api/validate/batch ve CLI)
+    batch_workers: int = Field(default=0, ge=0)  # 0: çekirdek sayısı
+    batch_max_pending: int = Field(default=0, ge=0)  # 0: işçi sayısının 2 katı
+    batch_max_concurrent: int = Field(default=1, ge=1)  # aynı anda çalışan HTTP toplu işlem (her biri ayrı süreç havuzu)
+    batch_max_request_mb: int = Field(default=1024, gt=0)  # /api/validate/batch yükleme (arşiv) sınırı
+    batch_root: str | None = None  # JSONL manifest yollarının sınırlandığı dizin
+    batch_checkpoint_dir: str | None = None
+
+    # Mükerrer müşteri / izleme listesi taraması (/api/screen)
+    match_index_path: str | None = None  # mmap indeks dizini; boşsa indeks yalnızca bellekte
+    match_index_top_k: int = Field(default=10, ge=1, le=1000)
+    match_index_min_score: float = Field(default=85.0, ge=0, le=100)
+    match_index_workers: int = -1  # rapidfuzz cdist çekirdek sayısı (-1: tümü)
+
+    # Gözlemlenebilirlik: /metrics her zaman açık; aşama dökümü yanıtta isteğe bağlı
+    metrics_expose_timings: bool = False  # True: her /api/validate yanıtında `timings`
+
+    # Günlükleme (utils.logs): kayıtlar kuyruk üzerinden ayrı thread'de yazılır
+    log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = "INFO"
+    log_format: Literal["text", "json"] = "text"
+    log_queue: bool = True
+    log_mask_pii: bool = True  # TCKN ve isimler günlükte maskelenir
+    log_debug_sample_rate: float = Field(default=1.0, ge=0, le=1)  # DEBUG kayıtlarının yazılan oranı
 
     class Config:
         env_prefix = "KYC_"
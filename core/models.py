@@ -5,15 +5,67 @@ class ExtractedDocument(BaseModel):
     tckn: str | None = None
     confidence: float = 0.0
     source: str = "easyocr"
+    # Alan başına OCR güveni (name, surname, full_name, tckn)
+    field_confidence: dict[str, float] = Field(default_factory=dict)
 
 class MatchScores(BaseModel):
     name_similarity: int
     tckn_match: bool
     ocr_confidence_hint: float
 
+class QualityError(BaseModel):
+    document: str  # "id" | "form"
+    code: str  # blur | overexposed | resolution | no_contour | unreadable
+    message: str
+    value: float
+    threshold: float
+
 class ValidateResponse(BaseModel):
     is_valid: bool
     message: str
     scores: MatchScores
     id: ExtractedDocument
     form: ExtractedDocument
+    # Aşama süreleri (sn); yalnızca ?debug_timings=true veya KYC_METRICS_EXPOSE_TIMINGS ile
+    timings: dict[str, float] | None = None
+    # Kalite kapısında reddedildiyse OCR çalışmaz; sebepler ve yapılması gerekenler
+    quality_errors: list[QualityError] = Field(default_factory=list)
+    # short_circuit modunda form OCR'ı atlandıysa sebebi (name_missing, tckn_missing, tckn_checksum, low_confidence)
+    short_circuit: str | None = None
+
+class BatchResultLine(BaseModel):
+    pair_id: str
+    response: ValidateResponse | None = None
+    error: str | None = None
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str
+    created_at: float
+    updated_at: float
+    result: ValidateResponse | None = None
+    error: str | None = None
+
+class ScreenRequest(BaseModel):
+    name: str | None = None
+    tckn: str | None = None
+    k: int | None = Field(default=None, ge=1, le=1000)
+    min_score: float | None = Field(default=None, ge=0, le=100)
+    sources: list[str] | None = None  # ör. ["customer", "watchlist"]
+
+class ScreenMatch(BaseModel):
+    record_id: str
+    name: str
+    source: str
+    score: float
+    tckn_match: bool
+
+class ScreenResponse(BaseModel):
+    matches: list[ScreenMatch]
+    took_ms: float
+
+class ScreenRecord(BaseModel):
+    record_id: str
+    name: str
+    tckn: str | None = None
+    source: str = "customer"
@@ -1,13 +1,238 @@
 # main.py
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import os
+
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
 from api.routes import router as api_router
 from config.settings import settings
+from services.cpu_budget import apply as apply_cpu_budget, budget_from_settings
+from services.job_service import JobManager
+from services.match_index import MatchIndex
+from services.match_service import Matcher
+from services.metrics import JOBS_QUEUED, OCR_INFLIGHT, POOL_IN_USE, REGISTRY
+from services.ocr_cache import OcrCache
+from services.ocr_engines import create_engine, engine_options
+from services.ocr_executor import OcrBusyError, OcrExecutor
+from services.ocr_service import BatchedOCREngine, MicroBatchScheduler
+from services.preprocess import config_from_settings, profiles_from_settings
+from services.reader_pool import PoolExhaustedError, ReaderPool
+from services.quality_service import gate_from_settings
+from services.readiness import Readiness
+from services.upload_guard import MULTIPART_OVERHEAD, BodyLimitMiddleware
+from services.validation_service import validate_images
+from utils.logs import configure_logging
+
+
+configure_logging(settings)
+logger = logging.getLogger(__name__)
+
+
+def build_ocr(state) -> None:
+    """
+    OCR havuzlarını, mikro-batch zamanlayıcıyı ve executor'ı kurar.
+    Ağır modeller (easyocr/torch) burada yüklenir; açılışı bloklamamak için arka plan thread'inde çalışır.
+    """
+    preprocess = config_from_settings(settings)
+    profiles = profiles_from_settings(settings)
+    languages = tuple(settings.ocr_languages)
+    engine_args = engine_options(settings.ocr_engine, settings)
+    fast_name = settings.ocr_cascade_fast_engine
+    fast_args = engine_options(fast_name, settings) if fast_name else None
+
+    def factory(name: str, options: dict):
+        def make():
+            e = create_engine(name, languages=languages, preprocess=preprocess, **options)
+            if settings.ocr_warmup:
+                e.warm_up()
+            return e
+        return make
+
+    batched = settings.ocr_executor == "thread" and settings.ocr_batch_max_size > 1
+    if batched and settings.ocr_engine != "easyocr":
+        logger.warning("Mikro-batch yalnızca easyocr ile çalışır; %s için kapatıldı", settings.ocr_engine)
+        batched = False
+
+    # Eşzamanlı tanıma yapabilen slot sayısı kadar CPU payı; motorlar yüklenmeden uygulanır
+    if batched:
+        slots = settings.ocr_pool_size
+    elif settings.ocr_executor == "thread" and not fast_name:
+        slots = min(settings.ocr_executor_workers, settings.ocr_pool_size)
+    else:
+        slots = settings.ocr_executor_workers
+    budget = budget_from_settings(settings, slots)
+    if budget is not None:
+        apply_cpu_budget(budget)
+    state.cpu_budget = budget
+    if batched:
+        # Okuyucular zamanlayıcıya ait; havuz yalnızca hafif tutamaçları kiralar,
+        # böylece aynı anda batch dolduracak kadar istek tanımaya girebilir
+        make = factory(settings.ocr_engine, engine_args)
+        scheduler = MicroBatchScheduler(
+            [make() for _ in range(settings.ocr_pool_size)],
+            max_batch=settings.ocr_batch_max_size,
+            max_wait_ms=settings.ocr_batch_max_wait_ms,
+            budget=budget,
+        )
+        state.batch_scheduler = scheduler
+        state.reader_pool = ReaderPool(
+            lambda: BatchedOCREngine(scheduler),
+            size=settings.ocr_pool_size * settings.ocr_batch_max_size,
+            timeout_s=settings.ocr_pool_timeout_s,
+            exhausted=settings.ocr_pool_exhausted,
+        )
+    elif settings.ocr_executor == "thread":
+        state.reader_pool = ReaderPool(
+            factory(settings.ocr_engine, engine_args),
+            size=settings.ocr_pool_size,
+            timeout_s=settings.ocr_pool_timeout_s,
+            exhausted=settings.ocr_pool_exhausted,
+        )
+    if fast_name and settings.ocr_executor == "thread":
+        # Hızlı motor her OCR thread'inde aynı anda çalışabilir
+        state.fast_pool = ReaderPool(
+            factory(fast_name, fast_args),
+            size=settings.ocr_executor_workers,
+            timeout_s=settings.ocr_pool_timeout_s,
+        )
+    executor = OcrExecutor(
+        kind=settings.ocr_executor,
+        max_workers=settings.ocr_executor_workers,
+        max_inflight=settings.ocr_max_inflight,
+        timeout_s=settings.ocr_request_timeout_s,
+        pool=state.reader_pool,
+        languages=languages,
+        cache=state.ocr_cache,
+        preprocess=preprocess,
+        profiles=profiles,
+        engine=settings.ocr_engine,
+        engine_args=engine_args,
+        fast_engine=fast_name,
+        fast_engine_args=fast_args,
+        fast_pool=state.fast_pool,
+        min_confidence=settings.min_ocr_confidence,
+        warmup=settings.ocr_warmup,
+        # Batch modunda slotlar zamanlayıcı thread'leridir; executor thread'leri sabitlenmez
+        budget=None if batched else budget,
+    )
+    state.ocr_executor = executor
+    # Process modunda her işçi süreci kendi okuyucusunu yükler; hazır olana kadar beklenir
+    executor.start_workers()
+
+
+async def sweep_cache(cache: OcrCache) -> None:
+    """Süresi dolan OCR sonuçlarını (PII) okunmalarını beklemeden periyodik olarak siler."""
+    while True:
+        await asyncio.sleep(settings.ocr_cache_sweep_s)
+        try:
+            removed = await asyncio.to_thread(cache.purge_expired)
+        except Exception as e:
+            logger.warning("OCR önbelleği temizlenemedi: %s", e)
+            continue
+        if removed:
+            logger.info("Süresi dolan %s OCR önbellek kaydı silindi", removed)
+
+
+async def warm_up(state) -> None:
+    readiness = state.readiness
+    try:
+        await asyncio.to_thread(build_ocr, state)
+    except Exception as e:
+        logger.error("OCR modelleri yüklenemedi: %s", e, exc_info=True)
+        readiness.mark_failed(e)
+        return
+    readiness.mark_ready()
+    logger.info("Uygulama hazır (%s sn)", readiness.as_dict()['startup_s'])
 
-app = FastAPI(title=settings.app_name, version="0.2.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # EasyOCR modelleri istek başına değil, açılışta bir kez ve arka planda yüklenir;
+    # bu sürede /healthz 200, /readyz ve OCR uç noktaları 503 döner.
+    state = app.state
+    state.readiness = Readiness()
+    state.reader_pool = None
+    state.fast_pool = None
+    state.cpu_budget = None
+    state.batch_scheduler = None
+    state.ocr_executor = None
+    state.ocr_cache = None
+    state.quality_gate = gate_from_settings(settings)
+    if settings.ocr_cache_enabled:
+        state.ocr_cache = OcrCache(
+            max_bytes=int(settings.ocr_cache_max_mb * 1024 * 1024),
+            ttl_s=settings.ocr_cache_ttl_s,
+            disk_path=settings.ocr_cache_disk_path,
+            sweep_interval_s=settings.ocr_cache_sweep_s,
+        )
+    warmup_task = asyncio.create_task(warm_up(state))
+    sweep_task = asyncio.create_task(sweep_cache(state.ocr_cache)) if state.ocr_cache is not None else None
+
+    async def run_job(id_image: bytes, form_image: bytes):
+        # Açılışta kuyruğa alınan işler modeller hazır olana kadar bekler
+        if not await state.readiness.wait():
+            raise RuntimeError(f"OCR modelleri yüklenemedi: {state.readiness.error}")
+        matcher = Matcher(min_name_similarity=settings.min_name_similarity)
+        return await validate_images(state.ocr_executor, matcher, id_image, form_image, gate=state.quality_gate)
+
+    state.job_manager = JobManager(
+        run_job,
+        workers=settings.jobs_workers,
+        max_queue=settings.jobs_max_queue,
+        result_ttl_s=settings.jobs_result_ttl_s,
+        store_path=settings.jobs_store_path,
+        webhook_prefixes=settings.jobs_webhook_prefixes,
+        # Senkron isteklerle paylaşılan OCR kapasitesi doluysa iş düşmez, ertelenir
+        retry_on=(OcrBusyError, PoolExhaustedError),
+        max_retries=settings.jobs_max_retries,
+        retry_backoff_s=settings.jobs_retry_backoff_s,
+    )
+    await state.job_manager.start()
+
+    index_path = settings.match_index_path
+    if index_path and os.path.exists(os.path.join(index_path, "meta.json")):
+        state.match_index = MatchIndex.load(index_path, workers=settings.match_index_workers)
+    else:
+        state.match_index = MatchIndex(workers=settings.match_index_workers)
+        if index_path:
+            # Boş indeks hemen yazılır; günlük her zaman kayıtlı bir indeksin üstüne oynatılır
+            state.match_index.save(index_path)
+    if index_path:
+        # Ekleme/silmeler anında günlüğe yazılır; çökmede kaybolmaz
+        state.match_index.open_journal()
+    try:
+        yield
+    finally:
+        if sweep_task is not None:
+            sweep_task.cancel()
+        await state.job_manager.stop()
+        if state.match_index.dirty and state.match_index.path:
+            # Açıkken eklenen/silinen kayıtlar tek CSR'a sıkıştırılıp yazılır, günlük boşaltılır
+            state.match_index.save()
+        state.match_index.close()
+        if not warmup_task.done():
+            # Yükleme thread'i kesilemez; bitmesi beklenir ki kaynaklar kapatılabilsin
+            await asyncio.wait({warmup_task})
+        if state.ocr_executor is not None:
+            state.ocr_executor.shutdown()
+        if state.batch_scheduler is not None:
+            state.batch_scheduler.shutdown()
+        if state.ocr_cache is not None:
+            state.ocr_cache.close()
+
+app = FastAPI(title=settings.app_name, version="0.2.0", lifespan=lifespan)
+# Büyük gövdeler multipart ayrıştırma (geçici dosya) başlamadan kesilir; toplu doğrulama
+# arşivleri kendi (daha büyük) sınırını alır
+app.add_middleware(
+    BodyLimitMiddleware,
+    max_bytes=settings.max_request_mb * 1024 * 1024 or 2 * settings.max_upload_mb * 1024 * 1024 + MULTIPART_OVERHEAD,
+    limits={"/api/validate/batch": settings.batch_max_request_mb * 1024 * 1024 + MULTIPART_OVERHEAD},
+)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 app.include_router(api_router, prefix="/api")
@@ -15,3 +240,28 @@ app.include_router(api_router, prefix="/api")
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     return templates.TemplateResponse("index.html", {"request": request, "app_name": settings.app_name})
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request):
+    """Prometheus metin formatında metrikler."""
+    state = request.app.state
+    if state.reader_pool is not None:
+        POOL_IN_USE.set(state.reader_pool.stats().in_use)
+    if state.ocr_executor is not None:
+        OCR_INFLIGHT.set(state.ocr_executor.inflight)
+    JOBS_QUEUED.set(state.job_manager.queued)
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/healthz")
+async def healthz():
+    """Canlılık: süreç istek karşılayabiliyor (modeller yüklenmemiş olabilir)."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz(request: Request):
+    """Hazırlık: modeller yüklendi ve ısınma çıkarımı yapıldı; değilse 503."""
+    readiness = request.app.state.readiness
+    return JSONResponse(readiness.as_dict(), status_code=200 if readiness.ready else 503)
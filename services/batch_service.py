@@ -0,0 +1,406 @@
+"""
+Toplu doğrulama: binlerce (kimlik, form) çiftini tüm çekirdeklere dağıtır,
+her çift bittikçe bir satır NDJSON üretir ve checkpoint ile kaldığı yerden devam eder.
+
+Kullanım:
+    python -m services.batch_service manifest.jsonl -o sonuc.ndjson --checkpoint ck.txt
+    python -m services.batch_service belgeler.zip --workers 8
+"""
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import IO, Iterable, Iterator, Optional, Union
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+
+from config.settings import settings
+from core.models import BatchResultLine
+from services.match_service import Matcher
+from services.ocr_cache import OcrCache
+from services.cpu_budget import CpuBudget, budget_from_settings, enter_process_slot
+from services.ocr_engines import create_engine, engine_options
+from services.ocr_service import DocumentExtractor, Extraction, cascade_extract, escalation_reason
+from services.preprocess import config_from_settings, profiles_from_settings
+from services.quality_service import QualityGate, gate_from_settings
+from services.upload_guard import UploadRejectedError, inspect_image
+from services.validation_service import (
+    APPLICATION_FORM, ID_CARD, SHORT_CIRCUIT, build_response, build_short_circuit_response, check_quality, doc_type,
+)
+from utils.imageinfo import sniff_format
+from utils.logs import configure_logging
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+ARCHIVE_MANIFEST = "manifest.jsonl"
+_MAX_MANIFEST_BYTES = 64 * 1024 * 1024
+# <çift>_id.jpg / <çift>_form.jpg veya <çift>/id.jpg / <çift>/form.jpg
+_MEMBER_RE = re.compile(r"^(?P<pair>.+?)[/_\-](?P<role>id|kimlik|form|basvuru)\.[A-Za-z]+$", re.IGNORECASE)
+
+
+class ManifestError(ValueError):
+    """Manifest okunamadı veya güvenli olmayan bir yol içeriyor."""
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    pair_id: str
+    id_source: Union[str, bytes]
+    form_source: Union[str, bytes]
+    error: str | None = None  # doluysa çift işlenmez, hata satırı döner
+
+
+def _max_image_bytes() -> int:
+    return settings.max_upload_mb * 1024 * 1024
+
+
+def guard_image(data: bytes, name: str) -> bytes:
+    """
+    /api/validate ile aynı yükleme kontrolleri: boyut, sihirli baytlar ve başlıktaki
+    çözünürlük / TIFF sayfası. OCR'a gidecek baytları döner, geçmezse UploadRejectedError.
+    """
+    if len(data) > _max_image_bytes():
+        raise UploadRejectedError(413, f"{name}: dosya boyutu {settings.max_upload_mb}MB üstünde.")
+    if sniff_format(data) is None:
+        raise UploadRejectedError(415, f"{name}: desteklenmeyen veya bozuk görsel (jpg, png, bmp, tiff).")
+    try:
+        data, _ = inspect_image(data, max_pixels=settings.max_image_pixels, max_side=settings.max_image_side,
+                                max_pages=settings.max_tiff_pages, tiff_page=settings.tiff_page)
+    except UploadRejectedError as e:
+        raise UploadRejectedError(e.status_code, f"{name}: {e.detail}")
+    return data
+
+
+def _resolve(path: str, base_dir: str, root: str | None) -> str:
+    full = os.path.realpath(path if os.path.isabs(path) else os.path.join(base_dir, path))
+    if root is not None:
+        root_real = os.path.realpath(root)
+        if os.path.commonpath([full, root_real]) != root_real:
+            raise ManifestError(f"İzin verilen dizin dışında yol: {path}")
+    return full
+
+
+def iter_jsonl_manifest(lines: Iterable[str], base_dir: str = ".", root: str | None = None) -> Iterator[BatchItem]:
+    """
+    Her satır: {"pair_id": "...", "id_image": "yol", "form_image": "yol"}
+    pair_id verilmezse satır numarası kullanılır. `root` verilirse yollar bu dizinle sınırlıdır.
+    """
+    for lineno, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            rec = json.loads(line)
+            id_path, form_path = rec["id_image"], rec["form_image"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise ManifestError(f"Manifest satırı {lineno} hatalı: {e}")
+        yield BatchItem(
+            pair_id=str(rec.get("pair_id", lineno)),
+            id_source=_resolve(id_path, base_dir, root),
+            form_source=_resolve(form_path, base_dir, root),
+        )
+
+
+class _ArchiveReader:
+    """zip ve tar arşivleri için ortak, rastgele erişimli okuyucu."""
+    def __init__(self, fileobj: IO[bytes], name: str):
+        lower = name.lower()
+        if lower.endswith(".zip"):
+            self._zip = zipfile.ZipFile(fileobj)
+            self._tar = None
+            self.names = [i.filename for i in self._zip.infolist() if not i.is_dir()]
+        else:
+            self._zip = None
+            self._tar = tarfile.open(fileobj=fileobj, mode="r:*")
+            self._members = {m.name: m for m in self._tar.getmembers() if m.isfile()}
+            self.names = list(self._members)
+
+    def size(self, name: str) -> int:
+        """Başlıkta bildirilen açılmış boyut; okuma bu boyutla sınırlıdır."""
+        if self._zip is not None:
+            return self._zip.getinfo(name).file_size
+        return self._members[name].size
+
+    def read(self, name: str, max_bytes: int) -> bytes:
+        """Üyeyi okur; başlıktaki boyut `max_bytes`ı aşıyorsa açmadan UploadRejectedError."""
+        if self.size(name) > max_bytes:
+            raise UploadRejectedError(413, f"{name}: dosya boyutu {max_bytes // (1024 * 1024)}MB üstünde.")
+        if self._zip is not None:
+            return self._zip.read(name)
+        f = self._tar.extractfile(self._members[name])
+        if f is None:
+            raise ManifestError(f"Arşiv üyesi okunamadı: {name}")
+        return f.read()
+
+
+def iter_archive(fileobj: IO[bytes], name: str) -> Iterator[BatchItem]:
+    """
+    Arşivdeki görsel çiftlerini sırayla verir; baytlar çift işlenirken okunur,
+    böylece bellek arşiv boyutuyla değil bekleyen iş sayısıyla sınırlı kalır.
+    Arşivde manifest.jsonl varsa yollar arşiv içine göre çözülür.
+    Üyeler işçiye gitmeden guard_image'dan geçer; geçemeyen çift hata satırıyla döner.
+    """
+    arc = _ArchiveReader(fileobj, name)
+    names = set(arc.names)
+
+    def pair(pair_id: str, id_member: str, form_member: str) -> BatchItem:
+        try:
+            return BatchItem(
+                pair_id=pair_id,
+                id_source=guard_image(arc.read(id_member, _max_image_bytes()), id_member),
+                form_source=guard_image(arc.read(form_member, _max_image_bytes()), form_member),
+            )
+        except UploadRejectedError as e:
+            logger.warning("Arşiv üyesi reddedildi (%s): %s", pair_id, e.detail)
+            return BatchItem(pair_id=pair_id, id_source=b"", form_source=b"", error=e.detail)
+
+    if ARCHIVE_MANIFEST in names:
+        try:
+            manifest = arc.read(ARCHIVE_MANIFEST, _MAX_MANIFEST_BYTES).decode("utf-8").splitlines()
+        except UploadRejectedError as e:
+            raise ManifestError(e.detail)
+        for lineno, line in enumerate(manifest, start=1):
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError as e:
+                raise ManifestError(f"Manifest satırı {lineno} hatalı: {e}")
+            if not isinstance(rec, dict):
+                raise ManifestError(f"Manifest satırı {lineno} hatalı: nesne bekleniyordu")
+            for key in ("id_image", "form_image"):
+                if rec.get(key) not in names:
+                    raise ManifestError(f"Arşivde bulunamadı (satır {lineno}): {rec.get(key)}")
+            yield pair(str(rec.get("pair_id", lineno)), rec["id_image"], rec["form_image"])
+        return
+
+    pairs: dict[str, dict[str, str]] = {}
+    for member in sorted(arc.names):
+        if not member.lower().endswith(IMAGE_EXTS):
+            continue
+        m = _MEMBER_RE.match(member)
+        if not m:
+            logger.warning("Arşiv üyesi eşleştirilemedi, atlanıyor: %s", member)
+            continue
+        role = "id" if m.group("role").lower() in ("id", "kimlik") else "form"
+        pairs.setdefault(m.group("pair"), {})[role] = member
+
+    for pair_id, roles in pairs.items():
+        if "id" not in roles or "form" not in roles:
+            logger.warning("Eksik çift atlanıyor: %s", pair_id)
+            continue
+        yield pair(pair_id, roles["id"], roles["form"])
+
+
+def iter_manifest(path: str, root: str | None = None) -> Iterator[BatchItem]:
+    """Dosya uzantısına göre JSONL manifest veya zip/tar arşivi okur."""
+    lower = path.lower()
+    if lower.endswith((".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")):
+        with open(path, "rb") as f:
+            yield from iter_archive(f, path)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from iter_jsonl_manifest(f, base_dir=os.path.dirname(os.path.abspath(path)), root=root)
+
+
+class Checkpoint:
+    """Tamamlanan pair_id'leri satır satır dosyaya ekler; yeniden başlatmada atlanır."""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.done: set[str] = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.done = {line.rstrip("\n") for line in f if line.strip()}
+            logger.info("Checkpoint yüklendi: %s çift tamamlanmış", len(self.done))
+        self._fh = open(path, "a", encoding="utf-8")
+
+    def mark(self, pair_id: str) -> None:
+        with self._lock:
+            self.done.add(pair_id)
+            self._fh.write(pair_id + "\n")
+            self._fh.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+# İşçi süreç durumu: motor(lar) ve eşleştirici süreç başına bir kez yüklenir
+_worker_extractor: DocumentExtractor | None = None
+_worker_fast_extractor: DocumentExtractor | None = None
+_worker_matcher: Matcher | None = None
+_worker_gate: QualityGate | None = None
+
+
+def _init_worker(languages: tuple[str, ...], min_name_similarity: int, cache_args: dict | None,
+                 budget: CpuBudget | None = None, slot_counter=None) -> None:
+    global _worker_extractor, _worker_fast_extractor, _worker_matcher, _worker_gate
+    # spawn ile açılan süreç ana sürecin günlük ayarını devralmaz; kuyruk thread'i olmadan yazar
+    configure_logging(settings.model_copy(update={"log_queue": False}))
+    # Her süreç çekirdeklerin 1/işçi kadarını kullanır (aşırı abonelik olmaz)
+    enter_process_slot(budget, slot_counter)
+    cache = OcrCache(**cache_args) if cache_args is not None else None
+    preprocess, profiles = config_from_settings(settings), profiles_from_settings(settings)
+    engine = create_engine(settings.ocr_engine, languages=languages, preprocess=preprocess,
+                           **engine_options(settings.ocr_engine, settings))
+    _worker_extractor = DocumentExtractor(engine, cache=cache, profiles=profiles)
+    fast_name = settings.ocr_cascade_fast_engine
+    if fast_name:
+        fast = create_engine(fast_name, languages=languages, preprocess=preprocess,
+                             **engine_options(fast_name, settings))
+        _worker_fast_extractor = DocumentExtractor(fast, cache=cache, profiles=profiles)
+    _worker_matcher = Matcher(min_name_similarity=min_name_similarity)
+    _worker_gate = gate_from_settings(settings)
+
+
+def _extract(source: Union[str, bytes], kind: str | None) -> Extraction:
+    if _worker_fast_extractor is not None:
+        return cascade_extract(_worker_fast_extractor.extract, _worker_extractor.extract,
+                               source, kind, settings.min_ocr_confidence)
+    return _worker_extractor.extract(source, kind)
+
+
+def _read_source(source: Union[str, bytes]) -> bytes:
+    """Manifest yolları işçide okunur ve guard_image'dan geçer; arşiv baytları zaten kontrollü."""
+    if isinstance(source, str):
+        if os.path.getsize(source) > _max_image_bytes():
+            raise UploadRejectedError(413, f"{source}: dosya boyutu {settings.max_upload_mb}MB üstünde.")
+        with open(source, "rb") as f:
+            return guard_image(f.read(), source)
+    return source
+
+
+def _run_pair(pair_id: str, id_source: Union[str, bytes], form_source: Union[str, bytes]) -> dict:
+    try:
+        # Dosyalar bir kez okunur; yükleme kontrolleri, kalite kapısı ve OCR aynı tamponu kullanır
+        id_source, form_source = _read_source(id_source), _read_source(form_source)
+        if _worker_gate is not None:
+            rejected = check_quality(_worker_gate, id_source, form_source)
+            if rejected is not None:
+                return BatchResultLine(pair_id=pair_id, response=rejected).model_dump()
+        started = time.perf_counter()
+        id_res = _extract(id_source, doc_type(ID_CARD))
+        if settings.validation_mode == SHORT_CIRCUIT:
+            reason = escalation_reason(id_res, settings.short_circuit_min_confidence)
+            if reason is not None:
+                return BatchResultLine(pair_id=pair_id, response=build_short_circuit_response(id_res, reason)).model_dump()
+        form_res = _extract(form_source, doc_type(APPLICATION_FORM))
+        if _worker_gate is not None:
+            _worker_gate.observe_ocr(time.perf_counter() - started)
+        response = build_response(id_res, form_res, _worker_matcher)
+        return BatchResultLine(pair_id=pair_id, response=response).model_dump()
+    except UploadRejectedError as e:
+        logger.warning("Görsel reddedildi (%s): %s", pair_id, e.detail)
+        return BatchResultLine(pair_id=pair_id, error=e.detail).model_dump()
+    except Exception as e:
+        logger.error("Çift işlenemedi (%s): %s", pair_id, e, exc_info=True)
+        return BatchResultLine(pair_id=pair_id, error=str(e)).model_dump()
+
+
+def _default_cache_args() -> dict | None:
+    if not settings.ocr_cache_enabled:
+        return None
+    return {
+        "max_bytes": int(settings.ocr_cache_max_mb * 1024 * 1024),
+        "ttl_s": settings.ocr_cache_ttl_s,
+        "disk_path": settings.ocr_cache_disk_path,
+        "sweep_interval_s": settings.ocr_cache_sweep_s,
+    }
+
+
+def run_batch(items: Iterable[BatchItem], workers: int | None = None,
+              max_pending: int | None = None, checkpoint: Checkpoint | None = None,
+              languages: Iterable[str] | None = None) -> Iterator[dict]:
+    """
+    Çiftleri süreç havuzunda işler ve tamamlanma sırasıyla sonuç satırlarını verir.
+    En fazla `max_pending` iş bekler; manifest tembel okunduğundan bellek sınırlı kalır.
+    İşçiler spawn ile açılır: sunucu sürecinin torch/thread durumu kopyalanmaz.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 2
+    languages = tuple(languages or settings.ocr_languages)
+    logger.info("Toplu işlem başlıyor - İşçi: %s, Bekleyen limit: %s", workers, max_pending)
+
+    pending: set[Future] = set()
+    budget = budget_from_settings(settings, slots=workers)
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(languages, settings.min_name_similarity, _default_cache_args(),
+                  budget, ctx.Value("i", 0)),
+    ) as pool:
+        def drain(block_until: int) -> Iterator[dict]:
+            nonlocal pending
+            while len(pending) > block_until:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    line = fut.result()
+                    yield line
+                    # Satır tüketildikten sonra işaretlenir (en az bir kez teslim)
+                    if checkpoint is not None:
+                        checkpoint.mark(line["pair_id"])
+
+        for item in items:
+            if checkpoint is not None and item.pair_id in checkpoint.done:
+                continue
+            if item.error is not None:
+                yield BatchResultLine(pair_id=item.pair_id, error=item.error).model_dump()
+                if checkpoint is not None:
+                    checkpoint.mark(item.pair_id)
+                continue
+            pending.add(pool.submit(_run_pair, item.pair_id, item.id_source, item.form_source))
+            yield from drain(max_pending - 1)
+        yield from drain(0)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m services.batch_service",
+        description="Kimlik/form çiftlerini toplu doğrular ve NDJSON sonuç üretir.",
+    )
+    parser.add_argument("manifest", help="JSONL manifest veya zip/tar arşivi")
+    parser.add_argument("-o", "--output", help="Çıktı dosyası (varsayılan: stdout)")
+    parser.add_argument("--checkpoint", help="Tamamlanan çiftlerin kaydedildiği dosya")
+    parser.add_argument("--workers", type=int, default=None, help="Süreç sayısı (varsayılan: çekirdek sayısı)")
+    parser.add_argument("--max-pending", type=int, default=None, help="Aynı anda bekleyen iş sınırı")
+    parser.add_argument("--languages", default=",".join(settings.ocr_languages), help="EasyOCR dilleri")
+    args = parser.parse_args(argv)
+
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+    # Devam eden çalıştırmada çıktıya eklenir
+    out = open(args.output, "a" if checkpoint else "w", encoding="utf-8") if args.output else sys.stdout
+    count = 0
+    try:
+        for line in run_batch(
+            iter_manifest(args.manifest),
+            workers=args.workers,
+            max_pending=args.max_pending,
+            checkpoint=checkpoint,
+            languages=args.languages.split(","),
+        ):
+            out.write(json.dumps(line, ensure_ascii=False) + "\n")
+            out.flush()
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if checkpoint is not None:
+            checkpoint.close()
+    logger.info("Toplu işlem tamamlandı - %s çift", count)
+    return 0
+
+
+if __name__ == "__main__":
+    configure_logging(settings)
+    sys.exit(main())
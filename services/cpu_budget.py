@@ -0,0 +1,137 @@
+"""
+Sürecin CPU bütçesi: torch / OpenCV iş parçacıkları eşzamanlı OCR slotlarına göre ayarlanır.
+
+Kütüphanelerin varsayılan havuzları her çağrıda tüm çekirdekleri ister; N istek aynı
+anda çalışınca N × çekirdek iş parçacığı oluşur ve verim çöker. Bütçe çekirdekleri
+slotlara böler: slot başına `threads` iş parçacığı ve (istenirse) slota ayrılmış çekirdekler.
+
+    budget = plan(slots=4)
+    apply(budget)                 # süreç geneli: ortam değişkenleri, cv2, torch
+    enter_thread_slot(budget)     # OCR thread'i başlarken: slot çekirdeklerine sabitle
+
+En iyi slot / iş parçacığı dağılımı için: python -m benchmarks autotune
+"""
+from __future__ import annotations
+from dataclasses import asdict, dataclass
+from typing import Iterable, Optional
+import itertools
+import logging
+import os
+import sys
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+# Yerel iş parçacığı havuzlarının okuduğu ortam değişkenleri (torch/MKL/OpenBLAS/Tesseract)
+_THREAD_ENV = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "OMP_THREAD_LIMIT")
+
+
+@dataclass(frozen=True)
+class CpuBudget:
+    cpus: tuple[int, ...]
+    slots: int
+    threads: int  # slot başına intra-op iş parçacığı
+    interop_threads: int = 1
+    pin: bool = False
+
+    def slot_cpus(self, slot: int) -> tuple[int, ...]:
+        """Slotun çekirdekleri; çekirdek slot sayısından azsa slotlar çekirdek paylaşır."""
+        per = max(1, len(self.cpus) // self.slots)
+        start = (slot % self.slots) * per % len(self.cpus)
+        return self.cpus[start:start + per]
+
+    def as_dict(self) -> dict:
+        d = asdict(self)
+        d["cpus"] = len(self.cpus)
+        return d
+
+
+def available_cpus() -> tuple[int, ...]:
+    """Sürecin çalışabileceği çekirdekler (konteyner cpuset'i dahil)."""
+    if hasattr(os, "sched_getaffinity"):
+        return tuple(sorted(os.sched_getaffinity(0)))
+    return tuple(range(os.cpu_count() or 1))
+
+
+def plan(slots: int, threads: int = 0, interop_threads: int = 1, pin: bool = False,
+         cpus: Iterable[int] | None = None) -> CpuBudget:
+    """`threads` 0 ise çekirdekler slotlara eşit bölünür (en az 1)."""
+    cpus = tuple(cpus) if cpus else available_cpus()
+    slots = max(1, slots)
+    if threads <= 0:
+        threads = max(1, len(cpus) // slots)
+    return CpuBudget(cpus=cpus, slots=slots, threads=threads, interop_threads=interop_threads, pin=pin)
+
+
+def budget_from_settings(settings, slots: int) -> Optional[CpuBudget]:
+    if not settings.cpu_budget_enabled:
+        return None
+    return plan(slots, threads=settings.cpu_threads_per_slot,
+                interop_threads=settings.cpu_interop_threads, pin=settings.cpu_pin_workers)
+
+
+# Süreçte uygulanan bütçe; torch'u yükleyen motorlar configure_torch ile okur
+_active: CpuBudget | None = None
+_thread_slots = itertools.count()
+
+
+def apply(budget: CpuBudget) -> None:
+    """
+    Süreç geneli ayarlar. torch henüz yüklenmediyse ortam değişkenleri ilk yüklemede
+    okunur; yüklüyse doğrudan ayarlanır. Operatörün verdiği ortam değişkenleri ezilmez.
+    """
+    global _active
+    _active = budget
+    for name in _THREAD_ENV:
+        os.environ.setdefault(name, str(budget.threads))
+    cv2.setNumThreads(budget.threads)
+    configure_torch()
+    logger.info("CPU bütçesi uygulandı - Çekirdek: %s, Slot: %s, Slot başına iş parçacığı: %s, Sabitleme: %s",
+                len(budget.cpus), budget.slots, budget.threads, budget.pin)
+
+
+def configure_torch() -> None:
+    """Aktif bütçeyi torch'a uygular (easyocr yüklendikten sonra çağrılır)."""
+    torch = sys.modules.get("torch")
+    if _active is None or torch is None:
+        return
+    torch.set_num_threads(_active.threads)
+    try:
+        torch.set_num_interop_threads(_active.interop_threads)
+    except RuntimeError:
+        # Paralel iş başladıktan sonra değiştirilemez; ilk ayar geçerli kalır
+        pass
+
+
+def _pin(cpus: tuple[int, ...]) -> None:
+    if not hasattr(os, "sched_setaffinity"):
+        return
+    try:
+        # Linux'ta 0 = çağıran thread; sonradan açılan (OpenMP) thread'ler bunu devralır
+        os.sched_setaffinity(0, cpus)
+    except OSError as e:
+        logger.warning("Çekirdek sabitleme başarısız (%s): %s", cpus, e)
+
+
+def enter_thread_slot(budget: CpuBudget | None, slot: int | None = None) -> None:
+    """OCR thread'i başlangıcı: sıradaki slotun çekirdeklerine sabitler."""
+    if budget is None or not budget.pin:
+        return
+    slot = next(_thread_slots) if slot is None else slot
+    _pin(budget.slot_cpus(slot))
+
+
+def enter_process_slot(budget: CpuBudget | None, counter=None) -> None:
+    """
+    İşçi süreç başlangıcı: bütçeyi uygular ve süreci kendi slotuna sabitler.
+    `counter` süreçler arası paylaşılan multiprocessing.Value'dur (slot sırası).
+    """
+    if budget is None:
+        return
+    apply(budget)
+    if budget.pin and counter is not None:
+        with counter.get_lock():
+            slot = counter.value
+            counter.value += 1
+        _pin(budget.slot_cpus(slot))
@@ -0,0 +1,130 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Optional
+import logging
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Normalize bölge: (x0, y0, x1, y1), görsel genişlik/yüksekliğine oranla
+Region = tuple[float, float, float, float]
+
+
+@dataclass(frozen=True)
+class DocumentTemplate:
+    """
+    Sabit yerleşimli belge şablonu.
+    Hizalama sonrası yalnızca alan bölgeleri (ROI) tanımaya gönderilir.
+    """
+    name: str
+    aspect_ratio: float  # genişlik / yükseklik
+    fields: dict[str, Region] = field(default_factory=dict)
+    aspect_tolerance: float = 0.08
+    canonical_width: int = 1000
+    # Kart fotoğraflarında arka plandan belge kenarı aranır
+    find_border: bool = False
+
+
+TEMPLATES: dict[str, DocumentTemplate] = {}
+
+
+def register_template(template: DocumentTemplate) -> None:
+    TEMPLATES[template.name] = template
+
+
+def get_template(name: str | None) -> Optional[DocumentTemplate]:
+    return TEMPLATES.get(name) if name else None
+
+
+# T.C. kimlik kartı ön yüz (ID-1, 85.6 x 54 mm)
+register_template(DocumentTemplate(
+    name="id_card",
+    aspect_ratio=85.6 / 54.0,
+    fields={
+        "tckn": (0.04, 0.235, 0.36, 0.32),
+        "surname": (0.33, 0.405, 0.70, 0.49),
+        "name": (0.33, 0.535, 0.70, 0.615),
+    },
+    find_border=True,
+))
+
+# Başvuru formu (Letter/A4 sayfa; ad soyad ve TCKN satırları üst blokta)
+register_template(DocumentTemplate(
+    name="application_form",
+    aspect_ratio=8.5 / 11.0,
+    aspect_tolerance=0.12,
+    fields={
+        "full_name": (0.12, 0.142, 0.75, 0.170),
+        "tckn": (0.12, 0.165, 0.75, 0.200),
+    },
+))
+
+
+def _order_quad(pts: np.ndarray) -> np.ndarray:
+    """Köşeleri sol-üst, sağ-üst, sağ-alt, sol-alt sırasına dizer."""
+    s = pts.sum(axis=1)
+    d = np.diff(pts, axis=1).ravel()
+    return np.array([pts[np.argmin(s)], pts[np.argmin(d)], pts[np.argmax(s)], pts[np.argmax(d)]],
+                    dtype=np.float32)
+
+
+def _find_document_quad(img: np.ndarray, min_area_ratio: float = 0.3) -> Optional[np.ndarray]:
+    """Küçültülmüş kenar haritasında en büyük dörtgen konturu arar."""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    h, w = gray.shape[:2]
+    scale = 500.0 / max(h, w)
+    small = cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    edges = cv2.Canny(cv2.GaussianBlur(small, (5, 5), 0), 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_area = min_area_ratio * small.shape[0] * small.shape[1]
+    for c in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+        if cv2.contourArea(c) < min_area:
+            break
+        approx = cv2.approxPolyDP(c, 0.02 * cv2.arcLength(c, True), True)
+        if len(approx) == 4:
+            return _order_quad(approx.reshape(4, 2).astype(np.float32) / scale)
+    return None
+
+
+def _ratio_ok(ratio: float, template: DocumentTemplate) -> bool:
+    return abs(ratio - template.aspect_ratio) / template.aspect_ratio <= template.aspect_tolerance
+
+
+def align(img: np.ndarray, template: DocumentTemplate) -> Optional[np.ndarray]:
+    """
+    Görseli şablonun kanonik boyutuna hizalar; hizalanamazsa None döner
+    (çağıran tam sayfa OCR'a düşer).
+    """
+    h, w = img.shape[:2]
+    out_w = template.canonical_width
+    out_h = int(round(out_w / template.aspect_ratio))
+
+    if _ratio_ok(w / h, template):
+        # Belge zaten kırpılmış (tarama / ekran görüntüsü)
+        return cv2.resize(img, (out_w, out_h), interpolation=cv2.INTER_AREA if w > out_w else cv2.INTER_CUBIC)
+
+    if not template.find_border:
+        return None
+
+    quad = _find_document_quad(img)
+    if quad is None:
+        return None
+    tl, tr, br, bl = quad
+    qw = (np.linalg.norm(tr - tl) + np.linalg.norm(br - bl)) / 2.0
+    qh = (np.linalg.norm(bl - tl) + np.linalg.norm(br - tr)) / 2.0
+    if qh == 0 or not _ratio_ok(qw / qh, template):
+        return None
+    dst = np.array([[0, 0], [out_w - 1, 0], [out_w - 1, out_h - 1], [0, out_h - 1]], dtype=np.float32)
+    m = cv2.getPerspectiveTransform(quad, dst)
+    return cv2.warpPerspective(img, m, (out_w, out_h))
+
+
+def crop_fields(aligned: np.ndarray, template: DocumentTemplate) -> dict[str, np.ndarray]:
+    h, w = aligned.shape[:2]
+    crops = {}
+    for name, (x0, y0, x1, y1) in template.fields.items():
+        crops[name] = aligned[int(y0 * h):int(y1 * h), int(x0 * w):int(x1 * w)]
+    return crops
@@ -0,0 +1,312 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import urllib.request
+import uuid
+
+from core.models import JobStatus, ValidateResponse
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+JobRunner = Callable[[bytes, bytes], Awaitable[ValidateResponse]]
+
+
+class JobQueueFullError(RuntimeError):
+    """İş kuyruğu dolu; istemci Retry-After kadar bekleyip tekrar denemeli."""
+    def __init__(self, retry_after_s: int):
+        super().__init__(f"İş kuyruğu dolu, {retry_after_s} sn sonra tekrar deneyin")
+        self.retry_after_s = retry_after_s
+
+
+@dataclass
+class Job:
+    id: str
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    callback_url: str | None = None
+    result: ValidateResponse | None = None
+    error: str | None = None
+    # Geçici kapasite hatası sonrası yeniden deneme sayısı
+    attempts: int = 0
+    # Görseller yalnızca iş bitene kadar tutulur
+    id_image: bytes | None = field(default=None, repr=False)
+    form_image: bytes | None = field(default=None, repr=False)
+    # Her SSE abonesinin kendi olayı; durum değişince hepsi uyandırılır
+    waiters: set[asyncio.Event] = field(default_factory=set, repr=False)
+
+    def to_status(self) -> JobStatus:
+        return JobStatus(
+            job_id=self.id,
+            status=self.status,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            result=self.result,
+            error=self.error,
+        )
+
+
+class SqliteJobStore:
+    """Kuyruğun yeniden başlatmada kaybolmaması için opsiyonel SQLite kalıcılığı."""
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at REAL NOT NULL, "
+            "updated_at REAL NOT NULL, callback_url TEXT, id_image BLOB, form_image BLOB, "
+            "result TEXT, error TEXT)"
+        )
+        self._db.commit()
+
+    def insert(self, job: Job) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, created_at, updated_at, callback_url, id_image, form_image) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job.id, job.status, job.created_at, job.updated_at, job.callback_url,
+                 job.id_image, job.form_image),
+            )
+            self._db.commit()
+
+    def update(self, job: Job) -> None:
+        finished = job.status in (DONE, FAILED)
+        with self._lock:
+            # Biten işlerin görselleri (PII) diskten silinir
+            self._db.execute(
+                "UPDATE jobs SET status = ?, updated_at = ?, result = ?, error = ?"
+                + (", id_image = NULL, form_image = NULL" if finished else "")
+                + " WHERE id = ?",
+                (job.status, job.updated_at,
+                 job.result.model_dump_json() if job.result is not None else None,
+                 job.error, job.id),
+            )
+            self._db.commit()
+
+    def load(self) -> list[Job]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, status, created_at, updated_at, callback_url, id_image, form_image, result, error "
+                "FROM jobs ORDER BY created_at"
+            ).fetchall()
+        jobs = []
+        for r in rows:
+            job = Job(id=r[0], status=r[1], created_at=r[2], updated_at=r[3], callback_url=r[4],
+                      id_image=r[5], form_image=r[6], error=r[8])
+            if r[7]:
+                job.result = ValidateResponse.model_validate_json(r[7])
+            jobs.append(job)
+        return jobs
+
+    def delete_before(self, cutoff: float) -> None:
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (DONE, FAILED, cutoff)
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class JobManager:
+    """
+    Süreç içi asenkron iş kuyruğu: sınırlı kuyruk + işçi görevleri.
+    Kuyruk doluysa JobQueueFullError (HTTP 429 + Retry-After) fırlatılır.
+    `retry_on` hataları (ör. OCR kapasitesi dolu) işi düşürmez; iş artan bekleme ile
+    en fazla `max_retries` kez yeniden kuyruğa alınır. SQLite yazımları event loop dışında yapılır.
+    """
+    def __init__(self, runner: JobRunner, workers: int = 2, max_queue: int = 100,
+                 result_ttl_s: float = 3600.0, store_path: str | None = None,
+                 webhook_prefixes: list[str] | None = None,
+                 retry_on: tuple[type[BaseException], ...] = (), max_retries: int = 5,
+                 retry_backoff_s: float = 1.0):
+        self.runner = runner
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl_s = result_ttl_s
+        self.webhook_prefixes = webhook_prefixes or []
+        self.retry_on = retry_on
+        self.max_retries = max_retries
+        self.retry_backoff_s = retry_backoff_s
+        self.store = SqliteJobStore(store_path) if store_path else None
+        self._jobs: dict[str, Job] = {}
+        self._queue: asyncio.Queue[str] | None = None
+        self._tasks: list[asyncio.Task] = []
+        # Kaydı diske yazılmakta olan (henüz kuyruğa girmemiş) işler
+        self._submitting = 0
+        # Webhook ve yeniden deneme görevleri bitene kadar referans tutulur (aksi halde GC toplayabilir)
+        self._background: set[asyncio.Task] = set()
+        # Retry-After tahmini için ortalama iş süresi
+        self._avg_duration_s = 5.0
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        if self.store is not None:
+            pending = []
+            for job in await asyncio.to_thread(self.store.load):
+                self._jobs[job.id] = job
+                if job.status in (QUEUED, RUNNING):
+                    # Yarım kalan işler baştan çalıştırılır
+                    job.status = QUEUED
+                    pending.append(job.id)
+            logger.info("Kalıcı kuyruktan %s iş yüklendi", len(pending))
+            # Kuyruk sınırından fazla iş olabilir; açılışı bloklamadan yer açıldıkça eklenir
+            self._tasks.append(asyncio.create_task(self._requeue(pending)))
+        logger.info("İş kuyruğu başlatıldı - İşçi: %s, Kuyruk: %s", self.workers, self.max_queue)
+
+    async def stop(self) -> None:
+        for t in self._tasks + list(self._background):
+            t.cancel()
+        await asyncio.gather(*self._tasks, *self._background, return_exceptions=True)
+        if self.store is not None:
+            self.store.close()
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def webhook_allowed(self, url: str) -> bool:
+        return any(url.startswith(p) for p in self.webhook_prefixes)
+
+    def retry_after_s(self) -> int:
+        return max(1, int(self.queued * self._avg_duration_s / max(1, self.workers)))
+
+    async def submit(self, id_image: bytes, form_image: bytes, callback_url: str | None = None) -> Job:
+        if self._queue is None:
+            raise RuntimeError("İş kuyruğu başlatılmamış")
+        await self._sweep()
+        if self._queue.qsize() + self._submitting >= self.max_queue:
+            raise JobQueueFullError(self.retry_after_s())
+        job = Job(id=uuid.uuid4().hex, callback_url=callback_url,
+                  id_image=id_image, form_image=form_image)
+        if self.store is not None:
+            # Görsel blobları + commit event loop'u bloklamasın
+            self._submitting += 1
+            try:
+                await asyncio.to_thread(self.store.insert, job)
+            finally:
+                self._submitting -= 1
+        self._jobs[job.id] = job
+        # Yeniden denenen işler yer kapmış olabilir; kısa süre beklenir
+        await self._queue.put(job.id)
+        logger.info("İş kuyruğa alındı: %s (kuyruk: %s)", job.id, self._queue.qsize())
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def wait_for_change(self, job: Job, last_status: str | None, timeout_s: float) -> None:
+        """Durum `last_status`tan farklı olana veya süre dolana kadar bekler."""
+        if job.status != last_status:
+            return
+        event = asyncio.Event()
+        job.waiters.add(event)
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout_s)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            job.waiters.discard(event)
+
+    async def _set_status(self, job: Job, status: str) -> None:
+        job.status = status
+        job.updated_at = time.time()
+        if self.store is not None:
+            await asyncio.to_thread(self.store.update, job)
+        for event in job.waiters:
+            event.set()
+
+    async def _requeue(self, job_ids: list[str]) -> None:
+        for job_id in job_ids:
+            await self._queue.put(job_id)
+
+    async def _retry_later(self, job_id: str, delay_s: float) -> None:
+        await asyncio.sleep(delay_s)
+        await self._queue.put(job_id)
+
+    async def _sweep(self) -> None:
+        """Süresi dolan bitmiş işleri bellekten (ve diskten) atar."""
+        cutoff = time.time() - self.result_ttl_s
+        stale = [jid for jid, j in self._jobs.items() if j.status in (DONE, FAILED) and j.updated_at < cutoff]
+        for jid in stale:
+            del self._jobs[jid]
+        if stale and self.store is not None:
+            await asyncio.to_thread(self.store.delete_before, cutoff)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _worker(self, idx: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.id_image is None or job.form_image is None:
+                self._queue.task_done()
+                continue
+            started = time.perf_counter()
+            try:
+                await self._set_status(job, RUNNING)
+                job.result = await self.runner(job.id_image, job.form_image)
+                status = DONE
+            except self.retry_on as e:
+                if job.attempts < self.max_retries:
+                    # OCR kapasitesi senkron isteklerle paylaşılır; dolu olması geçicidir
+                    delay = self.retry_backoff_s * 2 ** job.attempts
+                    job.attempts += 1
+                    logger.warning("İş ertelendi (%s, deneme %s/%s, %.1f sn): %s",
+                                   job.id, job.attempts, self.max_retries, delay, e)
+                    self._queue.task_done()
+                    await self._set_status(job, QUEUED)
+                    self._spawn(self._retry_later(job.id, delay))
+                    continue
+                logger.error("İş yeniden denemelerde de başarısız (%s): %s", job.id, e)
+                job.error = str(e) or type(e).__name__
+                status = FAILED
+            except Exception as e:
+                logger.error("İş başarısız (%s): %s", job.id, e, exc_info=True)
+                job.error = str(e) or type(e).__name__
+                status = FAILED
+            self._queue.task_done()
+            job.id_image = job.form_image = None
+            self._avg_duration_s = 0.8 * self._avg_duration_s + 0.2 * (time.perf_counter() - started)
+            await self._set_status(job, status)
+            if job.callback_url:
+                self._spawn(self._notify(job))
+
+    async def _notify(self, job: Job) -> None:
+        body = job.to_status().model_dump_json().encode("utf-8")
+
+        def post() -> None:
+            req = urllib.request.Request(
+                job.callback_url, data=body, method="POST",
+                headers={"Content-Type": "application/json"},
+            )
+            with urllib.request.urlopen(req, timeout=10) as resp:
+                resp.read()
+
+        try:
+            await asyncio.to_thread(post)
+            logger.info("Webhook gönderildi: %s", job.id)
+        except Exception as e:
+            logger.warning("Webhook hatası (%s): %s", job.id, e)
+
+
+def sse_format(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_event(job: Job) -> str:
+    return sse_format(job.status, job.to_status().model_dump())
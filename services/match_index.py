@@ -0,0 +1,569 @@
+"""
+Bire-çok başvuru eşleştirme: mevcut müşteriler ve iç izleme listeleri taraması.
+
+- TCKN üzerinde birebir indeks (sıralı dizi + searchsorted)
+- Türkçe katlanmış isimlerin harf üçlüleri (trigram) üzerinde bloklama
+- Aday kümesinde rapidfuzz process.cdist ile çok çekirdekli skorlama
+
+Kalıcı biçim (dizin, tüm diziler .npy ve np.load(mmap_mode="r") ile açılır):
+    meta.json                       kayıt sayısı, kaynak adları
+    ids / names / keys (+_offsets)  UTF-8 bayt blokları ve CSR ofsetleri
+    tckns, sources, alive           kayıt sütunları
+    tckn_sorted, tckn_order         TCKN arama dizisi
+    gram_indptr, gram_postings      trigram → kayıt CSR indeksi
+    journal.jsonl                   son save()'den beri yapılan ekleme/silmeler
+
+Yüklemeden sonra eklenen kayıtlar bellekte tutulur; save() hepsini tek bir CSR'a sıkıştırır.
+open_journal() açıksa her değişiklik günlüğe de yazılır; süreç çökerse load() günlüğü
+yeniden oynatır (işlemler kimliğe göre yer değiştirdiğinden tekrar oynatmak güvenlidir).
+
+Kullanım:
+    python -m services.match_index build musteriler.csv -o data/match_index
+    python -m services.match_index query data/match_index "Kaan Ankara" -k 5
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import IO, Iterable, Iterator, Optional, Sequence
+import argparse
+import csv
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from config.settings import settings
+from services.match_service import NAME_SCORER
+from utils.logs import configure_logging
+from utils.textnorm import fold_turkish_name
+
+logger = logging.getLogger(__name__)
+
+# Katlanmış alfabe: boşluk + A-Z
+_ALPHABET = 27
+N_GRAMS = _ALPHABET ** 3
+_EMPTY_GRAMS = np.zeros(0, dtype=np.int64)
+FORMAT_VERSION = 1
+# NAME_SCORER (token_set_ratio) isim sorgunun üst kümesi olan kayıtlara da 100 verir;
+# eşit skorlarda fazladan kelimeyi cezalandıran bu skor (ardından kayıt sırası) belirler
+_TIE_SCORER = fuzz.token_sort_ratio
+JOURNAL_FILE = "journal.jsonl"
+
+
+def _gram_set(key: str) -> set[int]:
+    c = [0 if ch == " " else ord(ch) - 64 for ch in f" {key} "]
+    return {(c[i] * _ALPHABET + c[i + 1]) * _ALPHABET + c[i + 2] for i in range(len(c) - 2)}
+
+
+def name_grams(key: str) -> np.ndarray:
+    """Katlanmış ismin tekil trigram kodları (0 ≤ kod < 27³), sıralı."""
+    if not key:
+        return _EMPTY_GRAMS
+    return np.array(sorted(_gram_set(key)), dtype=np.int64)
+
+
+def bulk_name_grams(keys: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Çok sayıda katlanmış isim için (trigram, kayıt) çiftleri; kayıt sınırını aşan üçlüler atılır."""
+    padded = [f" {k} " for k in keys]
+    lengths = np.fromiter((len(p) for p in padded), dtype=np.int64, count=len(padded))
+    codes = np.frombuffer("".join(padded).encode("ascii"), dtype=np.uint8).astype(np.int64) - 64
+    codes[codes < 0] = 0
+    if len(codes) < 3:
+        return _EMPTY_GRAMS, np.zeros(0, dtype=np.int32)
+    grams = codes[:-2] * _ALPHABET * _ALPHABET + codes[1:-1] * _ALPHABET + codes[2:]
+    owners = np.repeat(np.arange(len(keys), dtype=np.int64), lengths)[:-2]
+    ends = np.cumsum(lengths)
+    valid = np.arange(len(grams)) + 3 <= ends[owners]
+    pairs = np.unique(owners[valid] * N_GRAMS + grams[valid])
+    return pairs % N_GRAMS, (pairs // N_GRAMS).astype(np.int32)
+
+
+def _tckn_int(tckn: Optional[str]) -> int:
+    return int(tckn) if tckn and tckn.isdigit() and len(tckn) == 11 else 0
+
+
+@dataclass(frozen=True)
+class ScreenHit:
+    record_id: str
+    name: str
+    source: str
+    score: float
+    tckn_match: bool
+
+
+class _Strings:
+    """Salt okunur UTF-8 blok (mmap) + sonradan eklenen dizgeler."""
+    def __init__(self, blob: np.ndarray | None = None, offsets: np.ndarray | None = None):
+        self.blob = blob if blob is not None else np.zeros(0, dtype=np.uint8)
+        self.offsets = offsets if offsets is not None else np.zeros(1, dtype=np.int64)
+        self.extra: list[str] = []
+
+    @property
+    def base_len(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        nb = self.base_len
+        if i >= nb:
+            return self.extra[i - nb]
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def take(self, idx: np.ndarray) -> list[str]:
+        """Birden çok dizgeyi tek seferde çözer (mmap üzerinde dilim başına numpy yükü olmadan)."""
+        nb = self.base_len
+        idx = np.asarray(idx, dtype=np.int64)
+        base = idx < nb
+        starts = self.offsets[idx[base]].tolist()
+        ends = self.offsets[idx[base] + 1].tolist()
+        mv = memoryview(self.blob)
+        decoded = iter([bytes(mv[a:b]).decode("utf-8") for a, b in zip(starts, ends)])
+        return [next(decoded) if is_base else self.extra[i - nb] for i, is_base in zip(idx.tolist(), base.tolist())]
+
+    def append(self, s: str) -> None:
+        self.extra.append(s)
+
+
+def _pack_strings(values: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+class MatchIndex:
+    """
+    Artımlı ekleme/silme destekli isim + TCKN tarama indeksi.
+    Tüm genel metotlar thread-safe'tir.
+    """
+    def __init__(self, block_ratio: float = 0.3, max_candidates: int = 2000, workers: int = -1):
+        # Bir adayın bloklamayı geçmesi için sorgu trigramlarının paylaşması gereken oran
+        self.block_ratio = block_ratio
+        self.max_candidates = max_candidates
+        self.workers = workers
+        self.path: str | None = None
+        self.dirty = False
+        self._lock = threading.RLock()
+        self._journal: IO[str] | None = None
+
+        self.sources: list[str] = []
+        self._ids = _Strings()
+        self._names = _Strings()
+        self._keys = _Strings()
+        self._base_tckns = np.zeros(0, dtype=np.int64)
+        self._base_sources = np.zeros(0, dtype=np.uint8)
+        self._tckn_sorted = np.zeros(0, dtype=np.int64)
+        self._tckn_order = np.zeros(0, dtype=np.int64)
+        self._indptr = np.zeros(N_GRAMS + 1, dtype=np.int64)
+        self._postings = np.zeros(0, dtype=np.int32)
+
+        # Yüklemeden sonra eklenenler
+        self._extra_tckns: list[int] = []
+        self._extra_sources: list[int] = []
+        self._extra_postings: dict[int, list[int]] = {}
+        self._extra_by_tckn: dict[int, list[int]] = {}
+
+        self._alive = np.zeros(0, dtype=bool)
+        self._n = 0
+        self._id_map: dict[str, int] | None = None
+
+    # --- yardımcılar -----------------------------------------------------
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._alive[:self._n].sum())
+
+    def _source_code(self, source: str) -> int:
+        if source not in self.sources:
+            if len(self.sources) >= 255:
+                raise ValueError("En fazla 255 kaynak listesi desteklenir")
+            self.sources.append(source)
+        return self.sources.index(source)
+
+    def _id_index(self) -> dict[str, int]:
+        if self._id_map is None:
+            live = np.flatnonzero(self._alive[:self._n])
+            self._id_map = dict(zip(self._ids.take(live), live.tolist()))
+        return self._id_map
+
+    def _gather_sources(self, idx: np.ndarray) -> np.ndarray:
+        nb = len(self._base_sources)
+        out = np.empty(len(idx), dtype=np.uint8)
+        base = idx < nb
+        out[base] = self._base_sources[idx[base]]
+        if (~base).any():
+            out[~base] = [self._extra_sources[i - nb] for i in idx[~base]]
+        return out
+
+    def _gather_tckns(self, idx: np.ndarray) -> np.ndarray:
+        nb = len(self._base_tckns)
+        out = np.empty(len(idx), dtype=np.int64)
+        base = idx < nb
+        out[base] = self._base_tckns[idx[base]]
+        if (~base).any():
+            out[~base] = [self._extra_tckns[i - nb] for i in idx[~base]]
+        return out
+
+    def _grow(self) -> None:
+        if self._n == len(self._alive):
+            grown = np.zeros(max(1024, 2 * len(self._alive)), dtype=bool)
+            grown[:self._n] = self._alive[:self._n]
+            self._alive = grown
+
+    # --- değişiklik ------------------------------------------------------
+
+    def insert(self, record_id: str, name: str, tckn: str | None = None, source: str = "customer") -> None:
+        """Kayıt ekler; aynı kimlikte kayıt varsa yerine geçer."""
+        with self._lock:
+            self._insert(record_id, name, tckn, source)
+            self._log({"op": "insert", "id": record_id, "name": name, "tckn": tckn, "source": source})
+
+    def delete(self, record_id: str) -> bool:
+        with self._lock:
+            if not self._delete(record_id):
+                return False
+            self._log({"op": "delete", "id": record_id})
+            return True
+
+    def _insert(self, record_id: str, name: str, tckn: str | None, source: str) -> None:
+        with self._lock:
+            self._delete(record_id)
+            key = fold_turkish_name(name)
+            idx = self._n
+            self._grow()
+            self._ids.append(record_id)
+            self._names.append(name)
+            self._keys.append(key)
+            tckn_value = _tckn_int(tckn)
+            self._extra_tckns.append(tckn_value)
+            self._extra_sources.append(self._source_code(source))
+            for g in _gram_set(key) if key else ():
+                self._extra_postings.setdefault(g, []).append(idx)
+            if tckn_value:
+                self._extra_by_tckn.setdefault(tckn_value, []).append(idx)
+            self._alive[idx] = True
+            self._n += 1
+            self._id_index()[record_id] = idx
+            self.dirty = True
+
+    def _delete(self, record_id: str) -> bool:
+        with self._lock:
+            idx = self._id_index().pop(record_id, None)
+            if idx is None:
+                return False
+            self._alive[idx] = False
+            self.dirty = True
+            return True
+
+    def _log(self, entry: dict) -> None:
+        if self._journal is not None:
+            # Satır tamponu süreç çökmesinde kaybolmasın diye hemen boşaltılır
+            self._journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._journal.flush()
+
+    # --- sorgu -----------------------------------------------------------
+
+    def _tckn_hits(self, tckn: str | None) -> list[int]:
+        value = _tckn_int(tckn)
+        if not value:
+            return []
+        lo = np.searchsorted(self._tckn_sorted, value, side="left")
+        hi = np.searchsorted(self._tckn_sorted, value, side="right")
+        hits = self._tckn_order[lo:hi].tolist() + self._extra_by_tckn.get(value, [])
+        return [i for i in hits if self._alive[i]]
+
+    def _candidates(self, grams: np.ndarray, source_codes: Optional[set[int]]) -> np.ndarray:
+        """Bloklama: sorgu trigramlarının en az `block_ratio` kadarını paylaşan canlı kayıtlar."""
+        if not len(grams):
+            return np.zeros(0, dtype=np.int64)
+        parts = [self._postings[self._indptr[g]:self._indptr[g + 1]] for g in grams.tolist()]
+        parts += [np.asarray(self._extra_postings[g], dtype=np.int32)
+                  for g in grams.tolist() if g in self._extra_postings]
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        # Kayıt başına paylaşılan trigram sayısı; O(posting + kayıt)
+        counts = np.bincount(np.concatenate(parts), minlength=self._n)
+        cand = np.flatnonzero(counts >= max(1, math.ceil(len(grams) * self.block_ratio)))
+        shared = counts[cand]
+        alive = self._alive[cand]
+        cand, shared = cand[alive], shared[alive]
+        if source_codes is not None and len(cand):
+            in_source = np.isin(self._gather_sources(cand), list(source_codes))
+            cand, shared = cand[in_source], shared[in_source]
+        if len(cand) > self.max_candidates:
+            top = np.argpartition(-shared, self.max_candidates - 1)[:self.max_candidates]
+            cand = cand[top]
+        return cand
+
+    def _source_codes(self, sources: Optional[Iterable[str]]) -> Optional[set[int]]:
+        if sources is None:
+            return None
+        return {self.sources.index(s) for s in sources if s in self.sources}
+
+    def _hit(self, i: int, score: float, tckn_match: bool) -> ScreenHit:
+        return ScreenHit(
+            record_id=self._ids[i],
+            name=self._names[i],
+            source=self.sources[int(self._gather_sources(np.array([i]))[0])],
+            score=round(float(score), 2),
+            tckn_match=tckn_match,
+        )
+
+    def query(self, name: str | None = None, tckn: str | None = None, k: int = 10,
+              min_score: float = 0.0, sources: Optional[Iterable[str]] = None) -> list[ScreenHit]:
+        """
+        En iyi k eşleşme. TCKN eşleşmeleri her zaman öne alınır; isim verilmişse
+        skorları da isim benzerliğidir (0-100, Matcher ile aynı ölçek).
+        """
+        return self.query_many([name], [tckn], k=k, min_score=min_score, sources=sources)[0]
+
+    def query_many(self, names: Sequence[str | None], tckns: Sequence[str | None] | None = None,
+                   k: int = 10, min_score: float = 0.0,
+                   sources: Optional[Iterable[str]] = None) -> list[list[ScreenHit]]:
+        """
+        Toplu tarama: tüm sorguların aday birleşimi tek bir cdist çağrısında,
+        `workers` çekirdekte skorlanır.
+        """
+        tckns = list(tckns) if tckns is not None else [None] * len(names)
+        with self._lock:
+            codes = self._source_codes(sources)
+            keys = [fold_turkish_name(n) for n in names]
+            per_query = [self._candidates(name_grams(key), codes) for key in keys]
+            tckn_hits = [self._tckn_hits(t) for t in tckns]
+            if codes is not None:
+                tckn_hits = [[i for i in hits if int(self._gather_sources(np.array([i]))[0]) in codes]
+                             for hits in tckn_hits]
+
+            union = np.unique(np.concatenate(per_query + [np.asarray(h, dtype=np.int64) for h in tckn_hits]))
+            choices = self._keys.take(union)
+            if choices and any(keys):
+                scores = process.cdist(keys, choices, scorer=NAME_SCORER, workers=self.workers, dtype=np.float32)
+            else:
+                scores = np.zeros((len(keys), len(choices)), dtype=np.float32)
+
+            results = []
+            for q, (key, cand, hits) in enumerate(zip(keys, per_query, tckn_hits)):
+                found: dict[int, ScreenHit] = {}
+                for i in hits:
+                    score = scores[q, np.searchsorted(union, i)] if key else 100.0
+                    found[i] = self._hit(i, score, True)
+                if key and len(cand):
+                    row = scores[q, np.searchsorted(union, cand)]
+                    keep = np.flatnonzero(row >= min_score)
+                    if len(keep) > k:
+                        # k. skora eşit olanlar da elenmez; sıralamayı ikincil skor belirler
+                        kth = row[keep][np.argpartition(-row[keep], k - 1)[k - 1]]
+                        keep = keep[row[keep] >= kth]
+                    tie = process.cdist([key], self._keys.take(cand[keep]), scorer=_TIE_SCORER,
+                                        dtype=np.float32)[0] if len(keep) else row[keep]
+                    order = keep[np.lexsort((cand[keep], -tie, -row[keep]))][:k]
+                    for j in order:
+                        i = int(cand[j])
+                        if i not in found:
+                            found[i] = self._hit(i, row[j], False)
+                ranked = sorted(found.values(), key=lambda h: (h.tckn_match, h.score), reverse=True)
+                results.append(ranked[:k])
+            return results
+
+    # --- kalıcılık -------------------------------------------------------
+
+    def save(self, path: str | None = None) -> None:
+        """Canlı kayıtları tek CSR'a sıkıştırıp dizine yazar ve yeni dosyaları mmap ile açar."""
+        path = path or self.path
+        if path is None:
+            raise ValueError("Kayıt dizini belirtilmedi")
+        with self._lock:
+            live = np.flatnonzero(self._alive[:self._n])
+            ids, names, keys = self._ids.take(live), self._names.take(live), self._keys.take(live)
+            tckns = self._gather_tckns(live)
+            source_codes = self._gather_sources(live)
+
+            grams, owners = bulk_name_grams(keys)
+            order = np.argsort(grams, kind="stable")
+            indptr = np.zeros(N_GRAMS + 1, dtype=np.int64)
+            indptr[1:] = np.cumsum(np.bincount(grams, minlength=N_GRAMS))
+            tckn_order = np.flatnonzero(tckns)[np.argsort(tckns[tckns != 0], kind="stable")]
+
+            arrays = {
+                "tckns": tckns,
+                "sources": source_codes,
+                "alive": np.ones(len(live), dtype=bool),
+                "tckn_sorted": tckns[tckn_order],
+                "tckn_order": tckn_order.astype(np.int64),
+                "gram_indptr": indptr,
+                "gram_postings": owners[order],
+            }
+            for name, values in (("ids", ids), ("names", names), ("keys", keys)):
+                arrays[name], arrays[f"{name}_offsets"] = _pack_strings(values)
+
+            os.makedirs(path, exist_ok=True)
+            for name, arr in arrays.items():
+                tmp = os.path.join(path, f"{name}.npy.tmp")
+                with open(tmp, "wb") as f:
+                    np.save(f, arr)
+                os.replace(tmp, os.path.join(path, f"{name}.npy"))
+            # meta.json en son yazılır; yarım kalan kayıt yüklemede reddedilir
+            tmp = os.path.join(path, "meta.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": FORMAT_VERSION, "count": len(live), "sources": self.sources}, f)
+            os.replace(tmp, os.path.join(path, "meta.json"))
+            logger.info("Eşleştirme indeksi kaydedildi: %s (%s kayıt)", path, len(live))
+            self._open(path)
+            # Günlükteki değişiklikler artık dosyalarda; yarıda kalırsa tekrar oynatmak zararsızdır
+            journaling = self._journal is not None
+            self.close()
+            open(os.path.join(path, JOURNAL_FILE), "w", encoding="utf-8").close()
+            if journaling:
+                self.open_journal()
+
+    def open_journal(self) -> None:
+        """Bundan sonraki ekleme/silmeleri `path` altındaki günlüğe yazar (önce save/load gerekir)."""
+        if self.path is None:
+            raise ValueError("Kayıt dizini belirtilmedi")
+        with self._lock:
+            if self._journal is None:
+                journal = os.path.join(self.path, JOURNAL_FILE)
+                torn = False
+                if os.path.exists(journal) and os.path.getsize(journal):
+                    with open(journal, "rb") as f:
+                        f.seek(-1, os.SEEK_END)
+                        torn = f.read(1) != b"\n"
+                self._journal = open(journal, "a", encoding="utf-8")
+                if torn:
+                    # Yarım kalan satır yeni kayda yapışmasın
+                    self._journal.write("\n")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def _replay(self, path: str) -> int:
+        journal = os.path.join(path, JOURNAL_FILE)
+        if not os.path.exists(journal):
+            return 0
+        applied = 0
+        with open(journal, encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Çökme anında yarım yazılmış son satır
+                    logger.warning("İndeks günlüğü satırı %s okunamadı, atlanıyor: %s", lineno, journal)
+                    continue
+                if entry["op"] == "insert":
+                    self._insert(entry["id"], entry["name"], entry.get("tckn"), entry.get("source", "customer"))
+                else:
+                    self._delete(entry["id"])
+                applied += 1
+        return applied
+
+    def _open(self, path: str) -> None:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Desteklenmeyen indeks sürümü: {meta.get('version')}")
+
+        def load(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        count = int(meta["count"])
+        tckns = load("tckns")
+        if len(tckns) != count:
+            raise ValueError(f"İndeks dosyaları tutarsız: {path}")
+        self.path = path
+        self.sources = list(meta["sources"])
+        self._ids = _Strings(load("ids"), load("ids_offsets"))
+        self._names = _Strings(load("names"), load("names_offsets"))
+        self._keys = _Strings(load("keys"), load("keys_offsets"))
+        self._base_tckns = tckns
+        self._base_sources = load("sources")
+        self._tckn_sorted = load("tckn_sorted")
+        self._tckn_order = load("tckn_order")
+        self._indptr = load("gram_indptr")
+        self._postings = load("gram_postings")
+        self._extra_tckns, self._extra_sources = [], []
+        self._extra_postings, self._extra_by_tckn = {}, {}
+        # Silme işaretleri yazılabilir olmalı; bayt başına bir kayıt
+        self._alive = np.array(load("alive"), dtype=bool)
+        self._n = count
+        # İlk ekleme/silme kilit altında beklemesin diye kimlik haritası yüklemede kurulur
+        self._id_map = None
+        self._id_index()
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "MatchIndex":
+        index = cls(**kwargs)
+        started = time.perf_counter()
+        with index._lock:
+            index._open(path)
+            replayed = index._replay(path)
+        logger.info("Eşleştirme indeksi yüklendi: %s (%s kayıt, günlükten %s değişiklik, %.1f ms)",
+                    path, index._n, replayed, (time.perf_counter() - started) * 1000)
+        return index
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "records": int(self._alive[:self._n].sum()),
+                "base_records": self._ids.base_len,
+                "pending_inserts": len(self._ids.extra),
+                "sources": list(self.sources),
+                "path": self.path,
+                "dirty": self.dirty,
+            }
+
+
+def iter_csv_records(path: str) -> Iterator[tuple[str, str, str | None, str]]:
+    """CSV sütunları: id, name, tckn (opsiyonel), source (opsiyonel, varsayılan customer)."""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield row["id"], row["name"], row.get("tckn") or None, row.get("source") or "customer"
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m services.match_index",
+                                     description="Müşteri / izleme listesi eşleştirme indeksi")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("build", help="CSV'den indeks oluştur (mevcut indekse ekler)")
+    p.add_argument("csv", nargs="+")
+    p.add_argument("-o", "--output", required=True, help="İndeks dizini")
+    p = sub.add_parser("query", help="İndekste isim/TCKN ara")
+    p.add_argument("index")
+    p.add_argument("name", nargs="?")
+    p.add_argument("--tckn")
+    p.add_argument("-k", type=int, default=10)
+    p.add_argument("--min-score", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        exists = os.path.exists(os.path.join(args.output, "meta.json"))
+        index = MatchIndex.load(args.output) if exists else MatchIndex()
+        count = 0
+        for path in args.csv:
+            for record_id, name, tckn, source in iter_csv_records(path):
+                index.insert(record_id, name, tckn, source)
+                count += 1
+        index.save(args.output)
+        logger.info("%s kayıt eklendi", count)
+        return 0
+
+    index = MatchIndex.load(args.index)
+    started = time.perf_counter()
+    hits = index.query(args.name, args.tckn, k=args.k, min_score=args.min_score)
+    took_ms = (time.perf_counter() - started) * 1000
+    for hit in hits:
+        print(json.dumps(hit.__dict__, ensure_ascii=False))
+    logger.info("Sorgu süresi: %.2f ms", took_ms)
+    return 0
+
+
+if __name__ == "__main__":
+    configure_logging(settings)
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""
+Bağımlılıksız Prometheus metrikleri ve istek başına aşama süreleri.
+
+    with span("match"):
+        ...
+
+Her span `verifycheck_stage_seconds{stage=...}` histogramına yazılır; aktif bir
+istek varsa süre o isteğin zaman dökümüne de eklenir (ValidateResponse.timings).
+Süreç işçilerinde capture() gözlemleri toplar; ana süreç replay() ile kendi
+kayıt defterine işler (işçinin /metrics'i yoktur).
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Sequence
+import bisect
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0)
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _capture(self, value: float, labels: dict) -> bool:
+        events = _captured.get()
+        if events is None:
+            return False
+        events.append((self.name, value, labels))
+        return True
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if self._capture(amount, labels):
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_fmt_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_fmt_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # etiket -> (kova sayaçları, toplam, adet)
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        if self._capture(value, labels):
+            return
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][idx] += 1
+            state[1] += value
+            state[2] += 1
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+        lines = self.header()
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                le = _fmt_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _fmt_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {n}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._by_name: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        self._by_name[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> _Metric | None:
+        return self._by_name.get(name)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for m in self._metrics:
+            lines.extend(m.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "verifycheck_request_seconds", "HTTP istek süresi", ("endpoint", "status")))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "verifycheck_stage_seconds", "Aşama başına süre", ("stage",)))
+OCR_SECONDS = REGISTRY.register(Histogram(
+    "verifycheck_ocr_seconds", "Belge türüne göre OCR süresi", ("doc_type",)))
+OCR_CONFIDENCE = REGISTRY.register(Histogram(
+    "verifycheck_ocr_confidence", "Belge türüne göre OCR güven dağılımı", ("doc_type",),
+    buckets=CONFIDENCE_BUCKETS))
+POOL_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "verifycheck_reader_pool_wait_seconds", "Okuyucu havuzunda bekleme süresi"))
+CASCADE_TOTAL = REGISTRY.register(Counter(
+    "verifycheck_ocr_cascade_total", "Kaskadda hızlı motor sonucu: accepted veya yükseltme sebebi",
+    ("doc_type", "outcome")))
+QUALITY_REJECTED_TOTAL = REGISTRY.register(Counter(
+    "verifycheck_quality_rejected_total", "Kalite kapısında reddedilen belgeler", ("doc_type", "reason")))
+QUALITY_SAVED_SECONDS = REGISTRY.register(Counter(
+    "verifycheck_quality_saved_seconds_total", "Kalite kapısı sayesinde atlanan tahmini OCR süresi"))
+SHORT_CIRCUIT_TOTAL = REGISTRY.register(Counter(
+    "verifycheck_short_circuit_total", "Kimlik sonucu kararı belirlediği için atlanan form OCR'ları", ("reason",)))
+ERRORS_TOTAL = REGISTRY.register(Counter(
+    "verifycheck_errors_total", "Aşamaya göre hata sayısı", ("stage",)))
+POOL_IN_USE = REGISTRY.register(Gauge(
+    "verifycheck_reader_pool_in_use", "Kullanımdaki okuyucu sayısı"))
+OCR_INFLIGHT = REGISTRY.register(Gauge(
+    "verifycheck_ocr_inflight", "Devam eden OCR işi sayısı"))
+JOBS_QUEUED = REGISTRY.register(Gauge(
+    "verifycheck_jobs_queued", "Asenkron iş kuyruğundaki iş sayısı"))
+
+
+# Aktif isteğin zaman dökümü ve span adı öneki (ör. belge türü)
+_request_timings: ContextVar[dict | None] = ContextVar("request_timings", default=None)
+_span_prefix: ContextVar[str] = ContextVar("span_prefix", default="")
+# capture() içindeki sayaç/histogram gözlemleri: (metrik adı, değer, etiketler)
+_captured: ContextVar[list | None] = ContextVar("captured_metrics", default=None)
+
+
+def start_request_timings() -> dict[str, float]:
+    """Bu bağlamda (ve kopyalanan alt bağlamlarda) span sürelerini toplayacak sözlük."""
+    timings: dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+@contextmanager
+def span_scope(prefix: str) -> Iterator[None]:
+    """İçerideki span'ların istek dökümünde `prefix.` ile ayrışmasını sağlar."""
+    token = _span_prefix.set(f"{prefix}.")
+    try:
+        yield
+    finally:
+        _span_prefix.reset(token)
+
+
+@contextmanager
+def capture() -> Iterator[tuple[list, dict[str, float]]]:
+    """
+    Gözlemleri kayıt defterine yazmak yerine toplar; (olaylar, aşama süreleri)
+    sonuçla birlikte ana sürece döndürülür ve orada replay() ile işlenir.
+    """
+    events: list = []
+    timings: dict[str, float] = {}
+    token = _captured.set(events)
+    timings_token = _request_timings.set(timings)
+    try:
+        yield events, timings
+    finally:
+        _request_timings.reset(timings_token)
+        _captured.reset(token)
+
+
+def replay(events: Iterable[tuple[str, float, dict]]) -> None:
+    """capture() ile toplanan gözlemleri bu sürecin metriklerine uygular."""
+    for name, value, labels in events:
+        metric = REGISTRY.get(name)
+        if isinstance(metric, Counter):
+            metric.inc(value, **labels)
+        elif isinstance(metric, Histogram):
+            metric.observe(value, **labels)
+
+
+def add_request_timings(timings: dict[str, float]) -> None:
+    """Başka süreçte ölçülen aşama sürelerini aktif isteğin dökümüne ekler."""
+    current = _request_timings.get()
+    if current is not None:
+        for key, seconds in timings.items():
+            current[key] = current.get(key, 0.0) + seconds
+
+
+def record(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        key = _span_prefix.get() + stage
+        timings[key] = timings.get(key, 0.0) + seconds
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS_TOTAL.inc(stage=stage)
+        raise
+    finally:
+        record(stage, time.perf_counter() - started)
@@ -0,0 +1,190 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Optional
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(image: bytes | bytearray | memoryview | np.ndarray, namespace: str) -> str:
+    """
+    İçerik adresli anahtar: görsel baytlarının özeti + motor/önişleme imzası.
+    Aynı görsel farklı dil veya önişleme ayarıyla ayrı kayıt olur.
+    """
+    h = hashlib.sha256()
+    h.update(namespace.encode("utf-8"))
+    h.update(b"\0")
+    if isinstance(image, np.ndarray):
+        h.update(f"{image.shape}|{image.dtype}".encode("ascii"))
+        h.update(np.ascontiguousarray(image).data)
+    else:
+        h.update(image)
+    return h.hexdigest()
+
+
+class OcrCache:
+    """
+    OCR sonuçları için iki katmanlı önbellek.
+    - Bellek: bayt sınırlı LRU
+    - Disk (opsiyonel): SQLite, yeniden başlatmalarda korunur
+    Kayıtlar TCKN/isim içerdiğinden TTL ile düşer ve purge() ile tamamen silinebilir.
+    Süresi dolanlar en geç `sweep_interval_s` aralıkla put() sırasında (ve dışarıdan
+    purge_expired() ile) silinir; okunmayı beklemez.
+    """
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl_s: float = 3600.0,
+                 disk_path: str | None = None, sweep_interval_s: float = 300.0):
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.disk_path = disk_path
+        self.sweep_interval_s = sweep_interval_s
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+        self._mem: OrderedDict[str, tuple[float, dict, int]] = OrderedDict()
+        self._mem_bytes = 0
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expired = 0
+
+        self._db: sqlite3.Connection | None = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False, timeout=5.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            logger.info("OCR disk önbelleği açıldı: %s", disk_path)
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                expires_at, value, size = entry
+                if expires_at > now:
+                    self._mem.move_to_end(key)
+                    self._hits += 1
+                    return value
+                self._drop(key)
+                self._expired += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM ocr_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if row[1] > now:
+                        value = json.loads(row[0])
+                        self._put_mem(key, value, row[1], len(row[0]))
+                        self._hits += 1
+                        self._disk_hits += 1
+                        return value
+                    self._db.execute("DELETE FROM ocr_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._expired += 1
+
+            self._misses += 1
+            return None
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        expires_at = now + self.ttl_s
+        with self._lock:
+            if now - self._last_sweep >= self.sweep_interval_s:
+                self._purge_expired(now)
+            self._put_mem(key, value, expires_at, len(payload))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO ocr_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, payload, expires_at),
+                )
+                self._db.commit()
+
+    def _put_mem(self, key: str, value: dict, expires_at: float, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        if key in self._mem:
+            self._drop(key)
+        self._mem[key] = (expires_at, value, size)
+        self._mem_bytes += size
+        while self._mem_bytes > self.max_bytes:
+            old_key = next(iter(self._mem))
+            self._drop(old_key)
+            self._evictions += 1
+
+    def _drop(self, key: str) -> None:
+        _, _, size = self._mem.pop(key)
+        self._mem_bytes -= size
+
+    def clear_memory(self) -> int:
+        """Yalnızca bu sürecin bellek katmanını boşaltır (disk başka süreçle ortak olabilir)."""
+        with self._lock:
+            removed = len(self._mem)
+            self._mem.clear()
+            self._mem_bytes = 0
+        return removed
+
+    def purge(self) -> int:
+        """Tüm kayıtları (bellek + disk) siler; silinen kayıt sayısını döner."""
+        with self._lock:
+            removed = len(self._mem)
+            self._mem.clear()
+            self._mem_bytes = 0
+            if self._db is not None:
+                # Disk katmanı bellektekilerin üst kümesidir
+                removed = self._db.execute("DELETE FROM ocr_cache").rowcount
+                self._db.commit()
+                self._db.execute("VACUUM")
+        logger.info("OCR önbelleği temizlendi - %s kayıt", removed)
+        return removed
+
+    def purge_expired(self) -> int:
+        """Süresi dolan kayıtları bellek ve diskten siler; silinen kayıt sayısını döner."""
+        with self._lock:
+            return self._purge_expired(time.time())
+
+    def _purge_expired(self, now: float) -> int:
+        self._last_sweep = now
+        stale = [k for k, (exp, _, _) in self._mem.items() if exp <= now]
+        for k in stale:
+            self._drop(k)
+        removed = len(stale)
+        if self._db is not None:
+            removed += self._db.execute(
+                "DELETE FROM ocr_cache WHERE expires_at <= ?", (now,)
+            ).rowcount
+            self._db.commit()
+        self._expired += removed
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._mem),
+                "bytes": self._mem_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expired": self._expired,
+                "disk": self.disk_path is not None,
+            }
+
+    def close(self) -> None:
+        # Devam eden bir temizlik bitene kadar bağlantı kapatılmaz
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,107 @@
+"""
+OCR motoru kayıt defteri.
+
+    engine = create_engine("tesseract", languages=("tr", "en"))
+
+Her motor services.ocr_service.OcrEngine arayüzünü uygular; yeni bir motor
+BaseOCREngine'den türetilip `register_engine` ile eklenir ve KYC_OCR_ENGINE /
+KYC_OCR_CASCADE_FAST_ENGINE ayarlarıyla seçilir.
+"""
+from __future__ import annotations
+from typing import Callable, Iterable
+import logging
+import time
+
+import numpy as np
+
+from services.ocr_service import BaseOCREngine, EasyOCREngine, OcrEngine
+from services.preprocess import PreprocessConfig
+
+logger = logging.getLogger(__name__)
+
+# EasyOCR dil kodu -> Tesseract traineddata adı
+_TESSERACT_LANGS = {"tr": "tur", "en": "eng"}
+
+
+class TesseractEngine(BaseOCREngine):
+    """
+    Tesseract (LSTM) ile tek geçişte tespit + tanıma; EasyOCR'dan çok daha ucuz,
+    GPU/torch gerektirmez. Opsiyoneldir: `pytesseract` ve `tesseract-ocr` (+ `-tur`) paketleri gerekir.
+    """
+    name = "tesseract"
+
+    def __init__(self, languages: Iterable[str] = ("tr", "en"), preprocess: PreprocessConfig | None = None,
+                 tessdata_dir: str | None = None, cmd: str | None = None, psm: int = 3):
+        super().__init__(languages, preprocess)
+        logger.info("Tesseract başlatılıyor - Diller: %s", self.languages)
+        try:
+            import pytesseract
+        except ImportError as e:
+            raise RuntimeError("Tesseract motoru için `pytesseract` paketi gerekli") from e
+        if cmd:
+            pytesseract.pytesseract.tesseract_cmd = cmd
+        self._tess = pytesseract
+        self.lang = "+".join(_TESSERACT_LANGS.get(code, code) for code in self.languages)
+        self.config = f"--oem 1 --psm {psm}"
+        if tessdata_dir:
+            self.config += f' --tessdata-dir "{tessdata_dir}"'
+        version = pytesseract.get_tesseract_version()
+        logger.info("Tesseract %s yüklendi", version)
+
+    def _recognize(self, gray: np.ndarray, timings: dict | None = None) -> list:
+        """Kelime kutularını satırlara birleştirip EasyOCR biçiminde döner."""
+        started = time.perf_counter()
+        data = self._tess.image_to_data(gray, lang=self.lang, config=self.config,
+                                        output_type=self._tess.Output.DICT)
+        if timings is not None:
+            timings["recognize"] = time.perf_counter() - started
+
+        # (blok, paragraf, satır) -> [x0, y0, x1, y1, kelimeler, güvenler]
+        lines: dict[tuple[int, int, int], list] = {}
+        for i, word in enumerate(data["text"]):
+            conf = float(data["conf"][i])
+            if conf < 0 or not word.strip():
+                continue
+            x, y, w, h = data["left"][i], data["top"][i], data["width"][i], data["height"][i]
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            line = lines.get(key)
+            if line is None:
+                lines[key] = [x, y, x + w, y + h, [word], [conf]]
+            else:
+                line[0], line[1] = min(line[0], x), min(line[1], y)
+                line[2], line[3] = max(line[2], x + w), max(line[3], y + h)
+                line[4].append(word)
+                line[5].append(conf)
+
+        return [
+            ([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], " ".join(words), sum(confs) / len(confs) / 100.0)
+            for x0, y0, x1, y1, words, confs in lines.values()
+        ]
+
+
+ENGINES: dict[str, Callable[..., OcrEngine]] = {}
+
+
+def register_engine(name: str, factory: Callable[..., OcrEngine]) -> None:
+    ENGINES[name] = factory
+
+
+def create_engine(name: str, languages: Iterable[str] = ("tr", "en"),
+                  preprocess: PreprocessConfig | None = None, **options) -> OcrEngine:
+    factory = ENGINES.get(name)
+    if factory is None:
+        raise ValueError(f"Bilinmeyen OCR motoru: {name} (kayıtlı: {', '.join(sorted(ENGINES))})")
+    return factory(languages=languages, preprocess=preprocess, **options)
+
+
+def engine_options(name: str, settings) -> dict:
+    """Settings'ten motora özel kurucu argümanları."""
+    if name == "easyocr":
+        return {"model_dir": settings.ocr_model_dir, "download": settings.ocr_model_download}
+    if name == "tesseract":
+        return {"tessdata_dir": settings.ocr_tessdata_dir, "cmd": settings.ocr_tesseract_cmd}
+    return {}
+
+
+register_engine("easyocr", EasyOCREngine)
+register_engine("tesseract", TesseractEngine)
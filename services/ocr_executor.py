@@ -0,0 +1,331 @@
+from __future__ import annotations
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, NamedTuple, Optional
+import asyncio
+import contextvars
+from functools import partial
+import logging
+import multiprocessing
+import os
+import threading
+
+from config.settings import settings
+from services.cpu_budget import CpuBudget, enter_process_slot, enter_thread_slot
+from services.metrics import add_request_timings, capture, replay
+from services.ocr_cache import OcrCache
+from services.ocr_engines import create_engine
+from services.ocr_service import DocumentExtractor, Extraction, ImageSource, cascade_extract
+from services.preprocess import PreprocessConfig
+from services.reader_pool import ReaderPool
+from utils.logs import configure_logging
+
+logger = logging.getLogger(__name__)
+
+class OcrBusyError(RuntimeError):
+    """Eşzamanlı OCR iş limiti dolu."""
+
+
+class OcrTimeoutError(RuntimeError):
+    """OCR işi istek süresi içinde bitmedi."""
+
+
+# Süreç (process) modunda her işçi kendi motor(lar)ını bir kez yükler
+_worker_extractor: DocumentExtractor | None = None
+_worker_fast_extractor: DocumentExtractor | None = None
+_worker_min_confidence = 0.0
+_worker_cache: OcrCache | None = None
+# Ana süreç DELETE /api/cache'te artırır; işçi sıradaki işten önce bellek katmanını boşaltır
+_worker_purge_epoch = None
+_worker_seen_epoch = 0
+
+
+def _init_process_worker(languages: tuple[str, ...], cache_args: dict | None,
+                         preprocess: PreprocessConfig | None,
+                         profiles: dict[str, PreprocessConfig] | None,
+                         engines: list[tuple[str, dict]], warmup: bool = False,
+                         min_confidence: float = 0.0, budget: CpuBudget | None = None,
+                         slot_counter=None, purge_epoch=None) -> None:
+    """`engines`: [(doğru motor, argümanlar)] veya kaskadda [(doğru), (hızlı)]."""
+    global _worker_extractor, _worker_fast_extractor, _worker_min_confidence
+    global _worker_cache, _worker_purge_epoch, _worker_seen_epoch
+    # spawn ile açılan süreç ana sürecin günlük ayarını devralmaz; kuyruk thread'i olmadan yazar
+    configure_logging(settings.model_copy(update={"log_queue": False}))
+    # Motorlar yüklenmeden önce: torch bu sürecin iş parçacığı payıyla başlar
+    enter_process_slot(budget, slot_counter)
+    # Bellek katmanı süreç başına; disk katmanı (varsa) süreçler arasında ortak
+    cache = OcrCache(**cache_args) if cache_args is not None else None
+    extractors = []
+    for name, options in engines:
+        engine = create_engine(name, languages=languages, preprocess=preprocess, **options)
+        if warmup:
+            engine.warm_up()
+        extractors.append(DocumentExtractor(engine, cache=cache, profiles=profiles))
+    _worker_extractor = extractors[0]
+    _worker_fast_extractor = extractors[1] if len(extractors) > 1 else None
+    _worker_min_confidence = min_confidence
+    _worker_cache = cache
+    _worker_purge_epoch = purge_epoch
+    _worker_seen_epoch = purge_epoch.value if purge_epoch is not None else 0
+
+
+def _ping_process_worker() -> int:
+    """İşçinin başlatıcısı (model yükleme + ısınma) bitince döner."""
+    if _worker_extractor is None:
+        raise RuntimeError("OCR işçisi başlatılmamış")
+    return os.getpid()
+
+
+class _ProcessResult(NamedTuple):
+    """İşçi sürecin sonucu; metrik olayları ve aşama süreleri ana süreçte işlenir."""
+    extraction: Extraction
+    events: list
+    timings: dict[str, float]
+    pid: int
+    cache_stats: dict | None
+
+
+class _ProcessFuture(Future):
+    """İşçi sonucunu açan future; aşama süreleri isteğin dökümüne eklenmek üzere saklanır."""
+    def __init__(self):
+        super().__init__()
+        self.timings: dict[str, float] = {}
+
+
+def _extract_in_process(image: ImageSource, doc_type: str | None) -> _ProcessResult:
+    global _worker_seen_epoch
+    if _worker_extractor is None:
+        raise RuntimeError("OCR işçisi başlatılmamış")
+    if _worker_cache is not None and _worker_purge_epoch is not None:
+        epoch = _worker_purge_epoch.value
+        if epoch != _worker_seen_epoch:
+            # Temizlenmiş önbellekten sonuç dönmez; disk katmanını ana süreç sildi
+            _worker_cache.clear_memory()
+            _worker_seen_epoch = epoch
+    # İşçinin metrikleri /metrics'e ulaşmaz; gözlemler sonuçla birlikte döner
+    with capture() as (events, timings):
+        if _worker_fast_extractor is not None:
+            res = cascade_extract(_worker_fast_extractor.extract, _worker_extractor.extract,
+                                  image, doc_type, _worker_min_confidence)
+        else:
+            res = _worker_extractor.extract(image, doc_type)
+    stats = _worker_cache.stats() if _worker_cache is not None else None
+    return _ProcessResult(res, events, timings, os.getpid(), stats)
+
+
+def _extract_with_pool(pool: ReaderPool, cache: OcrCache | None,
+                       profiles: dict[str, PreprocessConfig] | None,
+                       image: ImageSource, doc_type: str | None) -> Extraction:
+    with pool.lease() as engine:
+        return DocumentExtractor(engine, cache=cache, profiles=profiles).extract(image, doc_type)
+
+
+def _extract_with_cascade(fast_pool: ReaderPool, pool: ReaderPool, cache: OcrCache | None,
+                          profiles: dict[str, PreprocessConfig] | None, min_confidence: float,
+                          image: ImageSource, doc_type: str | None) -> Extraction:
+    """Pahalı havuzdan yalnızca yükseltilen belgeler için okuyucu kiralanır."""
+    def fast(img: ImageSource, dt: str | None) -> Extraction:
+        return _extract_with_pool(fast_pool, cache, profiles, img, dt)
+
+    def accurate(img: ImageSource, dt: str | None) -> Extraction:
+        return _extract_with_pool(pool, cache, profiles, img, dt)
+
+    return cascade_extract(fast, accurate, image, doc_type, min_confidence)
+
+
+def _cache_args(cache: OcrCache | None) -> dict | None:
+    if cache is None:
+        return None
+    return {"max_bytes": cache.max_bytes, "ttl_s": cache.ttl_s, "disk_path": cache.disk_path,
+            "sweep_interval_s": cache.sweep_interval_s}
+
+
+# İşçi önbellek istatistiklerinde süreçler arasında toplanmayan alanlar
+_CACHE_STAT_SHARED = frozenset({"max_bytes", "disk"})
+
+
+class OcrExecutor:
+    """
+    CPU yoğun OCR işlerini event loop dışında (thread veya process
+    havuzunda) çalıştırır; eşzamanlı iş sayısını ve süreyi sınırlar.
+    """
+    def __init__(self, kind: str = "thread", max_workers: int = 2, max_inflight: int = 8,
+                 timeout_s: float = 60.0, pool: ReaderPool | None = None,
+                 languages: Iterable[str] = ("tr", "en"), cache: OcrCache | None = None,
+                 preprocess: PreprocessConfig | None = None,
+                 profiles: dict[str, PreprocessConfig] | None = None,
+                 engine: str = "easyocr", engine_args: dict | None = None,
+                 fast_engine: str | None = None, fast_engine_args: dict | None = None,
+                 fast_pool: ReaderPool | None = None, min_confidence: float = 0.0,
+                 warmup: bool = False, budget: CpuBudget | None = None):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Geçersiz executor türü: {kind}")
+        if kind == "thread" and pool is None:
+            raise ValueError("Thread modu için okuyucu havuzu gerekli")
+        if kind == "thread" and fast_engine is not None and fast_pool is None:
+            raise ValueError("Kaskad için hızlı motor havuzu gerekli")
+        self.kind = kind
+        self.max_inflight = max_inflight
+        self.timeout_s = timeout_s
+        self.pool = pool
+        self.cache = cache
+        self.profiles = profiles
+        self.fast_pool = fast_pool
+        self.min_confidence = min_confidence
+        self.max_workers = max_workers
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._inflight = 0
+        # Process modunda işçi başına son önbellek istatistiği (pid -> stats)
+        self._worker_cache_stats: dict[int, dict] = {}
+        self._purge_epoch = None
+
+        self._executor: Executor
+        if kind == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ocr",
+                                                initializer=enter_thread_slot, initargs=(budget,))
+        else:
+            engines = [(engine, engine_args or {})]
+            if fast_engine is not None:
+                engines.append((fast_engine, fast_engine_args or {}))
+            # Çok iş parçacıklı (uvicorn + torch) süreçten fork güvenli değil; işçiler temiz başlar
+            ctx = multiprocessing.get_context("spawn")
+            self._purge_epoch = ctx.Value("i", 0)
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=ctx,
+                initializer=_init_process_worker,
+                initargs=(tuple(languages), _cache_args(cache), preprocess, profiles, engines, warmup,
+                          min_confidence, budget, ctx.Value("i", 0), self._purge_epoch),
+            )
+        logger.info("OCR executor başlatıldı - Tür: %s, İşçi: %s, Limit: %s", kind, max_workers, max_inflight)
+
+    @property
+    def inflight(self) -> int:
+        with self._lock:
+            return self._inflight
+
+    def _release(self, _fut: Future) -> None:
+        with self._lock:
+            self._inflight -= 1
+
+    def _unpack(self, fut: _ProcessFuture, work: Future) -> None:
+        """İşçi sonucunun metriklerini bu süreçte kaydeder ve dış future'a Extraction'ı aktarır."""
+        if work.cancelled():
+            fut.cancel()
+            return
+        error = work.exception()
+        if error is None:
+            result: _ProcessResult = work.result()
+            replay(result.events)
+            fut.timings = result.timings
+            if result.cache_stats is not None:
+                with self._lock:
+                    self._worker_cache_stats[result.pid] = result.cache_stats
+        # İstek zaman aşımında iptal ettiyse sonuç atılır; metrikler yine kaydedilmiştir
+        if not fut.set_running_or_notify_cancel():
+            return
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result.extraction)
+
+    def cache_stats(self) -> dict | None:
+        """
+        Önbellek sayaçları. Process modunda bellek katmanları işçi başınadır: sayaçlar
+        işçilerin son işteki değerlerinin toplamıdır (disk katmanı ortaktır).
+        """
+        if self.cache is None:
+            return None
+        stats = self.cache.stats()
+        if self.kind != "process":
+            return stats
+        with self._lock:
+            workers = list(self._worker_cache_stats.values())
+        for worker in workers:
+            for key, value in worker.items():
+                if key not in _CACHE_STAT_SHARED:
+                    stats[key] += value
+        stats["workers"] = len(workers)
+        return stats
+
+    def purge_cache(self) -> int:
+        """
+        Önbelleği siler. Process modunda işçilerin bellek katmanı sıradaki işten önce
+        boşaltılır; o zamana kadar da temizlenmiş kayıtlar hiçbir yanıtta kullanılmaz.
+        """
+        if self.cache is None:
+            return 0
+        removed = self.cache.purge()
+        if self._purge_epoch is not None:
+            with self._purge_epoch.get_lock():
+                self._purge_epoch.value += 1
+            with self._lock:
+                if self.cache.disk_path is None:
+                    removed += sum(s["entries"] for s in self._worker_cache_stats.values())
+                for s in self._worker_cache_stats.values():
+                    s["entries"] = s["bytes"] = 0
+        return removed
+
+    def start_workers(self) -> None:
+        """
+        Process modunda işçileri hemen başlatır ve modelleri yüklenene kadar bekler
+        (normalde ilk istekte başlarlar). Thread modunda motorlar havuzla zaten yüklüdür.
+        """
+        if self.kind != "process":
+            return
+        futures = [self._executor.submit(_ping_process_worker) for _ in range(self.max_workers)]
+        pids = {f.result() for f in futures}
+        logger.info("OCR işçi süreçleri hazır: %s/%s", len(pids), self.max_workers)
+
+    def submit(self, image: ImageSource, doc_type: str | None = None) -> Future:
+        """İşi kuyruğa alır; limit doluysa OcrBusyError fırlatır."""
+        with self._lock:
+            if self._inflight >= self.max_inflight:
+                raise OcrBusyError(f"Eşzamanlı OCR limiti dolu ({self.max_inflight})")
+            self._inflight += 1
+        try:
+            if self.kind == "thread":
+                # İstek bağlamı (aşama süreleri) işçi thread'ine taşınır
+                ctx = contextvars.copy_context()
+                if self.fast_pool is not None:
+                    fut = self._executor.submit(ctx.run, _extract_with_cascade, self.fast_pool, self.pool,
+                                                self.cache, self.profiles, self.min_confidence, image, doc_type)
+                else:
+                    fut = self._executor.submit(ctx.run, _extract_with_pool, self.pool, self.cache,
+                                                self.profiles, image, doc_type)
+                work = fut
+            else:
+                work = self._executor.submit(_extract_in_process, image, doc_type)
+                fut = _ProcessFuture()
+                work.add_done_callback(partial(self._unpack, fut))
+                # Dış future iptal edilirse henüz başlamamış iş de kuyruktan düşer
+                fut.add_done_callback(lambda f: f.cancelled() and work.cancel())
+        except Exception:
+            with self._lock:
+                self._inflight -= 1
+            raise
+        # Slot, iş gerçekten bittiğinde (zaman aşımında bile) serbest kalır
+        work.add_done_callback(self._release)
+        return fut
+
+    async def extract(self, image: ImageSource, doc_type: str | None = None,
+                      timeout_s: float | None = None) -> Extraction:
+        fut = self.submit(image, doc_type)
+        try:
+            res = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(fut)),
+                timeout=self.timeout_s if timeout_s is None else timeout_s,
+            )
+            if isinstance(fut, _ProcessFuture):
+                add_request_timings(fut.timings)
+            return res
+        except asyncio.TimeoutError:
+            fut.cancel()
+            raise OcrTimeoutError(f"OCR {self.timeout_s} sn içinde tamamlanmadı")
+        except asyncio.CancelledError:
+            # Henüz başlamamış iş kuyruktan düşer
+            fut.cancel()
+            raise
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
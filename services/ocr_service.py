@@ -1,138 +1,644 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Iterable, Tuple, Optional
-import easyocr
+from concurrent.futures import Future
+from dataclasses import dataclass, field, replace
+from typing import Callable, Iterable, NamedTuple, Optional, Protocol, Union
+import abc
 import numpy as np
 import cv2
 import logging
 import os
+import queue
+import threading
+import time
 
-from utils.textnorm import extract_name_block, clean_person_name, normalize_text
-from utils.tckn import extract_tckn
+from services.cpu_budget import CpuBudget, configure_torch, enter_thread_slot
+from services.doc_templates import DocumentTemplate, align, crop_fields, get_template
+from services.metrics import CASCADE_TOTAL, ERRORS_TOTAL, OCR_CONFIDENCE, OCR_SECONDS, record as record_stage, span, span_scope
+from services.ocr_cache import OcrCache, make_cache_key
+from services.orientation import Orientation
+from services.preprocess import PreprocessConfig, Preprocessor
+from utils.fields import extract_fields, person_name, text_layout
+from utils.logs import pii_name, pii_text, pii_tckn
+from utils.textnorm import clean_person_name, normalize_text, strip_field_label
+from utils.tckn import extract_tckn, is_valid_tckn, recover_tckn
 
 logger = logging.getLogger(__name__)
 
+# Dosya yolu (CLI/toplu işlem), ham bayt (HTTP yüklemesi) veya decode edilmiş görsel
+ImageSource = Union[str, bytes, bytearray, memoryview, np.ndarray]
+
+
+def describe_source(image: ImageSource) -> str:
+    """Log mesajları için kaynağın kısa tanımı."""
+    if isinstance(image, str):
+        return image
+    if isinstance(image, np.ndarray):
+        return f"<ndarray {image.shape}>"
+    return f"<{type(image).__name__} {len(image)} bayt>"
+
+
+def warmup_image() -> np.ndarray:
+    """Isınma çıkarımı için metin içeren küçük gri görsel."""
+    img = np.full((64, 320), 255, dtype=np.uint8)
+    cv2.putText(img, "12345678950 ABC", (8, 42), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+    return img
+
+
+def load_image(image: ImageSource, preprocessor: Preprocessor | None = None,
+               timings: dict | None = None) -> np.ndarray:
+    """
+    Kaynağı OpenCV görseline çevirir.
+    Bayt/memoryview girdiler np.frombuffer ile kopyalanmadan decode edilir;
+    önişleyici verilirse doğrudan gri ve (JPEG'de) küçültülmüş decode yapılır.
+    """
+    if isinstance(image, np.ndarray):
+        if image.size == 0:
+            raise ValueError("Görsel dizisi boş")
+        return image
+
+    if isinstance(image, str):
+        # Dosya varlığını kontrol etmeye calışıyoruz burda
+        if not os.path.exists(image):
+            raise FileNotFoundError(f"Dosya bulunamadı: {image}")
+        with open(image, 'rb') as f:
+            image = f.read()
+
+    if not image or len(image) == 0:
+        raise ValueError("Görsel verisi boş")
+
+    if preprocessor is not None:
+        return preprocessor.decode(image, timings)
+
+    img_array = np.frombuffer(image, dtype=np.uint8)
+    img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Görsel decode edilemedi")
+    return img
+
+
+def _empty_boxes() -> np.ndarray:
+    return np.zeros((0, 4), dtype=np.float32)
+
+
+def _empty_confs() -> np.ndarray:
+    return np.zeros(0, dtype=np.float32)
+
+
 @dataclass(frozen=True)
 class OcrResult:
     text: str
     confidence: float
+    # Aşama süreleri (sn); önbelleğe yazılmaz
+    timings: dict = field(default_factory=dict, compare=False)
+    # Satır düzeyinde yerleşim: kutular (N×4 float32 x0, y0, x1, y1; önişlenmiş görsel
+    # koordinatında), metinler ve güvenler (N float32)
+    boxes: np.ndarray = field(default_factory=_empty_boxes, compare=False, repr=False)
+    texts: tuple[str, ...] = ()
+    confs: np.ndarray = field(default_factory=_empty_confs, compare=False, repr=False)
+    # Tanımadan önce uygulanan yön düzeltmesi (saat yönünde derece) ve eğim; kutular düzeltilmiş görseldedir
+    rotation: int = 0
+    skew: float = 0.0
 
-class EasyOCREngine:
-    """SRP: sadece OCR'den sorumlu. OCP: başka motorlar için benzer arayüz yazılabilir."""
-    def __init__(self, languages: Iterable[str] = ("tr","en")):
-        logger.info(f"EasyOCR başlatılıyor - Diller: {languages}")
-        try:
-            self.reader = easyocr.Reader(list(languages), gpu=False, verbose=False)
-            logger.info("EasyOCR başarıyla yüklendi")
-        except Exception as e:
-            logger.error(f"EasyOCR başlatma hatası: {e}", exc_info=True)
-            raise
+    def layout(self) -> tuple[np.ndarray, tuple[str, ...], np.ndarray]:
+        """Kutu/metin/güven dizileri; yerleşimi olmayan (eski önbellek) sonuçlarda metinden türetilir."""
+        if self.texts:
+            return self.boxes, self.texts, self.confs
+        return text_layout(self.text)
+
+    def as_dict(self) -> dict:
+        return {
+            "text": self.text,
+            "confidence": self.confidence,
+            "boxes": np.round(self.boxes, 1).tolist(),
+            "texts": list(self.texts),
+            "confs": np.round(self.confs, 4).tolist(),
+            "rotation": self.rotation,
+            "skew": self.skew,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "OcrResult":
+        if "texts" not in d:
+            return cls(text=d["text"], confidence=float(d["confidence"]))
+        return cls(
+            text=d["text"],
+            confidence=float(d["confidence"]),
+            boxes=np.asarray(d["boxes"], dtype=np.float32).reshape(-1, 4),
+            texts=tuple(d["texts"]),
+            confs=np.asarray(d["confs"], dtype=np.float32),
+            rotation=int(d.get("rotation", 0)),
+            skew=float(d.get("skew", 0.0)),
+        )
+
+
+class Extraction(NamedTuple):
+    """DocumentExtractor.extract sonucu; ilk üç alan eski (name, tckn, confidence) üçlüsüdür."""
+    name: Optional[str]
+    tckn: Optional[str]
+    confidence: float
+    # Alan başına güven, ör. {"name": 0.91, "surname": 0.88, "tckn": 0.97}
+    field_confidence: Optional[dict[str, float]] = None
+    # Sonucu üreten motor (kaskadda hızlı motor veya yükseltilen motor)
+    engine: Optional[str] = None
 
-    def read_text(self, image_path: str) -> OcrResult:
-        """Görsel dosyasından metin çıkarır."""
+
+class OcrEngine(Protocol):
+    """DocumentExtractor'ın beklediği motor arayüzü (bkz. services.ocr_engines kayıt defteri)."""
+    name: str
+    languages: tuple[str, ...]
+    preprocess_config: PreprocessConfig
+
+    def cache_namespace(self, preprocess: PreprocessConfig | None = None) -> str: ...
+
+    def load(self, image: ImageSource,
+             preprocess: PreprocessConfig | None = None) -> tuple[np.ndarray, Optional[Orientation]]: ...
+
+    def read_text(self, image: ImageSource, preprocess: PreprocessConfig | None = None) -> OcrResult: ...
+
+    def warm_up(self) -> float: ...
+
+
+class BaseOCREngine(abc.ABC):
+    """
+    Decode + önişleme + sonuç derleme ortak; alt sınıflar yalnızca `_recognize`
+    yazar ve EasyOCR biçiminde satırlar döner: [(dörtgen, metin, güven 0-1), ...].
+    """
+    name = "base"
+
+    def __init__(self, languages: Iterable[str] = ("tr", "en"), preprocess: PreprocessConfig | None = None):
+        self.languages = tuple(languages)
+        self.preprocess_config = preprocess or PreprocessConfig()
+
+    def warm_up(self) -> float:
+        """Küçük sentetik görselde tanıma çalıştırır (ilk çağrı gecikmesi açılışta ödenir)."""
+        started = time.perf_counter()
+        self._recognize(warmup_image())
+        elapsed = time.perf_counter() - started
+        logger.info("OCR ısınma çıkarımı tamamlandı - %s (%.2f sn)", self.name, elapsed)
+        return elapsed
+
+    def cache_namespace(self, preprocess: PreprocessConfig | None = None) -> str:
+        """Önbellek anahtarına giren motor + önişleme imzası."""
+        cfg = preprocess or self.preprocess_config
+        return f"{self.name}|{','.join(self.languages)}|{cfg.signature()}"
+
+    def load(self, image: ImageSource,
+             preprocess: PreprocessConfig | None = None) -> tuple[np.ndarray, Optional[Orientation]]:
+        """
+        Kaynağı önişleme ayarına uygun (gri, küçültülmüş, dik) decode eder.
+        Uygulanan yön düzeltmesini de döner (`orient` kapalıysa None).
+        """
+        pre = Preprocessor(preprocess or self.preprocess_config)
+        img = load_image(image, pre)
+        orientation = None
+        if pre.config.orient:
+            img, orientation = pre.orient(img)
+        return img, orientation
+
+    def read_text(self, image: ImageSource, preprocess: PreprocessConfig | None = None) -> OcrResult:
+        """Görsel dosyasından, bayt tamponundan veya numpy dizisinden metin çıkarır."""
+        timings: dict[str, float] = {}
         try:
-            logger.info(f"Görsel okunuyor: {image_path}")
-            
-            # Dosya varlığını kontrol etmeye calışıyoruz burda
-            if not os.path.exists(image_path):
-                raise FileNotFoundError(f"Dosya bulunamadı: {image_path}")
-            
-           
-            with open(image_path, 'rb') as f:
-                img_bytes = f.read()
-            
-            if not img_bytes:
-                raise ValueError(f"Dosya boş: {image_path}")
-            
-           
-            img_array = np.frombuffer(img_bytes, dtype=np.uint8)
-            img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+            logger.debug("Görsel okunuyor: %s", describe_source(image))
+            pre = Preprocessor(preprocess or self.preprocess_config)
+            img = load_image(image, pre, timings)
             
-            if img is None:
-                raise ValueError(f"Görsel decode edilemedi: {image_path}")
-            
-            logger.info(f"Görsel boyutu: {img.shape}")
-            
-            # Basit önişleme: gri + bilateral filtre
-            try:
-                gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-                gray = cv2.bilateralFilter(gray, 9, 75, 75)
-            except Exception as e:
-                logger.warning(f"Görsel önişleme hatası, orijinal kullanılıyor: {e}")
-                gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            logger.debug("Görsel boyutu: %s", img.shape)
+            gray = pre.run(img, timings)
+            # Görsel bir kez döndürülür; şablon alanları orient=False ile zaten dik gelir
+            orientation = None
+            if pre.config.orient:
+                gray, orientation = pre.orient(gray, timings)
             
             # OCR işlemi
-            logger.info("EasyOCR çalıştırılıyor...")
+            logger.debug("OCR çalıştırılıyor (%s)...", self.name)
             try:
-                lines = self.reader.readtext(gray, detail=1, paragraph=False)
+                lines = self._recognize(gray, timings)
             except Exception as e:
-                logger.error(f"EasyOCR readtext hatası: {e}", exc_info=True)
+                logger.error("OCR tanıma hatası (%s): %s", self.name, e, exc_info=True)
+                ERRORS_TOTAL.inc(stage="recognize")
                 # Boş sonuç dön
                 return OcrResult(text="", confidence=0.0)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Aşama süreleri: %s", ", ".join(f"{k}={v * 1000:.1f}ms" for k, v in timings.items()))
             
-            texts, confs = [], []
-            for item in lines:
-                if len(item) >= 3:  
-                    bbox, t, c = item[0], item[1], item[2]
-                    texts.append(str(t))
-                    confs.append(float(c))
-                    logger.debug(f"OCR satırı: {t} (güven: {c:.2f})")
-            
-            full_text = "\n".join(texts)
-            conf = float(np.mean(confs)) if confs else 0.0
-            
-            logger.info(f"OCR tamamlandı - {len(texts)} satır, ortalama güven: {conf:.2f}")
-            if full_text:
-                logger.debug(f"Çıkarılan metin (ilk 200 karakter):\n{full_text[:200]}")
-            else:
-                logger.warning("OCR hiç metin çıkaramadı!")
-            
-            return OcrResult(text=full_text, confidence=conf)
+            result = self._to_result(lines, timings)
+            if orientation is not None and orientation.changed:
+                result = replace(result, rotation=orientation.rotation, skew=orientation.skew)
+            return result
             
         except Exception as e:
-            logger.error(f"OCR hatası ({image_path}): {e}", exc_info=True)
+            logger.error("OCR hatası (%s): %s", describe_source(image), e, exc_info=True)
+            ERRORS_TOTAL.inc(stage="decode")
             return OcrResult(text="", confidence=0.0)
+        finally:
+            for stage, seconds in timings.items():
+                record_stage(stage, seconds)
+
+    @abc.abstractmethod
+    def _recognize(self, gray: np.ndarray, timings: dict | None = None) -> list:
+        """Gri görselde tanıma; [(dörtgen, metin, güven 0-1), ...] döner."""
+
+    @staticmethod
+    def _to_result(lines: list, timings: dict | None = None) -> OcrResult:
+        lines = [item for item in lines if len(item) >= 3]
+        texts = tuple(str(item[1]) for item in lines)
+        conf_values = [float(item[2]) for item in lines]
+        confs = np.asarray(conf_values, dtype=np.float32)
+        if lines:
+            # Dörtgenlerden eksen hizalı kutular
+            quads = np.asarray([item[0] for item in lines], dtype=np.float32).reshape(len(lines), -1, 2)
+            boxes = np.concatenate([quads.min(axis=1), quads.max(axis=1)], axis=1)
+        else:
+            boxes = _empty_boxes()
+        if logger.isEnabledFor(logging.DEBUG):
+            for t, c in zip(texts, confs):
+                logger.debug("OCR satırı: %s (güven: %.2f)", pii_text(t), c)
+        
+        full_text = "\n".join(texts)
+        conf = float(np.mean(conf_values)) if conf_values else 0.0
+        
+        logger.debug("OCR tamamlandı - %s satır, ortalama güven: %.2f", len(texts), conf)
+        if full_text:
+            logger.debug("Çıkarılan metin: %s", pii_text(full_text))
+        else:
+            logger.warning("OCR hiç metin çıkaramadı!")
+        
+        return OcrResult(text=full_text, confidence=conf, timings=timings or {},
+                         boxes=boxes, texts=texts, confs=confs)
+
+
+class EasyOCREngine(BaseOCREngine):
+    """EasyOCR (CRAFT tespit + CRNN tanıma): en doğru ama en pahalı motor."""
+    name = "easyocr"
+
+    def __init__(self, languages: Iterable[str] = ("tr","en"), preprocess: PreprocessConfig | None = None,
+                 model_dir: str | None = None, download: bool = True):
+        super().__init__(languages, preprocess)
+        logger.info("EasyOCR başlatılıyor - Diller: %s", languages)
+        try:
+            # easyocr (ve torch) yalnızca motor kurulurken yüklenir; modül içe aktarımı hafif kalır
+            import easyocr
+            configure_torch()
+            kwargs = {"download_enabled": download}
+            if model_dir:
+                kwargs["model_storage_directory"] = model_dir
+            self.reader = easyocr.Reader(list(self.languages), gpu=False, verbose=False, **kwargs)
+            logger.info("EasyOCR başarıyla yüklendi")
+        except Exception as e:
+            logger.error("EasyOCR başlatma hatası: %s", e, exc_info=True)
+            raise
+
+    def _recognize(self, gray: np.ndarray, timings: dict | None = None) -> list:
+        """readtext ile aynı akış; tespit ve tanıma süreleri ayrı ölçülür."""
+        timings = timings if timings is not None else {}
+        started = time.perf_counter()
+        horizontal_list, free_list = self.reader.detect(gray)
+        timings["detect"] = time.perf_counter() - started
+        started = time.perf_counter()
+        lines = self.reader.recognize(gray, horizontal_list[0], free_list[0], detail=1, paragraph=False)
+        timings["recognize"] = time.perf_counter() - started
+        return lines
+
+
+@dataclass
+class _BatchJob:
+    gray: np.ndarray
+    future: Future
+    enqueued_at: float
+
+
+class MicroBatchScheduler:
+    """
+    Eşzamanlı isteklerden gelen görselleri en fazla `max_wait_ms` boyunca veya
+    `max_batch` adede kadar toplayıp tek bir batched EasyOCR çağrısında işler.
+    Her okuyucu (Reader) kendi işçi thread'inde çalışır; sonuçlar çağırana döner.
+    """
+    def __init__(self, engines: list[EasyOCREngine], max_batch: int = 4,
+                 max_wait_ms: float = 5.0, max_pad_ratio: float = 1.5,
+                 budget: CpuBudget | None = None):
+        if not engines:
+            raise ValueError("En az bir OCR motoru gerekli")
+        self.engines = engines
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.max_pad_ratio = max_pad_ratio
+        self.budget = budget
+        self._queue: queue.Queue[_BatchJob | None] = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._size_hist: dict[int, int] = {}
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+        self._total_queue_wait = 0.0
+        self._threads = [
+            threading.Thread(target=self._worker, args=(e, i), name=f"ocr-batch-{i}", daemon=True)
+            for i, e in enumerate(engines)
+        ]
+        for t in self._threads:
+            t.start()
+        logger.info("Mikro-batch zamanlayıcı başlatıldı - Okuyucu: %s, Maks batch: %s, Maks bekleme: %s ms",
+                    len(engines), max_batch, max_wait_ms)
+
+    def submit(self, gray: np.ndarray) -> Future:
+        fut: Future = Future()
+        self._queue.put(_BatchJob(gray=gray, future=fut, enqueued_at=time.perf_counter()))
+        return fut
+
+    def _collect(self) -> list[_BatchJob] | None:
+        first = self._queue.get()
+        if first is None:
+            return None
+        jobs = [first]
+        deadline = time.perf_counter() + self.max_wait_s
+        while len(jobs) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is None:
+                self._queue.put(None)
+                break
+            jobs.append(job)
+        return jobs
+
+    def _group(self, jobs: list[_BatchJob]) -> list[list[_BatchJob]]:
+        """Doldurma (padding) israfı sınırı aşmayacak şekilde boyutça yakın işleri gruplar."""
+        jobs = sorted(jobs, key=lambda j: j.gray.shape[0] * j.gray.shape[1], reverse=True)
+        groups: list[list[_BatchJob]] = []
+        for job in jobs:
+            h, w = job.gray.shape[:2]
+            for g in groups:
+                gh = max(h, max(j.gray.shape[0] for j in g))
+                gw = max(w, max(j.gray.shape[1] for j in g))
+                real = h * w + sum(j.gray.shape[0] * j.gray.shape[1] for j in g)
+                if gh * gw * (len(g) + 1) <= self.max_pad_ratio * real:
+                    g.append(job)
+                    break
+            else:
+                groups.append([job])
+        return groups
+
+    def _run_group(self, engine: EasyOCREngine, group: list[_BatchJob]) -> None:
+        if len(group) == 1:
+            results = [engine._recognize(group[0].gray)]
+        else:
+            # Batched tespit aynı boyut ister: sağ/alt kenar beyazla doldurulur,
+            # kutu koordinatları orijinal görselde geçerli kalır
+            h = max(j.gray.shape[0] for j in group)
+            w = max(j.gray.shape[1] for j in group)
+            padded = [
+                cv2.copyMakeBorder(j.gray, 0, h - j.gray.shape[0], 0, w - j.gray.shape[1],
+                                   cv2.BORDER_CONSTANT, value=255)
+                for j in group
+            ]
+            results = engine.reader.readtext_batched(
+                padded, detail=1, paragraph=False, batch_size=len(group)
+            )
+        for job, lines in zip(group, results):
+            job.future.set_result(lines)
+
+    def _worker(self, engine: EasyOCREngine, slot: int) -> None:
+        # Her okuyucu bir CPU slotudur
+        enter_thread_slot(self.budget, slot)
+        while True:
+            jobs = self._collect()
+            if jobs is None:
+                return
+            started = time.perf_counter()
+            for group in self._group(jobs):
+                try:
+                    self._run_group(engine, group)
+                except Exception as e:
+                    logger.error("Batch OCR hatası (%s görsel): %s", len(group), e, exc_info=True)
+                    for job in group:
+                        if not job.future.done():
+                            job.future.set_exception(e)
+            latency = time.perf_counter() - started
+            with self._lock:
+                self._batches += 1
+                self._items += len(jobs)
+                self._size_hist[len(jobs)] = self._size_hist.get(len(jobs), 0) + 1
+                self._total_latency += latency
+                self._max_latency = max(self._max_latency, latency)
+                self._total_queue_wait += sum(started - j.enqueued_at for j in jobs)
+            logger.debug("Batch tamamlandı - %s görsel, %.1f ms", len(jobs), latency * 1000)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "readers": len(self.engines),
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait_s * 1000.0,
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 3) if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._size_hist.items())),
+                "avg_batch_latency_s": round(self._total_latency / self._batches, 6) if self._batches else 0.0,
+                "max_batch_latency_s": round(self._max_latency, 6),
+                "avg_queue_wait_s": round(self._total_queue_wait / self._items, 6) if self._items else 0.0,
+                "queued": self._queue.qsize(),
+            }
+
+    def shutdown(self) -> None:
+        for _ in self._threads:
+            self._queue.put(None)
+
+
+class BatchedOCREngine(EasyOCREngine):
+    """
+    EasyOCREngine arayüzü; önişleme çağıranın thread'inde yapılır, tanıma
+    paylaşılan MicroBatchScheduler üzerinden diğer isteklerle birlikte çalışır.
+    """
+    def __init__(self, scheduler: MicroBatchScheduler):
+        self.scheduler = scheduler
+        self.languages = scheduler.engines[0].languages
+        self.preprocess_config = scheduler.engines[0].preprocess_config
+
+    def _recognize(self, gray: np.ndarray, timings: dict | None = None) -> list:
+        started = time.perf_counter()
+        lines = self.scheduler.submit(gray).result()
+        if timings is not None:
+            # Tespit + tanıma birlikte, batch bekleme süresi dahil
+            timings["recognize_batched"] = time.perf_counter() - started
+        return lines
+
 
 class DocumentExtractor:
     """Belgeden isim ve TCKN çıkarır."""
-    def __init__(self, engine: EasyOCREngine):
+    def __init__(self, engine: OcrEngine, cache: OcrCache | None = None,
+                 profiles: dict[str, PreprocessConfig] | None = None):
         self.engine = engine
+        self.cache = cache
+        # Belge türüne özel önişleme ayarları; yoksa motorun varsayılanı
+        self.profiles = profiles or {}
+
+    def _read(self, image: ImageSource, preprocess: PreprocessConfig | None = None) -> OcrResult:
+        """OCR sonucunu önce önbellekte arar; yoksa motoru çalıştırır."""
+        if self.cache is None:
+            return self.engine.read_text(image, preprocess)
+
+        key = make_cache_key(image, self.engine.cache_namespace(preprocess))
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.info("OCR sonucu önbellekten alındı")
+            return OcrResult.from_dict(cached)
+
+        res = self.engine.read_text(image, preprocess)
+        # Boş/başarısız sonuçlar önbelleğe yazılmaz, tekrar denenebilir
+        if res.text:
+            self.cache.put(key, res.as_dict())
+        return res
+
+    def _read_fields(self, image: ImageSource, template: DocumentTemplate,
+                     preprocess: PreprocessConfig | None = None) -> Optional[dict[str, OcrResult]]:
+        """Görseli şablona hizalar ve yalnızca alan bölgelerini tanır; hizalanamazsa None."""
+        key = None
+        if self.cache is not None:
+            key = make_cache_key(image, f"{self.engine.cache_namespace(preprocess)}|tpl={template.name}")
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.info("Şablon alanları önbellekten alındı")
+                if not cached["aligned"]:
+                    return None
+                return {n: OcrResult.from_dict(d) for n, d in cached["fields"].items()}
+
+        with span("template_align"):
+            page, orientation = self.engine.load(image, preprocess)
+            aligned = align(page, template)
+        if aligned is None:
+            logger.info("Görsel '%s' şablonuna hizalanamadı", template.name)
+            if key is not None:
+                self.cache.put(key, {"aligned": False})
+            return None
+
+        # Yön sayfada bir kez düzeltildi; kırpılmış alanlar yeniden döndürülmez
+        crop_cfg = replace(preprocess or self.engine.preprocess_config, orient=False)
+        fields = {n: self.engine.read_text(crop, crop_cfg) for n, crop in crop_fields(aligned, template).items()}
+        if orientation is not None and orientation.changed:
+            fields = {n: replace(r, rotation=orientation.rotation, skew=orientation.skew) for n, r in fields.items()}
+        if key is not None and any(r.text for r in fields.values()):
+            self.cache.put(key, {"aligned": True, "fields": {n: r.as_dict() for n, r in fields.items()}})
+        return fields
+
+    def _extract_with_template(self, image: ImageSource, template: DocumentTemplate,
+                               preprocess: PreprocessConfig | None = None) -> Optional[Extraction]:
+        fields = self._read_fields(image, template, preprocess)
+        if not fields:
+            return None
+
+        with span("text_parse"):
+            values = {n: strip_field_label(normalize_text(r.text)) for n, r in fields.items()}
+            if "full_name" in values:
+                name = clean_person_name(values["full_name"])
+            else:
+                name = clean_person_name(f"{values.get('name', '')} {values.get('surname', '')}")
+            tckn, tckn_conf = None, None
+            if "tckn" in fields:
+                tckn_text = normalize_text(fields["tckn"].text)
+                recovered = recover_tckn(tckn_text, fields["tckn"].confidence)
+                tckn, tckn_conf = recovered if recovered else (extract_tckn(tckn_text), fields["tckn"].confidence)
+        logger.info("Şablon sonucu (%s) - Ad: %s, TCKN: %s", template.name, pii_name(name), pii_tckn(tckn))
+
+        if not name or not tckn:
+            return None
+        conf = float(np.mean([r.confidence for r in fields.values()]))
+        field_confidence = {n: round(r.confidence, 4) for n, r in fields.items()}
+        field_confidence["tckn"] = round(tckn_conf, 4)
+        return Extraction(name, tckn, conf, field_confidence)
 
-    def extract(self, image_path: str) -> Tuple[Optional[str], Optional[str], float]:
+    def extract(self, image: ImageSource, doc_type: str | None = None) -> Extraction:
         """
         Belgeden isim ve TCKN çıkarır.
-        Returns: (name, tckn, confidence)
-        Her zaman 3 değer döner (None, None, 0.0 bile olsa)
+        doc_type kayıtlı bir şablonsa önce yalnızca alan bölgeleri okunur;
+        hizalama veya alan okuma başarısız olursa tam sayfa OCR'a düşülür.
+        Returns: Extraction(name, tckn, confidence, field_confidence, engine)
+        İlk üç alan her zaman dolu döner (None, None, 0.0 bile olsa)
         """
+        label = doc_type or "document"
+        started = time.perf_counter()
+        with span_scope(label):
+            result = self._extract(image, doc_type)._replace(engine=self.engine.name)
+        OCR_SECONDS.observe(time.perf_counter() - started, doc_type=label)
+        OCR_CONFIDENCE.observe(result.confidence, doc_type=label)
+        return result
+
+    def _extract(self, image: ImageSource, doc_type: str | None) -> Extraction:
         try:
-            logger.info(f"Belge işleniyor: {image_path}")
+            logger.info("Belge işleniyor: %s", describe_source(image))
+            if isinstance(image, str):
+                # Dosya bir kez okunur; önbellek anahtarı ve decode aynı tamponu kullanır
+                if not os.path.exists(image):
+                    raise FileNotFoundError(f"Dosya bulunamadı: {image}")
+                with open(image, 'rb') as f:
+                    image = f.read()
+
+            preprocess = self.profiles.get(doc_type) if doc_type else None
+            template = get_template(doc_type)
+            if template is not None:
+                result = self._extract_with_template(image, template, preprocess)
+                if result is not None:
+                    return result
+                logger.info("Şablon sonucu eksik, tam sayfa OCR'a dönülüyor")
             
             # OCR çalıştır
-            res = self.engine.read_text(image_path)
+            res = self._read(image, preprocess)
             
             if not res.text:
                 logger.warning("OCR boş metin döndü")
-                return None, None, 0.0
-            
-            # Metni normalize etmek içn
-            t = normalize_text(res.text)
-            logger.debug(f"Normalize edilmiş metin (ilk 200 karakter):\n{t[:200]}")
-            
-          
-            name_blk = extract_name_block(t)
-            logger.info(f"İsim bloğu: {name_blk}")
+                return Extraction(None, None, 0.0)
             
-   
-            name = clean_person_name(name_blk)
-            logger.info(f"Temizlenmiş isim: {name}")
-            
-  
-            tckn = extract_tckn(t)
-            logger.info(f"TCKN: {tckn}")
+            with span("text_parse"):
+                # Etiketler kutu geometrisiyle sağdaki/alttaki değere bağlanır (tek geçiş)
+                fields = extract_fields(*res.layout())
+                name_field = person_name(fields)
+                name = name_field.value if name_field else None
+                logger.info("İsim: %s", pii_name(name))
+
+                tckn = fields["tckn"].value if "tckn" in fields else None
+                logger.info("TCKN: %s", pii_tckn(tckn))
 
-            return name, tckn, res.confidence
+            field_confidence = {k: round(v.confidence, 4) for k, v in fields.items()}
+            return Extraction(name, tckn, res.confidence, field_confidence)
             
         except Exception as e:
-            logger.error(f"Belge çıkarma hatası ({image_path}): {e}", exc_info=True)
+            logger.error("Belge çıkarma hatası (%s): %s", describe_source(image), e, exc_info=True)
+
+            return Extraction(None, None, 0.0)
+
+
+def escalation_reason(res: Extraction, min_confidence: float) -> Optional[str]:
+    """Hızlı motor sonucunun pahalı motorda tekrarlanma sebebi; sonuç yeterliyse None."""
+    if not res.name:
+        return "name_missing"
+    if not res.tckn:
+        return "tckn_missing"
+    if not is_valid_tckn(res.tckn):
+        return "tckn_checksum"
+    field_conf = res.field_confidence or {}
+    lowest = min(field_conf.values()) if field_conf else res.confidence
+    if lowest < min_confidence:
+        return "low_confidence"
+    return None
+
 
-            return None, None, 0.0
+def cascade_extract(fast: Callable[[ImageSource, Optional[str]], Extraction],
+                    accurate: Callable[[ImageSource, Optional[str]], Extraction],
+                    image: ImageSource, doc_type: str | None, min_confidence: float) -> Extraction:
+    """
+    Önce hızlı motor çalışır; alan güveni `min_confidence` altındaysa, isim/TCKN
+    eksikse veya TCKN sağlama toplamı tutmuyorsa belge doğru (pahalı) motora yükseltilir.
+    """
+    label = doc_type or "document"
+    res = fast(image, doc_type)
+    reason = escalation_reason(res, min_confidence)
+    if reason is None:
+        CASCADE_TOTAL.inc(doc_type=label, outcome="accepted")
+        return res
+    logger.info("Hızlı OCR sonucu yetersiz (%s), doğru motora geçiliyor", reason)
+    CASCADE_TOTAL.inc(doc_type=label, outcome=reason)
+    return accurate(image, doc_type)
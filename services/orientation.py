@@ -0,0 +1,156 @@
+"""
+Hızlı yön (0/90/180/270) ve eğim tahmini: görsel OCR'dan önce bir kez düzeltilir,
+EasyOCR'ın `rotation_info` ile her açıda yeniden tanıma yapmasına gerek kalmaz.
+
+Metin satırı izdüşümü kullanılır (küçültülmüş ikili görselde, ~milisaniyeler):
+
+1. Yatay satırlar satır toplamlarında keskin tepe/çukur üretir; görsel ve 90° döndürülmüşü
+   eğim taramasıyla puanlanır, satırların yatay olduğu aile seçilir (0/180 veya 90/270).
+2. Belgelerde satırlar sola hizalıdır: satır başları hizalı, sonları dağınıktır.
+   Baş yerine sonlar hizalıysa görsel ters (180°) kabul edilir.
+
+Karar net değilse döndürme yapılmaz (yanlış döndürme, düzeltmemekten pahalıdır).
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+import logging
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_ANALYSIS_SIDE = 600
+# İzdüşüm için en fazla mürekkep pikseli (eşit aralıklı örneklenir)
+_MAX_POINTS = 10_000
+_MIN_POINTS = 200
+_SKEW_GAIN = 1.05
+# Nokta başına izdüşüm puanı: hizalı metin ~5-20, rastgele gürültü (ayrıklaştırma) < 2.5
+_MIN_STRUCTURE = 3.0
+# 90° ailesinin seçilmesi için puan oranı; 180° için hizalı kenar sayısı oranı
+_FAMILY_MARGIN = 1.5
+_FLIP_MARGIN = 2.0
+_MIN_ALIGNED = 3
+
+
+@dataclass(frozen=True)
+class Orientation:
+    rotation: int = 0  # saat yönünde uygulanan döndürme (0, 90, 180, 270)
+    skew: float = 0.0  # döndürmeden sonra düzeltilen eğim (derece, cv2.getRotationMatrix2D açısı)
+
+    @property
+    def changed(self) -> bool:
+        return self.rotation != 0 or self.skew != 0.0
+
+
+_ROTATE = {90: cv2.ROTATE_90_CLOCKWISE, 180: cv2.ROTATE_180, 270: cv2.ROTATE_90_COUNTERCLOCKWISE}
+
+
+def _binarize(gray: np.ndarray) -> np.ndarray:
+    h, w = gray.shape[:2]
+    scale = _ANALYSIS_SIDE / float(max(h, w))
+    if scale < 1.0:
+        gray = cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    # Black-hat yalnızca ince koyu çizgileri (harfleri) öne çıkarır; fotoğraflardaki koyu
+    # arka plan ve büyük koyu bloklar mürekkep sayılmaz
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 15))
+    strokes = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, kernel)
+    # Metin 1, zemin 0
+    _, binary = cv2.threshold(strokes, 0, 1, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    return binary
+
+
+def _profile_score(xs: np.ndarray, ys: np.ndarray, angle: float) -> float:
+    """
+    Mürekkep piksellerinin `angle` kadar döndürülmüş satır izdüşümü; ardışık farkların
+    karesi satırlar yatayken en yüksektir. Görsel döndürülmez, yalnızca koordinatlar.
+    """
+    a = np.deg2rad(angle)
+    rows = np.rint(ys * np.cos(a) - xs * np.sin(a)).astype(np.int64)
+    profile = np.bincount(rows - rows.min()).astype(np.float64)
+    return float(np.square(np.diff(profile)).sum())
+
+
+def _best_skew(xs: np.ndarray, ys: np.ndarray, max_skew: float) -> tuple[float, float]:
+    """Kaba (1°) sonra ince (0.2°) tarama; (açı, puan) döner."""
+    def search(angles) -> tuple[float, float]:
+        score, angle = max((_profile_score(xs, ys, a), a) for a in angles)
+        return float(angle), score
+
+    base = _profile_score(xs, ys, 0.0)
+    if max_skew <= 0:
+        return 0.0, base
+    angle, _ = search(np.arange(-max_skew, max_skew + 0.5, 1.0))
+    angle, score = search(np.arange(angle - 0.8, angle + 0.81, 0.2))
+    # Belirgin kazanç yoksa (gürültü, boş sayfa) eğim düzeltilmez
+    return (angle, score) if score >= _SKEW_GAIN * base else (0.0, base)
+
+
+def _aligned(edges: np.ndarray, tol: float) -> int:
+    """Aynı hizadaki en kalabalık kenar grubu: genişliği `tol` olan pencereye düşen en çok satır."""
+    edges = np.sort(edges)
+    return int((np.searchsorted(edges, edges + tol, side="right") - np.arange(len(edges))).max())
+
+
+def _is_flipped(binary: np.ndarray) -> bool:
+    """Satır sonları başlarından belirgin şekilde daha çok hizalıysa görsel terstir."""
+    w = binary.shape[1]
+    # Harfleri satır halinde birleştir
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, w // 40), 1))
+    lines = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+    n, _, stats, _ = cv2.connectedComponentsWithStats(lines, connectivity=8)
+    stats = stats[1:n]
+    stats = stats[(stats[:, cv2.CC_STAT_WIDTH] >= w * 0.05) & (stats[:, cv2.CC_STAT_HEIGHT] >= 3)]
+    if len(stats) < _MIN_ALIGNED:
+        return False
+    # Fotoğraf, logo gibi bloklar satır değildir
+    heights = stats[:, cv2.CC_STAT_HEIGHT]
+    stats = stats[heights <= 2.5 * np.median(heights)]
+    left = stats[:, cv2.CC_STAT_LEFT].astype(np.float64)
+    right = left + stats[:, cv2.CC_STAT_WIDTH]
+    tol = max(2.0, w * 0.005)
+    n_left, n_right = _aligned(left, tol), _aligned(right, tol)
+    return n_right >= _MIN_ALIGNED and n_right >= _FLIP_MARGIN * max(1, n_left)
+
+
+def estimate(gray: np.ndarray, max_skew: float = 15.0) -> Orientation:
+    """Gri görselin yönünü ve eğimini tahmin eder (görseli değiştirmez)."""
+    binary = _binarize(gray)
+    ys, xs = np.nonzero(binary)
+    if len(xs) < _MIN_POINTS:
+        return Orientation()
+    step = max(1, len(xs) // _MAX_POINTS)
+    xs, ys = xs[::step].astype(np.float64), ys[::step].astype(np.float64)
+
+    skew, score = _best_skew(xs, ys, max_skew)
+    # 90° saat yönünde: (x, y) -> (h - 1 - y, x)
+    skew_v, score_v = _best_skew(binary.shape[0] - 1 - ys, xs, max_skew)
+
+    # Satır yapısı yoksa (gürültü, fotoğraf, tek kelime) karar verilmez
+    if max(score, score_v) < _MIN_STRUCTURE * len(xs):
+        return Orientation()
+
+    rotation = 0
+    if score_v > _FAMILY_MARGIN * score:
+        rotation, skew = 90, skew_v
+        binary = cv2.rotate(binary, cv2.ROTATE_90_CLOCKWISE)
+    if skew:
+        h, w = binary.shape
+        m = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), skew, 1.0)
+        binary = cv2.warpAffine(binary, m, (w, h), flags=cv2.INTER_NEAREST, borderValue=0)
+    if _is_flipped(binary):
+        # 180° döndürme satır açısını değiştirmez; eğim aynı kalır
+        rotation = (rotation + 180) % 360
+    return Orientation(rotation=rotation, skew=round(skew, 2))
+
+
+def apply(gray: np.ndarray, orientation: Orientation, min_skew: float = 0.3) -> np.ndarray:
+    """Döndürmeyi ve (eşikten büyükse) eğim düzeltmesini uygular; boşluklar beyazla doldurulur."""
+    if orientation.rotation:
+        gray = cv2.rotate(gray, _ROTATE[orientation.rotation])
+    if abs(orientation.skew) >= min_skew:
+        h, w = gray.shape[:2]
+        m = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), orientation.skew, 1.0)
+        gray = cv2.warpAffine(gray, m, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT,
+                              borderValue=255)
+    return gray
@@ -0,0 +1,148 @@
+from __future__ import annotations
+from dataclasses import asdict, dataclass, replace
+from typing import Literal
+import logging
+import time
+
+import cv2
+import numpy as np
+
+from services.orientation import Orientation, apply as apply_orientation, estimate as estimate_orientation
+from utils.imageinfo import image_size
+
+logger = logging.getLogger(__name__)
+
+# cv2.IMREAD_REDUCED_GRAYSCALE_* : JPEG'de DCT ölçekleme ile decode sırasında küçültür
+_REDUCED_FLAGS = ((8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+                  (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+                  (2, cv2.IMREAD_REDUCED_GRAYSCALE_2))
+
+# Immerkær hızlı gürültü tahmini çekirdeği
+_NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+_NOISE_SAMPLE = 512
+
+
+@dataclass(frozen=True)
+class PreprocessConfig:
+    """OCR öncesi önişleme ayarları; imzası önbellek anahtarına girer."""
+    max_side: int = 1600
+    reduced_decode: bool = True
+    denoise: Literal["auto", "always", "never"] = "auto"
+    noise_threshold: float = 6.0
+    contrast: Literal["none", "clahe", "stretch"] = "none"
+    # Tam sayfa görsellerde yön (90/180/270) ve eğim düzeltmesi (services.orientation)
+    orient: bool = True
+    max_skew: float = 15.0
+
+    def signature(self) -> str:
+        return "pre(" + ",".join(f"{k}={v}" for k, v in asdict(self).items()) + ")"
+
+    def with_overrides(self, overrides: dict | None) -> "PreprocessConfig":
+        return replace(self, **overrides) if overrides else self
+
+
+def estimate_noise(gray: np.ndarray) -> float:
+    """Görselin ortasından alınan örnek üzerinde gürültü standart sapması tahmini."""
+    h, w = gray.shape[:2]
+    y0 = max(0, (h - _NOISE_SAMPLE) // 2)
+    x0 = max(0, (w - _NOISE_SAMPLE) // 2)
+    sample = gray[y0:y0 + _NOISE_SAMPLE, x0:x0 + _NOISE_SAMPLE].astype(np.float32)
+    sh, sw = sample.shape
+    if sh < 3 or sw < 3:
+        return 0.0
+    conv = cv2.filter2D(sample, -1, _NOISE_KERNEL)[1:-1, 1:-1]
+    return float(np.abs(conv).sum() * np.sqrt(np.pi / 2) / (6.0 * (sw - 2) * (sh - 2)))
+
+
+class Preprocessor:
+    """
+    Ayarlanabilir önişleme hattı: küçültülmüş decode, en uzun kenar
+    normalizasyonu, gerektiğinde gürültü filtresi ve kontrast düzeltme.
+    Her aşamanın süresi `timings` sözlüğüne yazılır.
+    """
+    def __init__(self, config: PreprocessConfig | None = None):
+        self.config = config or PreprocessConfig()
+
+    def decode(self, data: bytes | bytearray | memoryview, timings: dict | None = None) -> np.ndarray:
+        """Baytları gri görsele çevirir; mümkünse decode sırasında küçültür."""
+        started = time.perf_counter()
+        flag = cv2.IMREAD_GRAYSCALE
+        if self.config.reduced_decode:
+            size = image_size(data)
+            if size is not None:
+                longest = max(size)
+                for factor, reduced in _REDUCED_FLAGS:
+                    if longest // factor >= self.config.max_side:
+                        flag = reduced
+                        break
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag)
+        if img is None:
+            raise ValueError("Görsel decode edilemedi")
+        if timings is not None:
+            timings["decode"] = time.perf_counter() - started
+        return img
+
+    def run(self, img: np.ndarray, timings: dict | None = None) -> np.ndarray:
+        cfg = self.config
+        timings = timings if timings is not None else {}
+
+        t = time.perf_counter()
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        timings["grayscale"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        h, w = gray.shape[:2]
+        if cfg.max_side and max(h, w) > cfg.max_side:
+            scale = cfg.max_side / float(max(h, w))
+            gray = cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))),
+                              interpolation=cv2.INTER_AREA)
+        timings["resize"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        if cfg.denoise == "always":
+            gray = cv2.bilateralFilter(gray, 9, 75, 75)
+        elif cfg.denoise == "auto":
+            noise = estimate_noise(gray)
+            if noise > cfg.noise_threshold:
+                logger.debug("Gürültü tahmini %.2f > %s, filtre uygulanıyor", noise, cfg.noise_threshold)
+                gray = cv2.bilateralFilter(gray, 9, 75, 75)
+        timings["denoise"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        if cfg.contrast == "clahe":
+            gray = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(gray)
+        elif cfg.contrast == "stretch":
+            gray = cv2.normalize(gray, None, 0, 255, cv2.NORM_MINMAX)
+        timings["contrast"] = time.perf_counter() - t
+
+        return gray
+
+    def orient(self, gray: np.ndarray, timings: dict | None = None) -> tuple[np.ndarray, Orientation]:
+        """Yönü ve eğimi bir kez tahmin edip düzeltir; tek tanıma geçişi için dik görsel döner."""
+        started = time.perf_counter()
+        found = estimate_orientation(gray, max_skew=self.config.max_skew)
+        if found.changed:
+            logger.info("Görsel yönü düzeltildi - Döndürme: %s°, Eğim: %s°", found.rotation, found.skew)
+            gray = apply_orientation(gray, found)
+        if timings is not None:
+            timings["orient"] = time.perf_counter() - started
+        return gray, found
+
+
+def config_from_settings(settings) -> PreprocessConfig:
+    return PreprocessConfig(
+        max_side=settings.preprocess_max_side,
+        reduced_decode=settings.preprocess_reduced_decode,
+        denoise=settings.preprocess_denoise,
+        noise_threshold=settings.preprocess_noise_threshold,
+        contrast=settings.preprocess_contrast,
+        orient=settings.preprocess_orient,
+        max_skew=settings.preprocess_max_skew,
+    )
+
+
+def profiles_from_settings(settings) -> dict[str, PreprocessConfig]:
+    """Belge türü başına varsayılan ayarın üzerine yazılan profiller."""
+    base = config_from_settings(settings)
+    return {doc_type: base.with_overrides(overrides)
+            for doc_type, overrides in settings.preprocess_profiles.items()}
@@ -0,0 +1,112 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, Generic, TypeVar
+import logging
+import queue
+import threading
+import time
+
+from services.metrics import POOL_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PoolExhaustedError(RuntimeError):
+    """Havuzda boş okuyucu yok (reject modu) veya bekleme süresi doldu."""
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    size: int
+    in_use: int
+    leases: int
+    rejected: int
+    total_wait_s: float
+    max_wait_s: float
+
+    @property
+    def avg_wait_s(self) -> float:
+        return self.total_wait_s / self.leases if self.leases else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "size": self.size,
+            "in_use": self.in_use,
+            "leases": self.leases,
+            "rejected": self.rejected,
+            "total_wait_s": round(self.total_wait_s, 6),
+            "avg_wait_s": round(self.avg_wait_s, 6),
+            "max_wait_s": round(self.max_wait_s, 6),
+        }
+
+
+class ReaderPool(Generic[T]):
+    """
+    Önceden yüklenmiş (sıcak) OCR motorlarından oluşan sınırlı havuz.
+    Her istek bir motoru kiralar, işi bitince geri bırakır; motorlar
+    (EasyOCR Reader) istekler arasında yeniden yüklenmez.
+    """
+    def __init__(self, factory: Callable[[], T], size: int = 1,
+                 timeout_s: float = 30.0, exhausted: str = "queue"):
+        if size < 1:
+            raise ValueError("Havuz boyutu en az 1 olmalı")
+        if exhausted not in ("queue", "reject"):
+            raise ValueError(f"Geçersiz havuz davranışı: {exhausted}")
+        self.size = size
+        self.timeout_s = timeout_s
+        self.exhausted = exhausted
+        self._items: queue.Queue[T] = queue.Queue(maxsize=size)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._leases = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+        logger.info("OCR havuzu oluşturuluyor - Boyut: %s, Davranış: %s", size, exhausted)
+        for i in range(size):
+            started = time.perf_counter()
+            self._items.put_nowait(factory())
+            logger.info("Havuz öğesi %s/%s hazır (%.2f sn)", i + 1, size, time.perf_counter() - started)
+
+    @contextmanager
+    def lease(self, timeout_s: float | None = None) -> Iterator[T]:
+        """Havuzdan bir motor kiralar; `with` bloğu bitince geri bırakır."""
+        started = time.perf_counter()
+        try:
+            if self.exhausted == "reject":
+                item = self._items.get_nowait()
+            else:
+                item = self._items.get(timeout=self.timeout_s if timeout_s is None else timeout_s)
+        except queue.Empty:
+            with self._lock:
+                self._rejected += 1
+            raise PoolExhaustedError("OCR havuzunda boş okuyucu yok")
+
+        waited = time.perf_counter() - started
+        POOL_WAIT_SECONDS.observe(waited)
+        with self._lock:
+            self._in_use += 1
+            self._leases += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        try:
+            yield item
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._items.put_nowait(item)
+
+    def stats(self) -> PoolStats:
+        with self._lock:
+            return PoolStats(
+                size=self.size,
+                in_use=self._in_use,
+                leases=self._leases,
+                rejected=self._rejected,
+                total_wait_s=self._total_wait,
+                max_wait_s=self._max_wait,
+            )
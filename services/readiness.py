@@ -0,0 +1,50 @@
+"""
+Açılış durumu: uygulama modeller yüklenmeden istek kabul etmeye başlar.
+
+/healthz süreç ayaktaysa 200 döner; /readyz ancak OCR okuyucuları yüklenip
+ısınma çıkarımı yapıldıktan sonra 200 döner (yük dengeleyici trafiği buna göre açar).
+"""
+from __future__ import annotations
+import asyncio
+import time
+
+STARTING, READY, FAILED = "starting", "ready", "failed"
+
+
+class Readiness:
+    def __init__(self):
+        self.state = STARTING
+        self.error: str | None = None
+        self.started_at = time.time()
+        self.ready_at: float | None = None
+        self._event = asyncio.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    def mark_ready(self) -> None:
+        self.state = READY
+        self.ready_at = time.time()
+        self._event.set()
+
+    def mark_failed(self, error: BaseException) -> None:
+        self.state = FAILED
+        self.error = str(error) or type(error).__name__
+        self._event.set()
+
+    async def wait(self, timeout_s: float | None = None) -> bool:
+        """Hazır olana (veya başarısız olana) kadar bekler; hazırsa True."""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout=timeout_s)
+        except asyncio.TimeoutError:
+            pass
+        return self.ready
+
+    def as_dict(self) -> dict:
+        d = {"status": self.state}
+        if self.ready_at is not None:
+            d["startup_s"] = round(self.ready_at - self.started_at, 3)
+        if self.error:
+            d["error"] = self.error
+        return d
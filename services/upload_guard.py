@@ -0,0 +1,179 @@
+"""
+Yükleme koruması: hatalı girdiler decode ve OCR'a ulaşmadan reddedilir.
+
+1. BodyLimitMiddleware: Content-Length sınırı aşıyorsa gövde okunmadan, akış
+   sırasında aşılırsa o anda 413 döner (multipart gövde diske tamamen yazılmaz).
+   Toplu doğrulama gibi uç noktalar yol önekine göre kendi sınırını alır.
+2. read_limited: dosyayı parça parça okur; ilk parçada sihirli baytları kontrol eder.
+   spool_limited aynı sınırla büyük yüklemeleri (arşiv, manifest) dosyaya kopyalar.
+3. inspect_image: başlıktan boyut/sayfa okur; aşırı çözünürlük ve sıkıştırma
+   bombalarını reddeder, çok sayfalı TIFF'te ilgili sayfayı seçer.
+"""
+from __future__ import annotations
+from typing import IO, AsyncIterator
+import json
+import logging
+
+import cv2
+import numpy as np
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from utils.imageinfo import TIFF, ImageInfo, image_info, sniff_format
+
+logger = logging.getLogger(__name__)
+
+_CHUNK = 64 * 1024
+# Multipart sınırları, başlıklar ve form alanları için pay
+MULTIPART_OVERHEAD = 1024 * 1024
+
+
+class UploadRejectedError(ValueError):
+    """Yükleme kabul edilmedi; `status_code` HTTP yanıt kodudur (400/413/415)."""
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class BodyLimitMiddleware:
+    """
+    İstek gövdesini akarken sayar; sınır aşılınca işlemeyi keser (413).
+    `limits`: yol öneki -> bayt; eşleşmeyen yollar `max_bytes` sınırını kullanır.
+    """
+    def __init__(self, app, max_bytes: int, limits: dict[str, int] | None = None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.limits = limits or {}
+
+    def _limit(self, path: str) -> int:
+        for prefix, limit in self.limits.items():
+            if path.startswith(prefix):
+                return limit
+        return self.max_bytes
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = self._limit(scope["path"]) if scope["type"] == "http" else 0
+        if not max_bytes:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", ()):
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    break
+                if declared > max_bytes:
+                    # Gövde hiç okunmadan reddedilir
+                    await self._reject(send, max_bytes)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # FastAPI gövde ayrıştırırken HTTPException'ı olduğu gibi yükseltir
+                    raise StarletteHTTPException(status_code=413, detail=self._detail(max_bytes))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    def _detail(max_bytes: int) -> str:
+        return f"İstek gövdesi {max_bytes // (1024 * 1024)}MB sınırını aşıyor."
+
+    async def _reject(self, send, max_bytes: int) -> None:
+        body = json.dumps({"detail": self._detail(max_bytes)}, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                        (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def _too_large(name: str, max_bytes: int) -> UploadRejectedError:
+    return UploadRejectedError(413, f"{name}: dosya boyutu {max_bytes // (1024 * 1024)}MB üstünde.")
+
+
+async def _chunks(upload, max_bytes: int) -> AsyncIterator[bytes]:
+    """UploadFile parçaları; toplam `max_bytes`ı aşınca veya dosya boşsa UploadRejectedError."""
+    name = upload.filename or "dosya"
+    if upload.size is not None and upload.size > max_bytes:
+        raise _too_large(name, max_bytes)
+    total = 0
+    while chunk := await upload.read(_CHUNK):
+        total += len(chunk)
+        if total > max_bytes:
+            raise _too_large(name, max_bytes)
+        yield chunk
+    if not total:
+        raise UploadRejectedError(400, f"{name}: boş dosya yüklendi.")
+
+
+async def read_limited(upload, max_bytes: int) -> bytes:
+    """
+    UploadFile'ı parça parça okur; sınır aşılınca veya ilk parça bilinen bir
+    görsel formatı değilse okumayı bırakıp UploadRejectedError fırlatır.
+    """
+    buf = bytearray()
+    async for chunk in _chunks(upload, max_bytes):
+        if not buf and sniff_format(chunk) is None:
+            name = upload.filename or "dosya"
+            raise UploadRejectedError(415, f"{name}: desteklenmeyen veya bozuk görsel (jpg, png, bmp, tiff).")
+        buf += chunk
+    return bytes(buf)
+
+
+async def spool_limited(upload, fileobj: IO[bytes], max_bytes: int) -> None:
+    """UploadFile'ı `fileobj`a kopyalar (başa sarılmış bırakır); sınır aşılınca UploadRejectedError."""
+    async for chunk in _chunks(upload, max_bytes):
+        fileobj.write(chunk)
+    fileobj.seek(0)
+
+
+def _select_tiff_page(data: bytes, info: ImageInfo, policy: str) -> tuple[bytes, int]:
+    """Seçilen sayfayı tek sayfalık PNG'ye çevirir; ilk sayfa seçildiyse veri olduğu gibi kalır."""
+    if policy == "largest":
+        page = max(range(len(info.pages)), key=lambda i: info.pages[i][0] * info.pages[i][1])
+    else:
+        page = 0
+    if page == 0:
+        return data, 0
+    ok, mats = cv2.imdecodemulti(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED,
+                                 range=(page, page + 1))
+    if not ok or not mats:
+        raise UploadRejectedError(400, f"TIFF sayfası {page + 1} okunamadı.")
+    ok, encoded = cv2.imencode(".png", mats[0])
+    if not ok:
+        raise UploadRejectedError(400, f"TIFF sayfası {page + 1} dönüştürülemedi.")
+    return encoded.tobytes(), page
+
+
+def inspect_image(data: bytes, max_pixels: int, max_side: int, max_pages: int = 16,
+                  tiff_page: str = "largest") -> tuple[bytes, ImageInfo]:
+    """
+    Başlıktan boyutları doğrular ve OCR'a gidecek baytları döner.
+    Çok sayfalı TIFF'te `tiff_page` ("largest" | "first") sayfası seçilir.
+    """
+    info = image_info(data)
+    if info is None or info.width <= 0 or info.height <= 0:
+        raise UploadRejectedError(400, "Görsel başlığı okunamadı (bozuk dosya).")
+    if info.format == TIFF and len(info.pages) > max_pages:
+        raise UploadRejectedError(413, f"TIFF en fazla {max_pages} sayfa olabilir.")
+    for w, h in info.pages:
+        # Küçük dosyada dev çözünürlük: sıkıştırma bombası
+        if max(w, h) > max_side or w * h > max_pixels:
+            raise UploadRejectedError(
+                413, f"Görsel çözünürlüğü çok yüksek ({w}x{h}); en fazla {max_side} px kenar, "
+                     f"{max_pixels // 1_000_000} MP.")
+    if info.format == TIFF and len(info.pages) > 1:
+        data, page = _select_tiff_page(data, info, tiff_page)
+        logger.info("Çok sayfalı TIFF (%s sayfa): sayfa %s kullanılıyor", len(info.pages), page + 1)
+    return data, info
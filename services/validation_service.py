@@ -0,0 +1,201 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, AsyncIterator, Union
+import asyncio
+import logging
+import time
+
+from config.settings import settings
+from core.models import ExtractedDocument, MatchScores, QualityError, ValidateResponse
+from services.match_service import Matcher
+from services.metrics import SHORT_CIRCUIT_TOTAL
+from services.ocr_service import escalation_reason
+from utils.logs import pii_name, pii_tckn
+from utils.tckn import is_valid_tckn
+
+if TYPE_CHECKING:
+    from services.ocr_executor import OcrExecutor
+    from services.ocr_service import Extraction
+    from services.quality_service import QualityGate, QualityReport
+
+logger = logging.getLogger(__name__)
+
+# services.doc_templates içindeki şablon adları
+ID_CARD = "id_card"
+APPLICATION_FORM = "application_form"
+
+PARALLEL, SHORT_CIRCUIT = "parallel", "short_circuit"
+
+# short_circuit modunda kimlik sonucu kararı belirlediğinde dönen mesajlar
+_SHORT_CIRCUIT_MESSAGES = {
+    "name_missing": "Kimlikten ad-soyad okunamadı",
+    "tckn_missing": "Kimlikten TCKN okunamadı",
+    "tckn_checksum": "Kimlikteki TCKN doğrulamadan geçmedi",
+    "low_confidence": "Kimlik OCR güveni çok düşük",
+}
+
+# validation_events olayı: ("id" | "form", ExtractedDocument) veya ("result", ValidateResponse)
+ValidationEvent = tuple[str, Union[ExtractedDocument, ValidateResponse]]
+
+
+def doc_type(name: str) -> str | None:
+    """Şablonlar kapalıysa tam sayfa OCR için None döner."""
+    return name if settings.ocr_use_templates else None
+
+
+def to_document(res: "Extraction") -> ExtractedDocument:
+    return ExtractedDocument(name=res.name, tckn=res.tckn, confidence=res.confidence,
+                             source=res.engine or "easyocr", field_confidence=res.field_confidence or {})
+
+
+def build_response(id_res: "Extraction", form_res: "Extraction", matcher: Matcher) -> ValidateResponse:
+    """Kimlik ve form çıkarım sonuçlarını eşleştirip API yanıtını üretir."""
+    id_name, id_tckn, id_conf = id_res.name, id_res.tckn, id_res.confidence
+    form_name, form_tckn, form_conf = form_res.name, form_res.tckn, form_res.confidence
+
+    # TCKN doğrulaması
+    if id_tckn and not is_valid_tckn(id_tckn):
+        logger.warning("Kimlik TCKN algoritmik doğrulamadan geçmedi: %s", pii_tckn(id_tckn))
+    if form_tckn and not is_valid_tckn(form_tckn):
+        logger.warning("Form TCKN algoritmik doğrulamadan geçmedi: %s", pii_tckn(form_tckn))
+
+    # Eşleştirme kısımı
+    logger.info("Eşleştirme yapılıyor...")
+    name_similarity, tckn_match, is_valid = matcher.compare(id_name, form_name, id_tckn, form_tckn)
+    logger.info("Eşleştirme sonucu - İsim benzerliği: %s, TCKN eşleşmesi: %s, Geçerli: %s",
+                name_similarity, tckn_match, is_valid,
+                extra={"event": "match", "name_similarity": name_similarity, "tckn_match": bool(tckn_match),
+                       "is_valid": bool(is_valid)})
+
+    message = "Ad-Soyad ve TCKN tutarlı." if is_valid else "Eşleşme başarısız. Lütfen belgeleri kontrol edin."
+
+    return ValidateResponse(
+        is_valid=bool(is_valid),
+        message=message,
+        scores=MatchScores(
+            name_similarity=name_similarity,
+            tckn_match=bool(tckn_match),
+            ocr_confidence_hint=max(id_conf, form_conf)
+        ),
+        id=to_document(id_res),
+        form=to_document(form_res),
+    )
+
+
+def build_short_circuit_response(id_res: "Extraction", reason: str) -> ValidateResponse:
+    """Kimlik sonucu eşleşmeyi zaten imkânsız kılıyorsa form okunmadan dönen yanıt."""
+    logger.info("Form OCR atlandı (kısa devre): %s", reason)
+    SHORT_CIRCUIT_TOTAL.inc(reason=reason)
+    return ValidateResponse(
+        is_valid=False,
+        message=f"{_SHORT_CIRCUIT_MESSAGES[reason]}; form işlenmedi. Lütfen kimliğin net bir görüntüsünü yükleyin.",
+        scores=MatchScores(name_similarity=0, tckn_match=False, ocr_confidence_hint=id_res.confidence),
+        id=to_document(id_res),
+        form=ExtractedDocument(source="skipped"),
+        short_circuit=reason,
+    )
+
+
+def build_quality_response(id_report: "QualityReport", form_report: "QualityReport") -> ValidateResponse:
+    """Kalite kapısından geçemeyen çift için OCR çalıştırılmadan dönen yanıt."""
+    errors = [
+        QualityError(document=document, code=i.code, message=f"{label}: {i.message}", value=i.value,
+                     threshold=i.threshold)
+        for document, label, report in (("id", "Kimlik", id_report), ("form", "Form", form_report))
+        for i in report.issues
+    ]
+    return ValidateResponse(
+        is_valid=False,
+        message="Görsel kalitesi yetersiz: " + " ".join(e.message for e in errors),
+        scores=MatchScores(name_similarity=0, tckn_match=False, ocr_confidence_hint=0.0),
+        id=ExtractedDocument(source="quality_gate"),
+        form=ExtractedDocument(source="quality_gate"),
+        quality_errors=errors,
+    )
+
+
+def check_quality(gate: "QualityGate", id_image: bytes, form_image: bytes) -> ValidateResponse | None:
+    """İki görseli de ölçer; biri bile geçemezse reddetme yanıtı, geçerse None döner."""
+    id_report = gate.check(id_image, ID_CARD)
+    form_report = gate.check(form_image, APPLICATION_FORM)
+    if id_report.ok and form_report.ok:
+        return None
+    saved = gate.record_rejection([i.code for r in (id_report, form_report) for i in r.issues])
+    logger.info("OCR atlandı (kalite kapısı) - tahmini kazanç %.2f sn", saved)
+    return build_quality_response(id_report, form_report)
+
+
+async def validation_events(executor: "OcrExecutor", matcher: Matcher,
+                            id_image: bytes, form_image: bytes,
+                            gate: "QualityGate | None" = None,
+                            mode: str = PARALLEL) -> AsyncIterator[ValidationEvent]:
+    """
+    Doğrulamayı aşama aşama yürütür; her belge okundukça ("id" | "form", ExtractedDocument),
+    en sonda ("result", ValidateResponse) üretir.
+
+    parallel     : iki belge birlikte okunur, hangisi önce biterse o önce yayınlanır.
+    short_circuit: önce kimlik okunur; ad/TCKN yoksa, TCKN sağlama toplamı tutmuyorsa veya
+                   güven short_circuit_min_confidence altındaysa form OCR'ı hiç çalışmaz.
+
+    Üretici erken kapatılırsa (istemci koptu) bekleyen OCR işleri iptal edilir.
+    """
+    if gate is not None:
+        rejected = await asyncio.to_thread(check_quality, gate, id_image, form_image)
+        if rejected is not None:
+            yield "result", rejected
+            return
+
+    logger.info("Kimlik ve form OCR başlıyor (%s): %s + %s bayt", mode, len(id_image), len(form_image))
+    started = time.perf_counter()
+    results: dict[str, "Extraction"] = {}
+
+    if mode == SHORT_CIRCUIT:
+        results["id"] = id_res = await executor.extract(id_image, doc_type(ID_CARD))
+        yield "id", to_document(id_res)
+        reason = escalation_reason(id_res, settings.short_circuit_min_confidence)
+        if reason is not None:
+            yield "result", build_short_circuit_response(id_res, reason)
+            return
+        results["form"] = form_res = await executor.extract(form_image, doc_type(APPLICATION_FORM))
+        yield "form", to_document(form_res)
+    else:
+        tasks = {
+            asyncio.ensure_future(executor.extract(id_image, doc_type(ID_CARD))): "id",
+            asyncio.ensure_future(executor.extract(form_image, doc_type(APPLICATION_FORM))): "form",
+        }
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[tasks[task]] = task.result()
+                    yield tasks[task], to_document(results[tasks[task]])
+        finally:
+            # Hata, zaman aşımı veya istemci kopması: kalan işler kuyruktan düşer
+            for task in pending:
+                task.cancel()
+
+    if gate is not None:
+        gate.observe_ocr(time.perf_counter() - started)
+    id_res, form_res = results["id"], results["form"]
+    logger.info("Kimlik sonucu - Ad: %s, TCKN: %s, Güven: %s", pii_name(id_res.name), pii_tckn(id_res.tckn), id_res.confidence)
+    logger.info("Form sonucu - Ad: %s, TCKN: %s, Güven: %s", pii_name(form_res.name), pii_tckn(form_res.tckn), form_res.confidence)
+    yield "result", build_response(id_res, form_res, matcher)
+
+
+async def validate_images(executor: "OcrExecutor", matcher: Matcher,
+                          id_image: bytes, form_image: bytes,
+                          gate: "QualityGate | None" = None,
+                          mode: str | None = None) -> ValidateResponse:
+    """
+    Kimlik ve form OCR'ını event loop'u bloklamadan çalıştırır ve eşleştirir (bkz. validation_events).
+    `gate` verilirse görseller önce kalite kapısından geçer; geçemeyen çiftte OCR çalışmaz.
+    Kapasite/süre aşımında OcrBusyError, PoolExhaustedError veya OcrTimeoutError fırlatır.
+    """
+    events = validation_events(executor, matcher, id_image, form_image, gate, mode or settings.validation_mode)
+    try:
+        async for event, payload in events:
+            if event == "result":
+                return payload
+    finally:
+        await events.aclose()
+    raise RuntimeError("Doğrulama sonuç üretmedi")
@@ -0,0 +1,28 @@
+from utils.fields import extract_fields, person_name, text_layout
+
+
+def _fields(text: str) -> dict[str, str]:
+    return {k: v.value for k, v in extract_fields(*text_layout(text)).items()}
+
+
+def test_name_stacking_stops_at_next_label():
+    fields = _fields("Adı\nAHMET\nSoyadı\nYILMAZ")
+    assert fields["name"] == "AHMET"
+    assert fields["surname"] == "YILMAZ"
+    assert person_name(extract_fields(*text_layout("Adı\nAHMET\nSoyadı\nYILMAZ"))).value == "AHMET YILMAZ"
+
+
+def test_name_split_across_lines_is_stacked():
+    fields = _fields("Adı\nKAAN\nALİ\nSoyadı\nANKARA")
+    assert fields["name"] == "KAAN ALİ"
+    assert fields["surname"] == "ANKARA"
+
+
+def test_full_name_label_inline():
+    name = person_name(extract_fields(*text_layout("Adı Soyadı: Kaan Ankara")))
+    assert name.value == "KAAN ANKARA"
+
+
+def test_full_name_label_on_its_own_line():
+    name = person_name(extract_fields(*text_layout("ADI SOYADI\nKAAN ANKARA")))
+    assert name.value == "KAAN ANKARA"
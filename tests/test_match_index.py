@@ -0,0 +1,117 @@
+import os
+
+from services.match_index import JOURNAL_FILE, MatchIndex
+
+
+def _ids(hits) -> list[str]:
+    return [h.record_id for h in hits]
+
+
+def _sample_index() -> MatchIndex:
+    index = MatchIndex()
+    index.insert("c1", "Kaan Ankara", "10000000146")
+    index.insert("c2", "Şule Ünal", None, "watchlist")
+    index.insert("c3", "Ali Veli")
+    return index
+
+
+def test_insert_query_and_delete():
+    index = _sample_index()
+    assert len(index) == 3
+    assert _ids(index.query("KAAN ANKARA", k=1)) == ["c1"]
+    assert index.query(tckn="10000000146")[0].tckn_match
+    assert _ids(index.query("Sule Unal", sources=["watchlist"])) == ["c2"]
+    assert index.query("Şule Ünal", sources=["customer"], min_score=85) == []
+
+    assert index.delete("c1")
+    assert not index.delete("c1")
+    assert index.query(tckn="10000000146") == []
+    assert len(index) == 2
+
+
+def test_insert_replaces_same_id():
+    index = _sample_index()
+    index.insert("c3", "Mehmet Yılmaz")
+    assert len(index) == 3
+    assert index.query("Ali Veli", min_score=85) == []
+    assert _ids(index.query("Mehmet Yılmaz", k=1)) == ["c3"]
+
+
+def test_exact_name_ranks_above_supersets():
+    index = MatchIndex()
+    for n in range(50):
+        index.insert(f"m{n}", "KAAN MEHMET ANKARA")
+    index.insert("w", "Kaan Ankara", source="watchlist")
+    assert index.query("Kaan Ankara", k=10)[0].record_id == "w"
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    path = str(tmp_path / "idx")
+    index = _sample_index()
+    index.delete("c3")
+    index.save(path)
+
+    loaded = MatchIndex.load(path)
+    assert len(loaded) == 2
+    assert not loaded.dirty
+    assert _ids(loaded.query("Kaan Ankara", k=1)) == ["c1"]
+    assert loaded.query(tckn="10000000146")[0].record_id == "c1"
+    assert loaded.query("Ali Veli", min_score=85) == []
+
+    # mmap üzerindeki kayıtlar silinip yenileri eklenebilir
+    assert loaded.delete("c2")
+    loaded.insert("c4", "Ayşe Kaya")
+    assert _ids(loaded.query("Ayşe Kaya", k=1)) == ["c4"]
+    assert len(loaded) == 2
+
+
+def test_journal_replays_unsaved_changes(tmp_path):
+    path = str(tmp_path / "idx")
+    index = _sample_index()
+    index.save(path)
+    index.open_journal()
+    index.insert("c4", "Ayşe Kaya")
+    index.delete("c2")
+    index.insert("c1", "Kaan Ankaralı", "10000000146")
+    # save() çağrılmadan süreç çöktü
+    index.close()
+
+    loaded = MatchIndex.load(path)
+    assert len(loaded) == 3
+    assert loaded.dirty
+    assert loaded.query(tckn="10000000146")[0].name == "Kaan Ankaralı"
+    assert _ids(loaded.query("Ayşe Kaya", k=1)) == ["c4"]
+    assert loaded.query("Şule Ünal", min_score=85) == []
+
+
+def test_save_empties_journal(tmp_path):
+    path = str(tmp_path / "idx")
+    index = _sample_index()
+    index.save(path)
+    index.open_journal()
+    index.insert("c4", "Ayşe Kaya")
+    index.save()
+    assert os.path.getsize(os.path.join(path, JOURNAL_FILE)) == 0
+    # Günlük save sonrasında da açık kalır
+    index.insert("c5", "Mehmet Yılmaz")
+    index.close()
+    assert len(MatchIndex.load(path)) == 5
+
+
+def test_torn_journal_line_is_skipped(tmp_path):
+    path = str(tmp_path / "idx")
+    index = _sample_index()
+    index.save(path)
+    index.open_journal()
+    index.insert("c4", "Ayşe Kaya")
+    index.close()
+    with open(os.path.join(path, JOURNAL_FILE), "a", encoding="utf-8") as f:
+        f.write('{"op": "ins')
+
+    reopened = MatchIndex.load(path)
+    assert len(reopened) == 4
+    reopened.open_journal()
+    reopened.insert("c5", "Mehmet Yılmaz")
+    reopened.close()
+    # Yarım satırdan sonra eklenen kayıt kaybolmaz
+    assert _ids(MatchIndex.load(path).query("Mehmet Yılmaz", k=1)) == ["c5"]
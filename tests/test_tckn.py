@@ -0,0 +1,64 @@
+import random
+
+import numpy as np
+
+from utils.tckn import DIGIT_FIX_PENALTY, extract_tckn, is_valid_tckn, is_valid_tckn_many, recover_tckn
+
+VALID = "10000000146"
+
+
+def _make_valid(prefix: str) -> str:
+    digits = [int(c) for c in prefix]
+    d10 = (sum(digits[0:9:2]) * 7 - sum(digits[1:8:2])) % 10
+    d11 = (sum(digits) + d10) % 10
+    return f"{prefix}{d10}{d11}"
+
+
+def _sample(n: int = 2000) -> list[str]:
+    rng = random.Random(7)
+    values = []
+    for _ in range(n):
+        prefix = str(rng.randint(100_000_000, 999_999_999))
+        valid = _make_valid(prefix)
+        values.append(valid)
+        values.append(valid[:10] + str((int(valid[10]) + 1) % 10))
+        values.append(str(rng.randint(10 ** 10, 10 ** 11 - 1)))
+    return values + ["", "0" + VALID[1:], VALID[:10], VALID + "1", "1000000014a", "１0000000146"]
+
+
+def test_is_valid_tckn_many_matches_scalar_for_strings():
+    values = _sample()
+    expected = np.array([is_valid_tckn(v) for v in values])
+    assert expected.any() and not expected.all()
+    assert (is_valid_tckn_many(values) == expected).all()
+    ascii_values = [v for v in values if v.isascii()]
+    expected = np.array([is_valid_tckn(v) for v in ascii_values])
+    assert (is_valid_tckn_many(np.array(ascii_values, dtype="S")) == expected).all()
+
+
+def test_is_valid_tckn_many_matches_scalar_for_integers():
+    values = [v for v in _sample() if len(v) == 11 and v.isascii() and v.isdigit() and v[0] != "0"]
+    expected = np.array([is_valid_tckn(v) for v in values])
+    assert (is_valid_tckn_many(np.array([int(v) for v in values], dtype=np.int64)) == expected).all()
+
+
+def test_confusable_letters_are_recovered():
+    value, confidence = recover_tckn("TC Kimlik No: 1000O00OI46")
+    assert value == VALID
+    assert 0.0 < confidence < 1.0
+    assert extract_tckn("1000O00OI46") == VALID
+
+
+def test_unique_single_digit_fix_is_accepted():
+    # Son hane yanlış okunmuş; sağlama toplamını tutturan tek varyant var
+    value, confidence = recover_tckn("10000000140")
+    assert value == VALID
+    assert confidence == DIGIT_FIX_PENALTY
+    assert extract_tckn("10000000140") == VALID
+
+
+def test_ambiguous_single_digit_fix_keeps_raw_value():
+    # Birden çok tek hane düzeltmesi geçerli: tahmin yapılmaz, sağlama hatası görünür kalır
+    assert recover_tckn("20000000146") is None
+    assert extract_tckn("20000000146") == "20000000146"
+    assert not is_valid_tckn(extract_tckn("20000000146"))
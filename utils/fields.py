@@ -0,0 +1,198 @@
+"""
+Konuma dayalı alan çıkarımı.
+
+OCR satırları (kutu + metin + güven) tek geçişte sınıflandırılır; her etiket
+(Adı, Soyadı, Ad Soyad) sağındaki veya altındaki en yakın değer kutusuna bağlanır.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional, Sequence
+import re
+
+import numpy as np
+
+from utils.tckn import TCKN_RE, tckn_candidates
+from utils.textnorm import clean_person_name, normalize_text
+
+# Sıra önemli: aynı konumda önce "AD SOYAD", sonra "SOYADI", en son "ADI" denenir
+_LABEL_RE = re.compile(
+    r"(?P<full_name>\bAD[Iİ]?\s*[-/]?\s*SO[YV]AD[Iİ]?\b)"
+    r"|(?P<surname>\bSO[YV]AD[Iİ]\b)"
+    r"|(?P<name>\bAD[Iİ]\b)"
+)
+_WORD_RE = re.compile(r"[A-ZÇĞİÖŞÜ][A-ZÇĞİÖŞÜ'\-]+")
+_VALUE_RE = re.compile(r"^[A-ZÇĞİÖŞÜ'\- ]+$")
+_DIGIT_RE = re.compile(r"\d")
+
+# Değer olamayacak (etiket/başlık) kelimeler
+STOP_WORDS = frozenset({
+    "GIVEN", "NAME", "NAMES", "SURNAME", "TARIHI", "TARİHİ", "BIRTH", "CINSIYETI", "CİNSİYETİ",
+    "DATE", "GENDER", "TÜRKİYE", "CUMHURİYETİ", "CUMHURIYETI", "REPUBLIC", "TURKEY", "KIMLIK",
+    "KİMLİK", "KARTI", "IDENTITY", "CARD", "UYRUĞU", "NATIONALITY", "SERİ", "SERI", "DOCUMENT",
+    "GEÇERLİLİK", "VALID", "UNTIL", "İMZA", "IMZA", "TARİH", "TARIH", "NO", "ADI", "ADİ", "SOYADI", "SOYADİ",
+})
+
+# Etiket başına değer kutusu arama penceresi (etiket yüksekliğinin katı)
+_RIGHT_MAX_GAP = 12.0
+_BELOW_MAX_GAP = 3.0
+
+
+@dataclass(frozen=True)
+class FieldValue:
+    value: str
+    confidence: float
+
+
+def text_layout(text: str) -> tuple[np.ndarray, tuple[str, ...], np.ndarray]:
+    """Düz metni sanal bir yerleşime çevirir: her satır tam genişlikte bir sıra, güven 1."""
+    texts = tuple(text.splitlines())
+    n = len(texts)
+    boxes = np.zeros((n, 4), dtype=np.float32)
+    boxes[:, 1] = np.arange(n)
+    boxes[:, 2] = 1.0
+    boxes[:, 3] = boxes[:, 1] + 1.0
+    return boxes, texts, np.ones(n, dtype=np.float32)
+
+
+def _inline_value(rest: str) -> str:
+    words = [w for w in _WORD_RE.findall(rest) if w not in STOP_WORDS]
+    return " ".join(words)
+
+
+class _Page:
+    """Kutuların vektörize geometrisi ve satır başına ön sınıflandırma."""
+    def __init__(self, boxes: np.ndarray, texts: Sequence[str], confs: np.ndarray):
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self.confs = np.asarray(confs, dtype=np.float32)
+        self.normalized = [normalize_text(t.strip()) for t in texts]
+        self.upper = [t.upper() for t in self.normalized]
+        self.heights = np.maximum(self.boxes[:, 3] - self.boxes[:, 1], 1e-3)
+
+        n = len(self.upper)
+        self.labels: list[tuple[int, str, str]] = []  # (indeks, alan, satır içi değer)
+        candidate = np.zeros(n, dtype=bool)
+        is_label = np.zeros(n, dtype=bool)
+        for i, t in enumerate(self.upper):
+            m = _LABEL_RE.search(t)
+            if m:
+                self.labels.append((i, m.lastgroup, _inline_value(t[m.end():])))
+                is_label[i] = True
+                continue
+            words = t.split()
+            candidate[i] = (
+                0 < len(words) <= 3
+                and _VALUE_RE.match(t) is not None
+                and not _DIGIT_RE.search(t)
+                and not any(w in STOP_WORDS for w in words)
+            )
+        self.candidate = candidate
+        self.is_label = is_label
+
+    def _vertical_overlap(self, i: int) -> np.ndarray:
+        b = self.boxes
+        overlap = np.minimum(b[:, 3], b[i, 3]) - np.maximum(b[:, 1], b[i, 1])
+        return overlap > 0.5 * np.minimum(self.heights, self.heights[i])
+
+    def _right_of(self, i: int, max_gap: float) -> np.ndarray:
+        """i ile aynı sırada, sağında ve `max_gap` yükseklik içinde kalan aday kutular."""
+        b, h = self.boxes, self.heights[i]
+        gap = b[:, 0] - b[i, 2]
+        mask = self.candidate & self._vertical_overlap(i) & (gap >= -0.5 * h) & (gap <= max_gap * h)
+        mask[i] = False
+        return mask
+
+    def _below(self, i: int, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """i'nin altında, aynı sütunda kalan kutular (varsayılan: yalnızca değer adayları)."""
+        b, h = self.boxes, self.heights[i]
+        gap = b[:, 1] - b[i, 3]
+        column = (np.minimum(b[:, 2], b[i, 2]) - np.maximum(b[:, 0], b[i, 0]) > 0) | \
+                 (np.abs(b[:, 0] - b[i, 0]) < 2.0 * h)
+        rows = self.candidate if rows is None else rows
+        return rows & (gap >= -0.25 * h) & (gap < _BELOW_MAX_GAP * h) & column
+
+    def _nearest(self, mask: np.ndarray, key: np.ndarray) -> Optional[int]:
+        idx = np.flatnonzero(mask)
+        return int(idx[np.argmin(key[idx])]) if idx.size else None
+
+    def _row_run(self, start: int, used: set[int]) -> list[int]:
+        """start kutusundan sağa doğru aynı sıradaki bitişik aday kutular (bölünmüş isimler)."""
+        run = [start]
+        while True:
+            nxt = self._nearest(self._right_of(run[-1], 2.0), self.boxes[:, 0])
+            if nxt is None or nxt in used or nxt in run:
+                return run
+            run.append(nxt)
+
+    def link(self, i: int, stack: bool) -> list[int]:
+        """Etiketin değer kutularını döner: önce sağ, yoksa alt; `stack` ise alttaki satırlar eklenir."""
+        used = {i}
+        first = self._nearest(self._right_of(i, _RIGHT_MAX_GAP), self.boxes[:, 0] - self.boxes[i, 2])
+        if first is not None:
+            return self._row_run(first, used)
+        first = self._nearest(self._below(i), self.boxes[:, 1])
+        if first is None:
+            return []
+        picked = self._row_run(first, used)
+        while stack and sum(len(self.upper[k].split()) for k in picked) < 2:
+            # Ad birden çok satıra bölünmüş olabilir ("KAAN" / "ALİ"); araya başka bir
+            # alanın etiketi girerse alttaki değer o alana aittir
+            below = self._below(picked[-1], self.candidate | self.is_label)
+            below[picked] = False
+            below[i] = False
+            nxt = self._nearest(below, self.boxes[:, 1])
+            if nxt is None or self.is_label[nxt] \
+                    or self.boxes[nxt, 1] - self.boxes[i, 3] >= _BELOW_MAX_GAP * self.heights[i]:
+                break
+            picked += self._row_run(nxt, used | set(picked))
+        return picked
+
+
+def extract_fields(boxes: np.ndarray, texts: Sequence[str], confs: np.ndarray) -> dict[str, FieldValue]:
+    """
+    Kutulardan `name`, `surname`, `full_name` ve `tckn` alanlarını çıkarır.
+    Her alanın güveni, değeri oluşturan kutuların ortalama güvenidir.
+    """
+    page = _Page(boxes, texts, confs)
+    fields: dict[str, FieldValue] = {}
+
+    for i, kind, inline in page.labels:
+        if kind in fields:
+            continue
+        if inline:
+            fields[kind] = FieldValue(inline, float(page.confs[i]))
+            continue
+        picked = page.link(i, stack=(kind == "name"))
+        if picked:
+            value = " ".join(page.upper[k] for k in picked)
+            fields[kind] = FieldValue(value, float(page.confs[picked].mean()))
+
+    # TCKN: sağlama toplamını geçen (gerekirse düzeltilmiş) en güvenilir aday;
+    # hiçbiri geçmezse okuma sırasındaki ilk 11 haneli eşleşme
+    order = np.lexsort((page.boxes[:, 0], page.boxes[:, 1])) if len(page.upper) else []
+    fallback = None
+    for i in order:
+        for cand in tckn_candidates(page.normalized[i], float(page.confs[i])):
+            if "tckn" not in fields or cand.confidence > fields["tckn"].confidence:
+                fields["tckn"] = FieldValue(cand.value, cand.confidence)
+        if fallback is None:
+            m = TCKN_RE.search(page.normalized[i])
+            if m:
+                fallback = FieldValue(m.group(0), float(page.confs[i]))
+    if "tckn" not in fields and fallback is not None:
+        fields["tckn"] = fallback
+    return fields
+
+
+def person_name(fields: dict[str, FieldValue]) -> Optional[FieldValue]:
+    """Ad Soyad alanı varsa onu, yoksa ad + soyadı birleştirip temizler."""
+    if "full_name" in fields:
+        full = fields["full_name"]
+        name = clean_person_name(full.value)
+        return FieldValue(name, full.confidence) if name else None
+
+    parts = [fields[k] for k in ("name", "surname") if k in fields]
+    joined = " ".join(p.value for p in parts).strip()
+    if len(joined.split()) < 2:
+        return None
+    name = clean_person_name(joined)
+    return FieldValue(name, float(np.mean([p.confidence for p in parts]))) if name else None
@@ -0,0 +1,137 @@
+from dataclasses import dataclass
+import struct
+import logging
+
+logger = logging.getLogger(__name__)
+
+PNG, JPEG, BMP, TIFF = "png", "jpeg", "bmp", "tiff"
+
+# TIFF IFD zinciri için üst sınır (döngülü/bozuk dosyalarda sonsuz okuma olmasın)
+_TIFF_MAX_IFDS = 256
+_TIFF_WIDTH, _TIFF_LENGTH = 256, 257
+# TIFF alan türü -> (bayt, struct biçimi); SHORT ve LONG boyut etiketleri için yeterli
+_TIFF_TYPES = {3: (2, "H"), 4: (4, "I")}
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    format: str
+    width: int
+    height: int
+    # Çok sayfalı TIFF'te sayfa başına (genişlik, yükseklik); diğer formatlarda tek sayfa
+    pages: tuple[tuple[int, int], ...] = ()
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+
+def sniff_format(data: bytes | memoryview) -> str | None:
+    """Sihirli baytlardan görsel formatı; tanınmazsa None."""
+    head = bytes(memoryview(data)[:8])
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return PNG
+    if head.startswith(b"\xff\xd8\xff"):
+        return JPEG
+    if head.startswith(b"BM"):
+        return BMP
+    if head.startswith((b"II*\x00", b"MM\x00*")):
+        return TIFF
+    return None
+
+
+def tiff_pages(data: bytes | memoryview) -> list[tuple[int, int]]:
+    """TIFF IFD zincirini izleyip her sayfanın (genişlik, yükseklik) değerini döner."""
+    buf = memoryview(data)
+    n = len(buf)
+    if n < 8:
+        return []
+    endian = "<" if bytes(buf[:2]) == b"II" else ">"
+    offset = struct.unpack(endian + "I", buf[4:8])[0]
+    pages: list[tuple[int, int]] = []
+    seen: set[int] = set()
+    while offset and offset not in seen and len(pages) < _TIFF_MAX_IFDS:
+        seen.add(offset)
+        if offset + 2 > n:
+            break
+        count = struct.unpack(endian + "H", buf[offset:offset + 2])[0]
+        end = offset + 2 + count * 12
+        if end + 4 > n:
+            break
+        w = h = 0
+        for i in range(offset + 2, end, 12):
+            tag, typ = struct.unpack(endian + "HH", buf[i:i + 4])
+            if tag in (_TIFF_WIDTH, _TIFF_LENGTH) and typ in _TIFF_TYPES:
+                size, fmt = _TIFF_TYPES[typ]
+                value = struct.unpack(endian + fmt, buf[i + 8:i + 8 + size])[0]
+                if tag == _TIFF_WIDTH:
+                    w = value
+                else:
+                    h = value
+        pages.append((int(w), int(h)))
+        offset = struct.unpack(endian + "I", buf[end:end + 4])[0]
+    return pages
+
+
+def image_info(data: bytes | memoryview) -> ImageInfo | None:
+    """Format ve boyutları başlıktan okur; format tanınmaz veya başlık bozuksa None."""
+    fmt = sniff_format(data)
+    if fmt is None:
+        return None
+    if fmt == TIFF:
+        pages = tiff_pages(data)
+        if not pages:
+            return None
+        w, h = pages[0]
+        return ImageInfo(fmt, w, h, tuple(pages))
+    size = image_size(data)
+    if size is None:
+        return None
+    return ImageInfo(fmt, size[0], size[1], (size,))
+
+# JPEG SOF işaretçileri (DHT/JPG/DAC hariç)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def image_size(data: bytes | memoryview) -> tuple[int, int] | None:
+    """
+    Görseli decode etmeden başlıktan (genişlik, yükseklik) okur.
+    PNG, JPEG, BMP ve TIFF (ilk sayfa) desteklenir; tanınmayan formatta None döner.
+    """
+    buf = memoryview(data)
+    if len(buf) >= 24 and bytes(buf[:8]) == b"\x89PNG\r\n\x1a\n":
+        w, h = struct.unpack(">II", buf[16:24])
+        return int(w), int(h)
+
+    if len(buf) >= 26 and bytes(buf[:2]) == b"BM":
+        w, h = struct.unpack("<ii", buf[18:26])
+        return abs(int(w)), abs(int(h))
+
+    if len(buf) >= 4 and bytes(buf[:2]) == b"\xff\xd8":
+        i = 2
+        n = len(buf)
+        while i + 4 <= n:
+            if buf[i] != 0xFF:
+                i += 1
+                continue
+            marker = buf[i + 1]
+            if marker == 0xFF:
+                i += 1
+                continue
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                i += 2
+                continue
+            seg_len = struct.unpack(">H", buf[i + 2:i + 4])[0]
+            if marker in _JPEG_SOF:
+                if i + 9 > n:
+                    return None
+                h, w = struct.unpack(">HH", buf[i + 5:i + 9])
+                return int(w), int(h)
+            i += 2 + seg_len
+        return None
+
+    if len(buf) >= 8 and bytes(buf[:4]) in (b"II*\x00", b"MM\x00*"):
+        pages = tiff_pages(buf)
+        return pages[0] if pages and all(pages[0]) else None
+
+    return None
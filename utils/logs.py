@@ -0,0 +1,199 @@
+"""
+Ayarlardan kurulan, istek yolunu bloklamayan günlükleme ve PII maskeleme.
+
+    configure_logging(settings)                   # main.py / CLI girişleri
+    logger.info("Kimlik - Ad: %s, TCKN: %s", pii_name(name), pii_tckn(tckn))
+
+* Mesajlar %-biçimiyle tembel üretilir; seviye kapalıysa argümanlar hiç biçimlenmez.
+* İstek thread'i kaydı yalnızca kuyruğa koyar (QueueHandler); biçimleme, maskeleme ve
+  yazma QueueListener thread'inde yapılır.
+* DEBUG kayıtları çağrı noktası başına örneklenir (log_debug_sample_rate).
+* pii_* sarmalayıcıları yazılırken maskelenir; gözden kaçan 11 haneli TCKN'ler de son
+  aşamada mesajdan maskelenir. log_mask_pii=False yalnızca yerel hata ayıklama içindir.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Optional
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+
+_TCKN_RE = re.compile(r"(?<!\d)[1-9]\d{10}(?!\d)")
+_TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+# LogRecord'un kendi alanları; geri kalanı `extra=` ile gelen yapısal alanlardır
+_RECORD_FIELDS = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+_mask_enabled = True
+_listener: Optional[logging.handlers.QueueListener] = None
+_installed: Optional[logging.Handler] = None
+_output: Optional[logging.Handler] = None
+
+
+def mask_tckn(value: Any) -> str:
+    """Son iki hane dışında TCKN'yi gizler: 12345678950 -> *********50."""
+    s = str(value)
+    return "*" * (len(s) - 2) + s[-2:] if len(s) > 2 else "*" * len(s)
+
+
+def mask_name(value: Any) -> str:
+    """Her kelimenin yalnızca baş harfi kalır: KAAN ANKARA -> K*** A*****."""
+    return " ".join(w[:1] + "*" * (len(w) - 1) for w in str(value).split())
+
+
+def mask_text(value: Any) -> str:
+    """Serbest OCR metni ad/adres içerebilir; yalnızca uzunluğu yazılır."""
+    return f"<{len(str(value))} karakter>"
+
+
+class _Pii:
+    """Yazılırken (ve yalnızca yazılırsa) maskelenen değer."""
+    __slots__ = ("value", "mask")
+
+    def __init__(self, value: Any, mask: Callable[[Any], str]):
+        self.value = value
+        self.mask = mask
+
+    def __str__(self) -> str:
+        if self.value is None:
+            return "None"
+        return self.mask(self.value) if _mask_enabled else str(self.value)
+
+    __repr__ = __str__
+
+
+def pii_tckn(value: Any) -> _Pii:
+    return _Pii(value, mask_tckn)
+
+
+def pii_name(value: Any) -> _Pii:
+    return _Pii(value, mask_name)
+
+
+def pii_text(value: Any) -> _Pii:
+    return _Pii(value, mask_text)
+
+
+class PiiFilter(logging.Filter):
+    """Mesajı bir kez biçimler ve kalan TCKN benzeri sayıları maskeler (dinleyici thread'inde)."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        if _mask_enabled:
+            record.msg = _TCKN_RE.sub(lambda m: mask_tckn(m.group(0)), record.getMessage())
+            record.args = None
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """
+    DEBUG kayıtlarından her çağrı noktası için `1 / rate` kayıtta birini geçirir; diğer
+    seviyeler dokunulmadan geçer. rate=0 DEBUG'ı tamamen kapatır.
+    """
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.every = round(1 / rate) if rate > 0 else 0
+        self._seen: dict[tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.DEBUG or self.every == 1:
+            return True
+        if self.every == 0:
+            return False
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            n = self._seen.get(site, 0)
+            self._seen[site] = n + 1
+        return n % self.every == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """Satır başına bir JSON olayı; `extra=` alanları olduğu gibi eklenir."""
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                event[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            event["exc"] = record.exc_text
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Kaydı biçimlemeden kuyruğa koyar: aynı süreçteki dinleyici thread'i argümanlara ve
+    exc_info'ya doğrudan erişebilir (varsayılan prepare mesajı çağıran thread'de biçimler).
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(settings) -> None:
+    """
+    Kök logger'ı ayarlara göre kurar; tekrar çağrılırsa önceki kurulumu değiştirir.
+    log_queue=False ise kayıtlar çağıran thread'de yazılır (ör. kısa ömürlü CLI).
+    """
+    global _mask_enabled, _listener, _installed, _output
+    _mask_enabled = settings.log_mask_pii
+
+    output = logging.StreamHandler(sys.stderr)
+    if settings.log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(_TEXT_FORMAT))
+    output.addFilter(PiiFilter())
+
+    root = logging.getLogger()
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _installed is not None:
+        root.removeHandler(_installed)
+
+    if settings.log_queue:
+        handler: logging.Handler = _QueueHandler(queue.SimpleQueue())
+        _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler = output
+    # Örnekleme kuyruğa girmeden, çağıran thread'de yapılır
+    handler.addFilter(DebugSampler(settings.log_debug_sample_rate))
+    root.addHandler(handler)
+    root.setLevel(settings.log_level)
+    _installed, _output = handler, output
+
+
+def _after_fork() -> None:
+    """
+    fork ile açılan OCR/batch işçilerine dinleyici thread'i geçmez; kuyruğa yazılan kayıtlar
+    hiç okunmazdı. Çocuk süreç doğrudan yazan işleyiciye geçer.
+    """
+    global _listener, _installed
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_installed)
+    for f in _installed.filters:
+        _output.addFilter(f)
+    root.addHandler(_output)
+    _listener, _installed = None, _output
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+@atexit.register
+def _flush() -> None:
+    """Çıkışta kuyrukta kalan kayıtlar yazılır."""
+    if _listener is not None:
+        _listener.stop()
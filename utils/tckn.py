@@ -1,24 +1,151 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Iterable, Optional
 import re
 import logging
 
+import numpy as np
+
+from utils.logs import pii_tckn, pii_text
+
 logger = logging.getLogger(__name__)
 
 TCKN_RE = re.compile(r"\b[1-9]\d{10}\b")
 
+# OCR'ın rakamla karıştırdığı karakterler
+OCR_CONFUSIONS = str.maketrans({"O": "0", "o": "0", "I": "1", "l": "1", "|": "1", "S": "5", "B": "8"})
+# Rakam + karışan harfler; aralarda tek boşluk olabilir ("1234 567 8901")
+_CANDIDATE_RE = re.compile(r"(?<![0-9A-Za-z])[0-9OoIlSB|](?: ?[0-9OoIlSB|]){10}(?![0-9A-Za-z])")
+# Adayın en az bu kadar karakteri gerçek rakam olmalı (kelimeleri ayıklar)
+_MIN_REAL_DIGITS = 7
+
+# Güven çarpanları: harf→rakam düzeltmesi başına ve tek hane tahmini için
+SUBSTITUTION_PENALTY = 0.95
+DIGIT_FIX_PENALTY = 0.5
+
+_POW10 = 10 ** np.arange(10, -1, -1, dtype=np.int64)
+_CHUNK = 1 << 20
+
+
+@dataclass(frozen=True)
+class TcknCandidate:
+    value: str
+    confidence: float
+    raw: str
+    substitutions: int = 0
+    digit_fixed: bool = False
+
+
+def _digit_matrix(chunk: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(N, 11) hane matrisi ve biçimce uygun (11 hane, yalnız rakam) satır maskesi."""
+    kind = chunk.dtype.kind
+    if kind in "iu":
+        values = chunk.astype(np.int64, copy=False)
+        ok = (values >= 10 ** 10) & (values < 10 ** 11)
+        digits = (values[:, None] // _POW10) % 10
+        return digits.astype(np.int16), ok
+
+    if kind not in "SU":
+        chunk = chunk.astype(str)
+        kind = "U"
+    ok = np.char.str_len(chunk) == 11
+    width = chunk.dtype.itemsize // (4 if kind == "U" else 1)
+    if width < 11:
+        return np.zeros((len(chunk), 11), dtype=np.int16), np.zeros(len(chunk), dtype=bool)
+    codes = np.ascontiguousarray(chunk).view(np.uint32 if kind == "U" else np.uint8).reshape(len(chunk), width)
+    digits = codes[:, :11].astype(np.int16) - ord("0")
+    ok &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+    return digits, ok
+
+
+def is_valid_tckn_many(values: Iterable | np.ndarray) -> np.ndarray:
+    """
+    TCKN algoritmik doğrulamasının vektörize hali.
+    Girdi: int64 dizisi, bayt/Unicode string dizisi veya string listesi.
+    Çıktı: aynı uzunlukta bool dizisi. Bellek kullanımı için parçalar halinde çalışır.
+    """
+    arr = np.asarray(values).ravel()
+    out = np.zeros(len(arr), dtype=bool)
+    for start in range(0, len(arr), _CHUNK):
+        digits, ok = _digit_matrix(arr[start:start + _CHUNK])
+        d10 = (digits[:, 0:9:2].sum(axis=1) * 7 - digits[:, 1:8:2].sum(axis=1)) % 10
+        d11 = digits[:, :10].sum(axis=1) % 10
+        out[start:start + _CHUNK] = ok & (digits[:, 0] != 0) & (d10 == digits[:, 9]) & (d11 == digits[:, 10])
+    return out
+
+
+def _single_digit_fixes(number: str) -> list[str]:
+    """Tek haneyi değiştirerek sağlama toplamını tutturan tüm varyantlar."""
+    base = np.frombuffer(number.encode("ascii"), dtype=np.uint8)
+    variants = np.tile(base, (11 * 10, 1))
+    rows = np.arange(11 * 10)
+    variants[rows, rows // 10] = ord("0") + rows % 10
+    variants = variants[(variants != base).any(axis=1)]
+    as_bytes = variants.view("S11").ravel()
+    return [v.decode("ascii") for v in as_bytes[is_valid_tckn_many(as_bytes)]]
+
+
+def tckn_candidates(text: str, base_confidence: float = 1.0) -> list[TcknCandidate]:
+    """
+    Metindeki tüm TCKN adaylarını toplar; karışan harfleri (O→0, I/l→1, S→5, B→8) rakama çevirir.
+    Sağlama toplamı yine tutmuyorsa tek hanelik düzeltme yalnızca tek geçerli varyant varsa
+    kabul edilir; birden çok varyant farklı kimlikler demektir, aday üretilmez ve ham
+    değerin sağlama hatası görünür kalır.
+    Sağlama toplamını geçen adaylar güvene göre azalan sırada döner.
+    """
+    if not text:
+        return []
+    found: list[TcknCandidate] = []
+    for m in _CANDIDATE_RE.finditer(text):
+        raw = m.group(0)
+        compact = raw.replace(" ", "")
+        if sum(c.isdigit() for c in compact) < _MIN_REAL_DIGITS:
+            continue
+        number = compact.translate(OCR_CONFUSIONS)
+        subs = sum(a != b for a, b in zip(compact, number))
+        conf = base_confidence * SUBSTITUTION_PENALTY ** subs
+        if is_valid_tckn(number):
+            found.append(TcknCandidate(number, conf, raw, subs))
+            continue
+        fixes = _single_digit_fixes(number)
+        if len(fixes) == 1:
+            found.append(TcknCandidate(fixes[0], conf * DIGIT_FIX_PENALTY, raw, subs, True))
+    found.sort(key=lambda c: c.confidence, reverse=True)
+    return found
+
+
+def recover_tckn(text: str, base_confidence: float = 1.0) -> Optional[tuple[str, float]]:
+    """Sağlama toplamını geçen en güvenilir TCKN ve güveni; aday yoksa None."""
+    candidates = tckn_candidates(text, base_confidence)
+    if not candidates:
+        return None
+    best = candidates[0]
+    if best.substitutions or best.digit_fixed:
+        logger.debug("TCKN düzeltildi: %s -> %s (güven: %.2f)", pii_text(best.raw), pii_tckn(best.value), best.confidence)
+    return best.value, best.confidence
+
+
 def extract_tckn(text: str) -> str | None:
     """
     Metinden TCKN çıkarır.
     TCKN formatı: 11 haneli, ilk hane 0 olamaz.
+    Sağlama toplamını geçen (karışan harfleri veya tek olası hanesi düzeltilmiş) aday önceliklidir;
+    hiçbiri geçmezse ilk 11 haneli ham eşleşme döner (sağlama hatası çağırana görünür kalır).
     """
     if not text:
         return None
-    
+
+    recovered = recover_tckn(text)
+    if recovered is not None:
+        logger.debug("TCKN bulundu: %s", pii_tckn(recovered[0]))
+        return recovered[0]
+
     m = TCKN_RE.search(text)
     if m:
         tckn = m.group(0)
-        logger.debug(f"TCKN bulundu: {tckn}")
+        logger.debug("TCKN bulundu (sağlama toplamı tutmuyor): %s", pii_tckn(tckn))
         return tckn
-    
+
     logger.debug("TCKN bulunamadı")
     return None
 
@@ -30,43 +157,17 @@ def is_valid_tckn(num: str) -> bool:
     - İlk hane 0 olamaz
     - 10. hane: ((1+3+5+7+9) * 7 - (2+4+6+8)) mod 10
     - 11. hane: (1+2+3+4+5+6+7+8+9+10) mod 10
+    Toplu doğrulama için is_valid_tckn_many kullanılır.
     """
-    try:
-       
-        if not num or not isinstance(num, str):
-            logger.debug(f"TCKN geçersiz: boş veya string değil")
-            return False
-        
-        if not num.isdigit():
-            logger.debug(f"TCKN geçersiz: sayısal değil - {num}")
-            return False
-        
-        if len(num) != 11:
-            logger.debug(f"TCKN geçersiz: 11 haneli değil - {num} (uzunluk: {len(num)})")
-            return False
-        
-        if num[0] == "0":
-            logger.debug(f"TCKN geçersiz: ilk hane 0 - {num}")
-            return False
-        
-        # Algoritmik doğrulama
-        digits = [int(c) for c in num]
-        
-        # 10. hane kontrolü
-        d10 = ((sum(digits[0:9:2]) * 7) - sum(digits[1:8:2])) % 10
-        if d10 != digits[9]:
-            logger.debug(f"TCKN geçersiz: 10. hane uyumsuz - {num} (beklenen: {d10}, mevcut: {digits[9]})")
-            return False
-        
-        # 11. hane kontrolü
-        d11 = sum(digits[:10]) % 10
-        if d11 != digits[10]:
-            logger.debug(f"TCKN geçersiz: 11. hane uyumsuz - {num} (beklenen: {d11}, mevcut: {digits[10]})")
-            return False
-        
-        logger.debug(f"TCKN geçerli: {num}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"TCKN doğrulama hatası: {e}")
+    if not num or not isinstance(num, str) or len(num) != 11 or not (num.isascii() and num.isdigit()) \
+            or num[0] == "0":
+        logger.debug("TCKN geçersiz biçim: %s", pii_text(num))
+        return False
+
+    digits = [ord(c) - 48 for c in num]
+    d10 = ((sum(digits[0:9:2]) * 7) - sum(digits[1:8:2])) % 10
+    d11 = sum(digits[:10]) % 10
+    if d10 != digits[9] or d11 != digits[10]:
+        logger.debug("TCKN geçersiz: sağlama toplamı uyumsuz - %s", pii_tckn(num))
         return False
+    return True
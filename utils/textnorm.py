@@ -2,6 +2,8 @@ import re
 import unicodedata
 import logging
 
+from utils.logs import pii_name
+
 logger = logging.getLogger(__name__)
 
 NAME_RE = re.compile(r"(?:(?:ADI|AD|AD SOYAD|AD SOYADI|SOYADI|SOYAD|AD-SOYAD)\s*[:\-]?\s*)?([A-ZÇĞİÖŞÜ\s]{3,})")
@@ -25,7 +27,7 @@ def normalize_text(s: str) -> str:
     for old, new in replacements.items():
         s = s.replace(old, new)
     
-    logger.debug(f"Metin normalize edildi: {len(s)} karakter")
+    logger.debug("Metin normalize edildi: %s karakter", len(s))
     return s
 
 
@@ -33,67 +35,53 @@ def extract_name_block(text: str) -> str:
     """
     Kimlik OCR çıktısından ad ve soyadı birleştirerek çıkarır.
     Kimlik kartında etiket ve değer farklı satırlarda olabilir.
+    Düz metin için eski arayüz: satırlar sanal bir yerleşime çevrilip
+    utils.fields.extract_fields ile tek geçişte ayrıştırılır.
     """
-    lines = text.splitlines()
-    name = ""
-    surname = ""
-
-    for i, line in enumerate(lines):
-        line_clean = normalize_text(line.strip().upper())
-
-        if ("ADI" in line_clean or "ADİ" in line_clean) and not ("SOYADI" in line_clean or "SOYADİ" in line_clean):
-            match = re.search(r"(?:ADI|ADİ)[:\-]?\s*([A-ZÇĞİÖŞÜ\s]+)", line_clean)
-            if match and match.group(1).strip():
-                name = match.group(1).strip()
-            else:
-                name_parts = []
-                for j in range(i+1, min(i+4, len(lines))):
-                    next_line = normalize_text(lines[j].strip().upper())
-                    if (next_line and not re.search(r'\d', next_line) and 
-                        len(next_line.split()) <= 2 and 
-                        '(' not in next_line and ')' not in next_line and
-                        not any(word in next_line for word in ['GIVEN', 'NAME', 'SURNAME', 'TARIHI', 'BIRTH', 'CINSIYETI', 'DATE', 'GENDER', 'ANKARA', 'SURNAME']) and
-                        len(next_line.strip()) <= 10):  
-                        name_parts.append(next_line.strip())
-                        
-                        if len(next_line.split()) >= 2:
-                            break
-                
-                if name_parts:
-                    name = " ".join(name_parts)
-
-        elif "SOYADI" in line_clean or "SOYADİ" in line_clean:
-            match = re.search(r"(?:SOYADI|SOYADİ)[:\-]?\s*([A-ZÇĞİÖŞÜ\s]+)", line_clean)
-            if match and match.group(1).strip() and match.group(1).strip() != "SURNAME":
-                surname = match.group(1).strip()
-            else:
-                for j in range(i+1, min(i+4, len(lines))):
-                    next_line = normalize_text(lines[j].strip().upper())
-                    if (next_line and not re.search(r'\d', next_line) and 
-                        len(next_line.split()) <= 3 and
-                        next_line.strip() != "SURNAME"):
-                        surname = next_line.strip()
-                        break
-
-        elif any(pattern in line_clean for pattern in ["AD SOYAD", "AD SOVAD", "AD SOYADI", "AD SOVADI"]):
-            patterns = [
-                r"AD\s+(?:SOYAD|SOVAD|SOYADI|SOVADI)[:\-]?\s*([A-ZÇĞİÖŞÜa-zçğıöşü\s]+)",
-                r"AD\s+(?:SOYAD|SOVAD|SOYADI|SOVADI)[:\-]?\s*([A-ZÇĞİÖŞÜa-zçğıöşü\s]+)"
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, line_clean)
-                if match and match.group(1).strip():
-                    full_name = match.group(1).strip()
-                    return clean_person_name(full_name)
-            
-            if i + 1 < len(lines):
-                next_line = normalize_text(lines[i + 1].strip())
-                if next_line and not re.search(r'\d', next_line) and len(next_line.split()) >= 2:
-                    return clean_person_name(next_line)
+    from utils.fields import extract_fields, person_name, text_layout
 
-    full_name = f"{name} {surname}".strip()
-    return clean_person_name(full_name) if len(full_name.split()) >= 2 else ""
+    name = person_name(extract_fields(*text_layout(text)))
+    return name.value if name else ""
+
+
+FIELD_LABEL_WORDS = ("SOYADI", "SOYADİ", "SURNAME", "ADI", "ADİ", "GIVEN", "NAME", "KIMLIK", "KİMLİK", "IDENTITY")
+_INLINE_LABEL_RE = re.compile(r"^[^:]*(?:AD|SOYAD|NO|NUMARASI|NUMARASİ)[^:]*:\s*(.+)$", re.IGNORECASE)
+
+
+def strip_field_label(text: str) -> str:
+    """
+    Şablon bölgesinden okunan metinden etiketi atar, değeri döner.
+    "Ad Soyad: Kaan Ankara" -> "Kaan Ankara", "Soyadı / Surname\nANKARA" -> "ANKARA"
+    """
+    values = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        m = _INLINE_LABEL_RE.match(line)
+        if m:
+            values.append(m.group(1).strip())
+            continue
+        if any(word in line.upper() for word in FIELD_LABEL_WORDS):
+            continue
+        values.append(line)
+    return " ".join(values)
+
+
+_NON_LETTER_RE = re.compile(r"[^A-Z ]+")
+
+
+def fold_turkish_name(s: str | None) -> str:
+    """
+    Eşleştirme anahtarı: Türkçe kurallarla büyük harfe çevrilir, ASCII'ye katlanır
+    (Ç→C, Ğ→G, İ/ı→I, Ö→O, Ş→S, Ü→U), harf dışı karakterler atılır.
+    "Çağrı Öztürk" -> "CAGRI OZTURK"
+    """
+    if not s:
+        return ""
+    s = unicodedata.normalize("NFC", s).replace("i", "İ").replace("ı", "I").upper()
+    s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
+    return " ".join(_NON_LETTER_RE.sub(" ", s).split())
 
 
 def clean_person_name(s: str | None) -> str | None:
@@ -116,15 +104,15 @@ def clean_person_name(s: str | None) -> str | None:
     
     toks = s.split()
     if len(toks) > 4:
-        logger.debug(f"İsim 4 kelimeden uzun, kırpılıyor: {s}")
+        logger.debug("İsim 4 kelimeden uzun, kırpılıyor: %s", pii_name(s))
         toks = toks[:4]
     
     if len(toks) < 2:
-        logger.warning(f"İsim çok kısa: {s}")
+        logger.warning("İsim çok kısa: %s", pii_name(s))
         return None
     
     result = " ".join(toks) if toks else None
-    logger.debug(f"Temizlenmiş isim: {result}")
+    logger.debug("Temizlenmiş isim: %s", pii_name(result))
     return result
 
 def extract_name_from_form(text: str) -> str | None: